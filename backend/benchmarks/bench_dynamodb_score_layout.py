@@ -0,0 +1,84 @@
+"""DynamoDB の採点アイテムの持ち方（DDB_SCORE_LAYOUT=cell / ballot）の比較。
+
+`cd backend && uv run python benchmarks/bench_dynamodb_score_layout.py --entries 50`
+
+1票（全採点対象の採点）の書き込みで書くアイテム数と、イベント全体の採点の読み取りで
+読むアイテム数・所要時間を比べる。DynamoDB は moto（ローカルのスタンドイン）なので、
+時間は実環境の往復時間を含まない。アイテム数（書き込み・読み取り容量に比例）を見ること。
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from bench_suite import backend_env, summarize
+
+from m1.domain import ScoreItem
+from m1.store import DynamoDBStore
+
+
+def bench_layout(layout: str, participants: int, entries: int) -> dict[str, object]:
+    written: list[int] = []
+    read_items: list[int] = []
+    with backend_env("dynamodb"):
+        store = DynamoDBStore.from_env()
+        store.score_layout = layout  # type: ignore[assignment]
+        events = store.client.meta.events
+        events.register(
+            "provide-client-params.dynamodb.TransactWriteItems",
+            lambda params, **_kwargs: written.append(
+                sum(1 for a in params["TransactItems"] if "Put" in a)
+            ),
+        )
+        events.register(
+            "after-call.dynamodb.Query",
+            lambda parsed, **_kwargs: read_items.append(parsed.get("Count", 0)),
+        )
+
+        rng = random.Random(0)
+        event = store.create_event("bench", [f"出場者{i}" for i in range(entries)])
+        joined = [store.join_event(event.id, f"参加者{i}") for i in range(participants)]
+        read_items.clear()
+        samples: list[float] = []
+        for p in joined:
+            ballot = [ScoreItem(entry_id=e.id, score=rng.randint(0, 100)) for e in event.entries]
+            start = time.perf_counter()
+            store.put_scores(event.id, p.id, p.participant_key, ballot)
+            samples.append(time.perf_counter() - start)
+
+        read_items.clear()
+        start = time.perf_counter()
+        scores = store.list_scores_by_participant(event.id)
+        list_seconds = time.perf_counter() - start
+        assert len(scores) == participants
+
+    return {
+        "put_scores": summarize(samples),
+        "items_written_per_ballot": sum(written) / len(written),
+        "items_read_per_event": sum(read_items),
+        "list_scores_ms": list_seconds * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--participants", type=int, default=30)
+    parser.add_argument("--entries", type=int, default=50)
+    args = parser.parse_args()
+
+    for layout in ("cell", "ballot"):
+        result = bench_layout(layout, args.participants, args.entries)
+        latency = result["put_scores"]
+        assert isinstance(latency, dict)
+        print(
+            f"{layout:6}: put_scores p50 {latency['p50_ms']:7.2f} ms, "
+            f"items written/ballot {result['items_written_per_ballot']:5.1f}, "
+            f"list_scores {result['list_scores_ms']:7.2f} ms "
+            f"({result['items_read_per_event']} items read)"
+        )
+
+
+if __name__ == "__main__":
+    main()
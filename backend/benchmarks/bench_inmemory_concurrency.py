@@ -0,0 +1,72 @@
+"""InMemoryStore への並行書き込みのスループット: 1イベントに集中する場合と分散する場合。
+
+`cd backend && uv run python benchmarks/bench_inmemory_concurrency.py --threads 8`
+
+同時に結果を読み続けるスレッドも動かし、読み取りが書き込みを塞がないことを確かめる。
+GIL のある CPython ではスレッド数に比例しては伸びないが、イベント単位のロックなので
+別イベントへの書き込みは互いを待たない（free-threaded ビルドではそのまま並列になる）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from m1.domain import ScoreItem
+from m1.store import InMemoryStore
+
+
+def _run(threads: int, n_events: int, writes: int, participants: int) -> tuple[float, int]:
+    store = InMemoryStore.create()
+    events = [store.create_event(f"t{i}", [f"e{j}" for j in range(10)]) for i in range(n_events)]
+    members = {e.id: [store.join_event(e.id, f"p{i}") for i in range(participants)] for e in events}
+
+    stop = threading.Event()
+    reads = 0
+
+    def reader() -> None:
+        nonlocal reads
+        while not stop.is_set():
+            for event in events:
+                store.list_scores_by_participant(event.id)
+                store.get_ranked_totals(event)
+                reads += 1
+
+    def writer(worker: int) -> None:
+        event = events[worker % n_events]
+        people = members[event.id]
+        items = [ScoreItem(entry_id=e.id, score=worker % 100) for e in event.entries]
+        for i in range(writes):
+            p = people[i % len(people)]
+            store.put_scores(event.id, p.id, p.participant_key, items)
+
+    reader_thread = threading.Thread(target=reader)
+    reader_thread.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(writer, range(threads)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    reader_thread.join()
+    return threads * writes / elapsed, reads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--participants", type=int, default=200)
+    args = parser.parse_args()
+
+    for n_events in (1, args.threads):
+        ops, reads = _run(args.threads, n_events, args.writes, args.participants)
+        print(
+            f"threads={args.threads} events={n_events:2}: {ops:10.0f} writes/s "
+            f"(concurrent result reads: {reads})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""InMemoryStore の追記ログ: 採点の書き込み時間と、再起動時の復元時間。
+
+`cd backend && uv run python benchmarks/bench_inmemory_log.py --writes 20000`
+
+追記ログなし・fsync をまとめる（既定 50ms）・書き込みごとに fsync の3通りで書き込みの
+p50/p95 を比べ、その後同じディレクトリから復元する時間を圧縮の前後で測る。
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from bench_suite import summarize
+
+from m1.domain import ScoreItem
+from m1.score_log import ScoreLog
+from m1.store import InMemoryStore
+
+
+def _write(store: InMemoryStore, participants: int, entries: int, writes: int) -> dict:
+    rng = random.Random(0)
+    event = store.create_event("bench", [f"出場者{i}" for i in range(entries)])
+    joined = [store.join_event(event.id, f"参加者{i}") for i in range(participants)]
+    samples: list[float] = []
+    for _ in range(writes):
+        p = rng.choice(joined)
+        items = [ScoreItem(entry_id=rng.choice(event.entries).id, score=rng.randint(0, 100))]
+        start = time.perf_counter()
+        store.put_scores(event.id, p.id, p.participant_key, items)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _recover(directory: Path) -> tuple[float, int]:
+    log = ScoreLog(directory, fsync_interval=0)
+    store = InMemoryStore.create(score_log=log)
+    start = time.perf_counter()
+    replayed = store.recover()
+    elapsed = time.perf_counter() - start
+    store.close()
+    return elapsed, replayed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--participants", type=int, default=200)
+    parser.add_argument("--entries", type=int, default=10)
+    parser.add_argument("--writes", type=int, default=20000)
+    args = parser.parse_args()
+
+    for name, fsync_interval in (("no log", None), ("fsync 50ms", 0.05), ("fsync each", 0.0)):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = None
+            if fsync_interval is not None:
+                log = ScoreLog(Path(tmp), fsync_interval=fsync_interval)
+            store = InMemoryStore.create(score_log=log)
+            writes = args.writes if fsync_interval != 0.0 else min(args.writes, 2000)
+            latency = _write(store, args.participants, args.entries, writes)
+            store.close()
+            print(
+                f"{name:10}: put_scores p50 {latency['p50_ms'] * 1000:7.1f} us, "
+                f"p95 {latency['p95_ms'] * 1000:7.1f} us"
+            )
+            if log is None or fsync_interval == 0.0:
+                continue
+
+            elapsed, replayed = _recover(Path(tmp))
+            print(f"  recover from log     : {elapsed * 1000:7.1f} ms ({replayed} records)")
+            compacting = InMemoryStore.create(score_log=ScoreLog(Path(tmp), fsync_interval=0))
+            compacting.recover()
+            compacting.compact()
+            compacting.close()
+            elapsed, replayed = _recover(Path(tmp))
+            print(f"  recover from snapshot: {elapsed * 1000:7.1f} ms ({replayed} records)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""InMemoryStore の採点1セルあたりのメモリ量: 以前の表現と行列表現の比較。
+
+`cd backend && uv run python benchmarks/bench_inmemory_memory.py --participants 2000`
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tracemalloc
+from collections.abc import Callable
+
+from m1.domain import ScoreItem
+from m1.store import InMemoryStore
+
+
+def _measure(build: Callable[[], object]) -> int:
+    """`build` が作って返したオブジェクトが保持しているメモリ量（バイト）を返す。"""
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--participants", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    cells = args.participants * args.entries
+
+    store = InMemoryStore.create()
+    event = store.create_event("bench", [f"出場者{i}" for i in range(args.entries)])
+    participants = [store.join_event(event.id, f"参加者{i}") for i in range(args.participants)]
+    score_lists = [
+        [ScoreItem(entry_id=e.id, score=rng.randint(0, 100)) for e in event.entries]
+        for _ in participants
+    ]
+    for p, items in zip(participants, score_lists):
+        store.put_scores(event.id, p.id, p.participant_key, items)
+
+    def tuple_keyed() -> object:
+        # 初期実装: (event_id, participant_id, entry_id) -> score
+        return {
+            (event.id, p.id, item.entry_id): int(item.score)
+            for p, items in zip(participants, score_lists)
+            for item in items
+        }
+
+    def nested_dicts() -> object:
+        # 行列化する前の InMemoryStore: participant_id -> entry_id -> score
+        return {
+            p.id: {item.entry_id: int(item.score) for item in items}
+            for p, items in zip(participants, score_lists)
+        }
+
+    results = [
+        ("tuple-keyed dict", _measure(tuple_keyed)),
+        ("nested dicts", _measure(nested_dicts)),
+        # ID 文字列は参加者・採点対象のレコードが持つので、行列は採点値だけを持つ。
+        ("bytearray matrix", sys.getsizeof(store.indexes[event.id].cells)),
+    ]
+    print(f"cells: {args.participants} x {args.entries} = {cells}")
+    for label, size in results:
+        print(f"{label:17}: {size / cells:7.1f} bytes/cell ({size / 1024:8.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""採点の書き込み（PUT .../scores）1回あたりの DynamoDB 呼び出し数と所要時間。
+
+`cd backend && uv run python benchmarks/bench_participant_keys.py --requests 200`
+
+従来のランダムな参加者キーと、署名付きキー（PARTICIPANT_KEY_SECRETS）を比べる。
+DynamoDB は moto（ローカルのスタンドイン）なので、時間は実環境の往復時間を含まない。
+往復の回数（操作ごとの呼び出し数）を見ること。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+from collections import Counter
+
+import boto3
+from bench_suite import backend_env, summarize
+from fastapi.testclient import TestClient
+
+from m1.main import create_app
+
+
+def bench_put_scores(secrets: str | None, participants: int, requests: int) -> dict[str, object]:
+    calls: Counter[str] = Counter()
+    with backend_env("dynamodb"):
+        if secrets:
+            os.environ["PARTICIPANT_KEY_SECRETS"] = secrets
+        session = boto3._get_default_session()
+        session.events.register(
+            "before-call.dynamodb.*",
+            lambda model, **_kwargs: calls.update([model.name]),
+            unique_id="bench-participant-keys",
+        )
+        try:
+            with TestClient(create_app()) as client:
+                event_id = client.post(
+                    "/api/events", json={"title": "bench", "entries": ["A", "B", "C"]}
+                ).json()["event_id"]
+                entry_ids = [
+                    e["id"] for e in client.get(f"/api/events/{event_id}").json()["entries"]
+                ]
+                joined = [
+                    client.post(f"/api/events/{event_id}/join", json={"name": f"p{i}"}).json()
+                    for i in range(participants)
+                ]
+
+                rng = random.Random(0)
+                calls.clear()
+                samples: list[float] = []
+                for _ in range(requests):
+                    p = rng.choice(joined)
+                    body = {
+                        "scores": [{"entry_id": e, "score": rng.randint(0, 100)} for e in entry_ids]
+                    }
+                    start = time.perf_counter()
+                    resp = client.put(
+                        f"/api/events/{event_id}/participants/{p['participant_id']}/scores",
+                        json=body,
+                        headers={"X-Participant-Key": p["participant_key"]},
+                    )
+                    samples.append(time.perf_counter() - start)
+                    assert resp.status_code == 200, resp.text
+        finally:
+            session.events.unregister("before-call.dynamodb.*", unique_id="bench-participant-keys")
+
+    return {
+        "latency": summarize(samples),
+        "calls_per_request": {op: n / requests for op, n in sorted(calls.items())},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--participants", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    for name, secrets in (("opaque keys", None), ("signed keys", "bench-secret")):
+        result = bench_put_scores(secrets, args.participants, args.requests)
+        latency = result["latency"]
+        calls = result["calls_per_request"]
+        assert isinstance(latency, dict) and isinstance(calls, dict)
+        print(
+            f"{name:12}: p50 {latency['p50_ms']:6.2f} ms, p95 {latency['p95_ms']:6.2f} ms, "
+            f"DynamoDB calls/request {sum(calls.values()):.2f} "
+            + " ".join(f"{op}={n:.2f}" for op, n in calls.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
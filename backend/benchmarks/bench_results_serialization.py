@@ -0,0 +1,79 @@
+"""/results の JSON 生成: Pydantic 経由と高速経路の比較。
+
+`cd backend && uv run python benchmarks/bench_results_serialization.py --participants 2000`
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+from m1.domain import Entry, Event, Participant, ResultsResponse
+from m1.ranking import compute_overall
+from m1.results import encode_results_json, rank_per_participant
+
+
+def _make_event(n_participants: int, n_entries: int, seed: int):
+    rng = random.Random(seed)
+    entries = [Entry(id=f"ent_{i:032x}", name=f"出場者{i}") for i in range(n_entries)]
+    event = Event(
+        id="evt_bench", title="bench", entries=entries, created_at=datetime.now(timezone.utc)
+    )
+    participants = [
+        Participant(id=f"p_{i:032x}", name=f"参加者{i}", participant_key="k")
+        for i in range(n_participants)
+    ]
+    scores = {p.id: {e.id: rng.randint(0, 100) for e in entries} for p in participants}
+    return event, participants, scores
+
+
+def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--participants", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    event, participants, scores = _make_event(args.participants, args.entries, seed=0)
+    overall = compute_overall(event.entries, scores)
+    ranked_totals = [(r.entry_id, r.total_score) for r in overall]
+
+    def pydantic_path() -> bytes:
+        return (
+            ResultsResponse(
+                event_id=event.id,
+                event_title=event.title,
+                overall=compute_overall(event.entries, scores),
+                per_participant=rank_per_participant(event.entries, participants, scores),
+            )
+            .model_dump_json()
+            .encode()
+        )
+
+    def fast_path() -> bytes:
+        return encode_results_json(event, participants, scores, ranked_totals)
+
+    assert pydantic_path() == fast_path(), "fast path must produce byte-identical JSON"
+
+    slow = _time(pydantic_path, args.repeat)
+    fast = _time(fast_path, args.repeat)
+    size = len(fast_path())
+    print(f"cells: {args.participants} x {args.entries}, payload: {size / 1024:.0f} KiB")
+    print(f"pydantic : {slow * 1000:8.1f} ms")
+    print(f"fast path: {fast * 1000:8.1f} ms  ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
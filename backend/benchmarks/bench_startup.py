@@ -0,0 +1,89 @@
+"""コールドスタート相当の計測: `m1.main` の import（create_app を含む）と最初のリクエスト。
+
+`cd backend && uv run python benchmarks/bench_startup.py --repeat 10`
+
+毎回新しいプロセスで `import m1.main` し、Mangum のハンドラに API Gateway（HTTP API）形式の
+イベントを1つ渡すまでの時間を測る。`AWS_LAMBDA_FUNCTION_NAME` を設定した場合（Lambda 上と同じ
+API のみのモード）と設定しない場合を比べ、boto3 が読み込まれたかも表示する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+_CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import m1.main
+imported = time.perf_counter()
+event = {
+    "version": "2.0",
+    "routeKey": "$default",
+    "rawPath": "/health",
+    "rawQueryString": "",
+    "headers": {"host": "localhost"},
+    "requestContext": {
+        "http": {
+            "method": "GET",
+            "path": "/health",
+            "protocol": "HTTP/1.1",
+            "sourceIp": "127.0.0.1",
+            "userAgent": "bench",
+        },
+        "stage": "$default",
+    },
+    "isBase64Encoded": False,
+}
+resp = m1.main.handler(event, None)
+done = time.perf_counter()
+assert resp["statusCode"] == 200, resp
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (done - imported) * 1000,
+    "boto3_loaded": "boto3" in sys.modules,
+}))
+"""
+
+
+def _run(env_overrides: dict[str, str], repeat: int) -> dict[str, object]:
+    src = Path(__file__).resolve().parents[1] / "src"
+    env = {**os.environ, "PYTHONPATH": str(src), **env_overrides}
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD], env=env, check=True, capture_output=True, text=True
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "import_ms": statistics.median(s["import_ms"] for s in samples),
+        "first_request_ms": statistics.median(s["first_request_ms"] for s in samples),
+        "boto3_loaded": any(s["boto3_loaded"] for s in samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    scenarios = {
+        "inmemory (local)": {"STORE_BACKEND": "inmemory"},
+        "inmemory (lambda)": {"STORE_BACKEND": "inmemory", "AWS_LAMBDA_FUNCTION_NAME": "bench"},
+    }
+    for name, env in scenarios.items():
+        result = _run(env, args.repeat)
+        print(
+            f"{name:18}: import {result['import_ms']:7.1f} ms, "
+            f"first request {result['first_request_ms']:6.1f} ms, "
+            f"boto3 loaded: {result['boto3_loaded']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
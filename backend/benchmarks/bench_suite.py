@@ -0,0 +1,380 @@
+"""採点APIのベンチマーク一式（順位計算・Store の各メソッド・APIの負荷シナリオ）。
+
+`cd backend && uv run python benchmarks/bench_suite.py --backend inmemory --output bench.json`
+
+- ranking: `m1.ranking` / `m1.results` の順位計算と JSON 生成
+- store: Store の各メソッド（同期版を直接呼ぶ）
+- load: `create_app()` に対して「イベント作成 -> N人参加 -> M回の採点」を行い、
+  その間 K 個のクライアントが `/results` をポーリングし続ける
+
+`--backend dynamodb` は moto（ローカルのスタンドイン）上のテーブルを使う。
+レイテンシは p50/p95/p99（ミリ秒）、スループットは1秒あたりの件数で報告し、
+`--output` に JSON で保存する。`--baseline` に以前の JSON を渡すと比較を表示する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any
+
+from m1.domain import Entry, Event, Participant, ScoreItem
+from m1.ranking import compute_overall, compute_per_participant
+from m1.results import encode_results_json, rank_per_participant
+from m1.store import Store, build_store
+
+
+def summarize(samples: list[float], elapsed: float | None = None) -> dict[str, float]:
+    """秒単位の計測値から件数・平均・p50/p95/p99（ミリ秒）・スループットを求める。"""
+
+    ordered = sorted(samples)
+
+    def pct(q: float) -> float:
+        return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))] * 1000
+
+    summary = {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
+    total = elapsed if elapsed is not None else sum(ordered)
+    summary["throughput_per_s"] = len(ordered) / total if total > 0 else 0.0
+    return summary
+
+
+def _time_each(fn: Callable[[], object], repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+@contextmanager
+def backend_env(backend: str) -> Iterator[None]:
+    """`build_store` / `create_app` が指定のバックエンドを使うように環境変数を設定する。"""
+
+    saved = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["STORE_BACKEND"] = backend
+        try:
+            if backend == "sqlite":
+                os.environ["SQLITE_PATH"] = os.path.join(tmp, "bench.sqlite3")
+                yield
+            elif backend == "dynamodb":
+                with _moto_table():
+                    yield
+            else:
+                yield
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+
+
+@contextmanager
+def _moto_table() -> Iterator[None]:
+    import boto3
+    from moto import mock_aws
+
+    os.environ.update(
+        {
+            "AWS_ACCESS_KEY_ID": "testing",
+            "AWS_SECRET_ACCESS_KEY": "testing",
+            "AWS_DEFAULT_REGION": "ap-northeast-1",
+            "DDB_TABLE_NAME": "m1_bench",
+            # moto の TransactWriteItems はスレッドセーフでないので、呼び出しを1本に絞る。
+            "DDB_MAX_POOL_CONNECTIONS": "1",
+        }
+    )
+    os.environ.pop("AWS_PROFILE", None)
+    with mock_aws():
+        boto3.client("dynamodb").create_table(
+            TableName="m1_bench",
+            AttributeDefinitions=[
+                {"AttributeName": "pk", "AttributeType": "S"},
+                {"AttributeName": "sk", "AttributeType": "S"},
+            ],
+            KeySchema=[
+                {"AttributeName": "pk", "KeyType": "HASH"},
+                {"AttributeName": "sk", "KeyType": "RANGE"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield
+
+
+def bench_ranking(participants: int, entries: int, repeat: int) -> dict[str, Any]:
+    rng = random.Random(0)
+    entry_list = [Entry(id=f"ent_{i:032x}", name=f"出場者{i}") for i in range(entries)]
+    people = [
+        Participant(id=f"p_{i:032x}", name=f"参加者{i}", participant_key="k")
+        for i in range(participants)
+    ]
+    scores = {p.id: {e.id: rng.randint(0, 100) for e in entry_list} for p in people}
+    overall = compute_overall(entry_list, scores)
+    ranked_totals = [(r.entry_id, r.total_score) for r in overall]
+
+    event = Event(
+        id="evt_bench", title="bench", entries=entry_list, created_at=datetime.now(timezone.utc)
+    )
+    cases: dict[str, Callable[[], object]] = {
+        "compute_overall": lambda: compute_overall(entry_list, scores),
+        "compute_per_participant": lambda: compute_per_participant(entry_list, people, scores),
+        "rank_per_participant": lambda: rank_per_participant(entry_list, people, scores),
+        "encode_results_json": lambda: encode_results_json(event, people, scores, ranked_totals),
+    }
+    return {name: summarize(_time_each(fn, repeat)) for name, fn in cases.items()}
+
+
+def bench_store(store: Store, participants: int, entries: int, repeat: int) -> dict[str, Any]:
+    rng = random.Random(1)
+    results: dict[str, Any] = {}
+
+    samples = []
+    event = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        event = store.create_event("bench", [f"出場者{i}" for i in range(entries)])
+        samples.append(time.perf_counter() - start)
+    assert event is not None
+    results["create_event"] = summarize(samples)
+
+    joined: list[Participant] = []
+    samples = []
+    for i in range(participants):
+        start = time.perf_counter()
+        joined.append(store.join_event(event.id, f"参加者{i}"))
+        samples.append(time.perf_counter() - start)
+    results["join_event"] = summarize(samples)
+
+    samples = []
+    for p in joined:
+        items = [ScoreItem(entry_id=e.id, score=rng.randint(0, 100)) for e in event.entries]
+        start = time.perf_counter()
+        store.put_scores(event.id, p.id, p.participant_key, items)
+        samples.append(time.perf_counter() - start)
+    results["put_scores"] = summarize(samples)
+
+    target = joined[len(joined) // 2]
+    point_reads: dict[str, Callable[[], object]] = {
+        "get_event": lambda: store.get_event(event.id),
+        "get_participant": lambda: store.get_participant(event.id, target.id),
+        "get_event_with_participant": lambda: store.get_event_with_participant(event.id, target.id),
+        "get_scores": lambda: store.get_scores(event.id, target.id),
+        "get_ranked_totals": lambda: store.get_ranked_totals(event),
+        "get_event_version": lambda: store.get_event_version(event.id),
+    }
+    for name, fn in point_reads.items():
+        results[name] = summarize(_time_each(fn, repeat * 10))
+
+    scans: dict[str, Callable[[], object]] = {
+        "list_participants": lambda: store.list_participants(event.id),
+        "list_scores_by_participant": lambda: store.list_scores_by_participant(event.id),
+    }
+    for name, fn in scans.items():
+        results[name] = summarize(_time_each(fn, repeat))
+    return results
+
+
+async def bench_load(
+    participants: int, entries: int, updates: int, pollers: int, concurrency: int
+) -> dict[str, Any]:
+    import httpx
+
+    from m1.main import create_app
+
+    app = create_app()
+    latencies: dict[str, list[float]] = {"join": [], "put_scores": [], "results": []}
+    statuses: dict[str, int] = {}
+    rng = random.Random(2)
+    limit = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+
+        async def call(kind: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+            async with limit:
+                start = time.perf_counter()
+                resp = await client.request(method, url, **kwargs)
+                latencies[kind].append(time.perf_counter() - start)
+            key = f"{kind}:{resp.status_code}"
+            statuses[key] = statuses.get(key, 0) + 1
+            return resp
+
+        created = await client.post(
+            "/api/events",
+            json={"title": "bench", "entries": [f"出場者{i}" for i in range(entries)]},
+        )
+        event_id = created.json()["event_id"]
+        entry_ids = [
+            e["id"] for e in (await client.get(f"/api/events/{event_id}")).json()["entries"]
+        ]
+
+        started = time.perf_counter()
+        joins = await asyncio.gather(
+            *(
+                call("join", "POST", f"/api/events/{event_id}/join", json={"name": f"参加者{i}"})
+                for i in range(participants)
+            )
+        )
+        join_elapsed = time.perf_counter() - started
+        members = [r.json() for r in joins if r.status_code == 200]
+
+        writers_done = asyncio.Event()
+
+        async def poller() -> None:
+            etag = None
+            while not writers_done.is_set():
+                headers = {"If-None-Match": etag} if etag else {}
+                resp = await call(
+                    "results", "GET", f"/api/events/{event_id}/results", headers=headers
+                )
+                etag = resp.headers.get("ETag", etag)
+
+        async def update(i: int) -> None:
+            member = members[i % len(members)]
+            await call(
+                "put_scores",
+                "PUT",
+                f"/api/events/{event_id}/participants/{member['participant_id']}/scores",
+                json={
+                    "scores": [
+                        {"entry_id": eid, "score": rng.randint(0, 100)}
+                        for eid in rng.sample(entry_ids, k=min(5, len(entry_ids)))
+                    ]
+                },
+                headers={"X-Participant-Key": member["participant_key"]},
+            )
+
+        poll_tasks = [asyncio.create_task(poller()) for _ in range(pollers)]
+        started = time.perf_counter()
+        await asyncio.gather(*(update(i) for i in range(updates)))
+        update_elapsed = time.perf_counter() - started
+        writers_done.set()
+        await asyncio.gather(*poll_tasks)
+
+    return {
+        "join": summarize(latencies["join"], join_elapsed),
+        "put_scores": summarize(latencies["put_scores"], update_elapsed),
+        "results": summarize(latencies["results"], update_elapsed)
+        if latencies["results"]
+        else None,
+        "statuses": statuses,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """p95 の悪化・スループットの低下が `tolerance` を超えた項目を表示し、その一覧を返す。"""
+
+    regressions: list[str] = []
+    for section in ("ranking", "store", "load"):
+        for name, now in (current.get(section) or {}).items():
+            before = (baseline.get(section) or {}).get(name)
+            if not isinstance(now, dict) or not isinstance(before, dict) or "p95_ms" not in now:
+                continue
+            p95_ratio = now["p95_ms"] / before["p95_ms"] if before["p95_ms"] else 1.0
+            tput_ratio = (
+                now["throughput_per_s"] / before["throughput_per_s"]
+                if before.get("throughput_per_s")
+                else 1.0
+            )
+            flag = ""
+            if p95_ratio > 1 + tolerance or tput_ratio < 1 - tolerance:
+                flag = "  <-- regression"
+                regressions.append(f"{section}.{name}")
+            print(
+                f"{section}.{name:28} p95 {before['p95_ms']:9.3f} -> {now['p95_ms']:9.3f} ms "
+                f"({p95_ratio:5.2f}x)  throughput {tput_ratio:5.2f}x{flag}"
+            )
+    return regressions
+
+
+def _print_section(title: str, results: dict[str, Any]) -> None:
+    print(f"== {title}")
+    for name, s in results.items():
+        if not isinstance(s, dict) or "p50_ms" not in s:
+            continue
+        print(
+            f"  {name:28} n={s['count']:6} p50={s['p50_ms']:9.3f} p95={s['p95_ms']:9.3f} "
+            f"p99={s['p99_ms']:9.3f} ms  {s['throughput_per_s']:10.1f}/s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["inmemory", "sqlite", "dynamodb"], default="inmemory")
+    parser.add_argument("--participants", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=2000, help="負荷シナリオの採点回数")
+    parser.add_argument("--pollers", type=int, default=20, help="/results をポーリングする数")
+    parser.add_argument("--concurrency", type=int, default=32, help="同時に発行する API 呼び出し数")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", choices=["ranking", "store", "load"], action="append", help="実行する項目"
+    )
+    parser.add_argument("--output", help="結果を保存する JSON ファイル")
+    parser.add_argument("--baseline", help="比較対象の JSON ファイル")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="許容する悪化の割合")
+    args = parser.parse_args()
+    sections = set(args.only or ["ranking", "store", "load"])
+
+    report: dict[str, Any] = {
+        "meta": {
+            "backend": args.backend,
+            "participants": args.participants,
+            "entries": args.entries,
+            "updates": args.updates,
+            "pollers": args.pollers,
+            "python": platform.python_version(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+    }
+    if "ranking" in sections:
+        report["ranking"] = bench_ranking(args.participants, args.entries, args.repeat)
+        _print_section("ranking", report["ranking"])
+    if "store" in sections:
+        with backend_env(args.backend):
+            report["store"] = bench_store(
+                build_store(), args.participants, args.entries, args.repeat
+            )
+        _print_section(f"store ({args.backend})", report["store"])
+    if "load" in sections:
+        with backend_env(args.backend):
+            report["load"] = asyncio.run(
+                bench_load(
+                    args.participants, args.entries, args.updates, args.pollers, args.concurrency
+                )
+            )
+        _print_section(f"load ({args.backend})", report["load"])
+        print(f"  statuses: {report['load']['statuses']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"== compared with {args.baseline}")
+        for key in ("backend", "participants", "entries", "updates", "pollers"):
+            if baseline.get("meta", {}).get(key) != report["meta"][key]:
+                print(f"  warning: {key} differs from the baseline")
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
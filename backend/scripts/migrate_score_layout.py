@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import argparse
+import os
+
+from m1.store import DynamoDBStore
+
+
+def _required_env(name: str) -> str:
+    v = os.environ.get(name, "").strip()
+    if not v:
+        raise SystemExit(f"{name} is required")
+    return v
+
+
+def _all_event_ids(store: DynamoDBStore) -> list[str]:
+    paginator = store.client.get_paginator("scan")
+    event_ids: list[str] = []
+    for page in paginator.paginate(
+        TableName=store.table_name,
+        FilterExpression="sk = :meta",
+        ExpressionAttributeValues={":meta": {"S": "META"}},
+        ProjectionExpression="pk",
+    ):
+        for item in page.get("Items", []):
+            event_ids.append(item["pk"]["S"].split("#", 1)[1])
+    return event_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "採点アイテムの持ち方を変換する（cell: SCORE#{参加者}#{採点対象} のセル単位、"
+            "ballot: BALLOT#{参加者} の参加者単位）。書き込みを止めてから実行し、"
+            "DDB_SCORE_LAYOUT を切り替えた後で --delete-source を付けて元のアイテムだけを消す。"
+        )
+    )
+    parser.add_argument("event_ids", nargs="*", help="対象のイベントID")
+    parser.add_argument("--all", action="store_true", help="テーブル内の全イベントを対象にする")
+    parser.add_argument("--to", choices=["ballot", "cell"], default="ballot", help="変換先")
+    parser.add_argument(
+        "--delete-source", action="store_true", help="変換はせず、変換元の持ち方のアイテムを消す"
+    )
+    args = parser.parse_args()
+
+    store = DynamoDBStore(table_name=_required_env("DDB_TABLE_NAME"), score_layout=args.to)
+    source = "cell" if args.to == "ballot" else "ballot"
+    event_ids = _all_event_ids(store) if args.all else args.event_ids
+    if not event_ids:
+        parser.error("event_ids or --all is required")
+
+    for event_id in event_ids:
+        if args.delete_source:
+            deleted = store.delete_score_items(event_id, source)
+            print(f"Deleted {source} score items: {event_id} ({deleted} items)")
+            continue
+        migrated = store.migrate_score_layout(event_id, source)
+        print(f"Migrated {source} -> {args.to}: {event_id} ({migrated} participants)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import argparse
+import os
+
+from m1.store import DynamoDBStore
+
+
+def _required_env(name: str) -> str:
+    v = os.environ.get(name, "").strip()
+    if not v:
+        raise SystemExit(f"{name} is required")
+    return v
+
+
+def _all_event_ids(store: DynamoDBStore) -> list[str]:
+    paginator = store.client.get_paginator("scan")
+    event_ids: list[str] = []
+    for page in paginator.paginate(
+        TableName=store.table_name,
+        FilterExpression="sk = :meta",
+        ExpressionAttributeValues={":meta": {"S": "META"}},
+        ProjectionExpression="pk",
+    ):
+        for item in page.get("Items", []):
+            event_ids.append(item["pk"]["S"].split("#", 1)[1])
+    return event_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "採点アイテム（DDB_SCORE_LAYOUT に応じて SCORE# / BALLOT#）から"
+            "イベントの合計点アイテム（TOTALS。合計以外の集計方法なら統計も）を作り直す。"
+        )
+    )
+    parser.add_argument("event_ids", nargs="*", help="対象のイベントID")
+    parser.add_argument("--all", action="store_true", help="テーブル内の全イベントを対象にする")
+    args = parser.parse_args()
+
+    _required_env("DDB_TABLE_NAME")
+    # 採点アイテムの持ち方（DDB_SCORE_LAYOUT）もアプリと同じ設定で読む。
+    store = DynamoDBStore.from_env()
+    event_ids = _all_event_ids(store) if args.all else args.event_ids
+    if not event_ids:
+        parser.error("event_ids or --all is required")
+
+    for event_id in event_ids:
+        totals = store.rebuild_totals(event_id)
+        if totals is None:
+            print(f"Event not found: {event_id}")
+            continue
+        print(f"Rebuilt totals: {event_id} ({sum(totals.values())} points)")
+
+
+if __name__ == "__main__":
+    main()
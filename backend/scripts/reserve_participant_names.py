@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import argparse
+import os
+
+from m1.store import DynamoDBStore
+
+
+def _required_env(name: str) -> str:
+    v = os.environ.get(name, "").strip()
+    if not v:
+        raise SystemExit(f"{name} is required")
+    return v
+
+
+def _all_event_ids(store: DynamoDBStore) -> list[str]:
+    paginator = store.client.get_paginator("scan")
+    event_ids: list[str] = []
+    for page in paginator.paginate(
+        TableName=store.table_name,
+        FilterExpression="sk = :meta",
+        ExpressionAttributeValues={":meta": {"S": "META"}},
+        ProjectionExpression="pk",
+    ):
+        for item in page.get("Items", []):
+            event_ids.append(item["pk"]["S"].split("#", 1)[1])
+    return event_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "既存の参加者の名前を予約アイテム（NAME#）に登録する。予約アイテムの導入前に"
+            "参加した参加者と同じ名前で参加できないようにする。"
+        )
+    )
+    parser.add_argument("event_ids", nargs="*", help="対象のイベントID")
+    parser.add_argument("--all", action="store_true", help="テーブル内の全イベントを対象にする")
+    args = parser.parse_args()
+
+    store = DynamoDBStore(table_name=_required_env("DDB_TABLE_NAME"))
+    event_ids = _all_event_ids(store) if args.all else args.event_ids
+    if not event_ids:
+        parser.error("event_ids or --all is required")
+
+    for event_id in event_ids:
+        reserved = store.reserve_participant_names(event_id)
+        print(f"Reserved participant names: {event_id} ({reserved} names)")
+
+
+if __name__ == "__main__":
+    main()
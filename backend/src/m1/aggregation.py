@@ -0,0 +1,258 @@
+"""合計以外の集計方法（平均・中央値・トリム平均・審査員ごとの z スコア）。
+
+採点のたびに全件から計算し直さず、採点対象ごとの件数・合計と、0〜100点の出現数を持つ
+Fenwick 木（順序統計量）を差分で更新する。z スコアは審査員（参加者）ごとの件数・合計・
+二乗和も持つ。採点の無いセルはどの集計にも含めない（合計では 0 点と同じ）。
+
+永続化するストア（SQLite・DynamoDB）は、採点対象ごとの点数の出現数と z スコアの合計を
+採点と同じトランザクションで `stat_deltas` の差分だけ更新し、`ranked_from_stats` で順位を
+求める（採点の全件は読まない）。
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, insort
+from collections.abc import Iterable, Mapping, Sequence
+
+from .domain import AggregationMode
+
+MAX_SCORE = 100
+# 浮動小数の誤差で同点が崩れないよう、集計値はこの桁数で丸めてから順位を付ける。
+_DIGITS = 4
+
+
+class _Fenwick:
+    """0〜MAX_SCORE 点の出現数。k 番目に小さい点数を O(log n) で求める。"""
+
+    __slots__ = ("_tree",)
+
+    _SIZE = MAX_SCORE + 1
+    _TOP_BIT = 1 << (_SIZE.bit_length() - 1)
+
+    def __init__(self) -> None:
+        self._tree = [0] * (self._SIZE + 1)
+
+    def add(self, score: int, delta: int) -> None:
+        i = score + 1
+        while i <= self._SIZE:
+            self._tree[i] += delta
+            i += i & -i
+
+    def kth(self, k: int) -> int:
+        """k 番目（1始まり）に小さい点数。"""
+
+        position = 0
+        step = self._TOP_BIT
+        while step:
+            nxt = position + step
+            if nxt <= self._SIZE and self._tree[nxt] < k:
+                position = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return position
+
+
+class _EntryStats:
+    __slots__ = ("count", "total", "counts", "zsum")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.counts = _Fenwick()
+        # 審査員ごとの z スコアの合計（zscore のときだけ使う）。
+        self.zsum = 0.0
+
+    def add(self, score: int, sign: int) -> None:
+        self.count += sign
+        self.total += sign * score
+        self.counts.add(score, sign)
+
+    def value(self, mode: AggregationMode) -> float:
+        n = self.count
+        if n == 0:
+            return 0.0
+        if mode == "average":
+            return self.total / n
+        if mode == "median":
+            low, high = self.counts.kth((n + 1) // 2), self.counts.kth(n // 2 + 1)
+            return (low + high) / 2
+        if mode == "trimmed_mean":
+            if n < 3:
+                return self.total / n
+            return (self.total - self.counts.kth(1) - self.counts.kth(n)) / (n - 2)
+        if mode == "zscore":
+            return self.zsum / n
+        return float(self.total)
+
+
+class _JudgeStats:
+    __slots__ = ("count", "total", "squares")
+
+    def __init__(self, row: dict[str, int]) -> None:
+        self.count = len(row)
+        self.total = sum(row.values())
+        self.squares = sum(s * s for s in row.values())
+
+    def z(self, score: int) -> float:
+        """この審査員の採点の平均・標準偏差で正規化した値。ばらつきが無ければ 0。"""
+
+        if self.count < 2:
+            return 0.0
+        mean = self.total / self.count
+        variance = self.squares / self.count - mean * mean
+        if variance <= 1e-12:
+            return 0.0
+        return (score - mean) / math.sqrt(variance)
+
+
+def _rounded(value: float) -> float:
+    # -0.0 を 0.0 にそろえる。
+    return round(value, _DIGITS) + 0.0
+
+
+class AggregateTotals:
+    """採点対象ごとの集計値を、順位順に並べた状態で保持する。
+
+    並び順は `RankedTotals` と同じ（集計値の降順、同値は entry_id の昇順）。
+    `apply_row` で1参加者分の採点の変化を反映する。平均・中央値・トリム平均は変わった
+    セルだけを O(log 点数) で更新し、z スコアはその参加者が採点した対象だけを更新する。
+    """
+
+    __slots__ = ("mode", "_stats", "_values", "_order")
+
+    def __init__(self, entry_ids: Iterable[str], mode: AggregationMode) -> None:
+        self.mode = mode
+        self._stats: dict[str, _EntryStats] = {eid: _EntryStats() for eid in entry_ids}
+        self._values: dict[str, float] = {eid: 0.0 for eid in self._stats}
+        # (-value, entry_id) の昇順 = 集計値降順・entry_id 昇順
+        self._order: list[tuple[float, str]] = sorted((0.0, eid) for eid in self._values)
+
+    def apply_row(self, old_row: dict[str, int], new_row: dict[str, int]) -> None:
+        """1参加者の採点（採点済みのセルだけ）が old_row から new_row に変わったことを反映する。
+
+        イベントに存在しない採点対象は無視する。
+        """
+
+        old_row = {eid: s for eid, s in old_row.items() if eid in self._stats}
+        new_row = {eid: s for eid, s in new_row.items() if eid in self._stats}
+        touched: set[str] = set()
+        for eid in old_row.keys() | new_row.keys():
+            old, new = old_row.get(eid), new_row.get(eid)
+            if old == new:
+                continue
+            stats = self._stats[eid]
+            if old is not None:
+                stats.add(old, -1)
+            if new is not None:
+                stats.add(new, 1)
+            touched.add(eid)
+
+        if self.mode == "zscore" and touched:
+            # 審査員の平均・標準偏差が変わるので、その審査員が採点した対象を全て入れ替える。
+            for eid, delta in _zscore_deltas(old_row, new_row).items():
+                self._stats[eid].zsum += delta
+            touched |= old_row.keys() | new_row.keys()
+
+        for eid in touched:
+            self._refresh(eid)
+
+    def _refresh(self, entry_id: str) -> None:
+        old = self._values[entry_id]
+        new = _rounded(self._stats[entry_id].value(self.mode))
+        if new == old:
+            return
+        del self._order[bisect_left(self._order, (-old, entry_id))]
+        self._values[entry_id] = new
+        insort(self._order, (-new, entry_id))
+
+    def total(self, entry_id: str) -> float:
+        return self._values.get(entry_id, 0.0)
+
+    def ranked(self) -> Sequence[tuple[str, float]]:
+        """(entry_id, 集計値) を順位順で返す。"""
+
+        return [(eid, -neg_value + 0.0) for neg_value, eid in self._order]
+
+
+def _zscore_deltas(old_row: dict[str, int], new_row: dict[str, int]) -> dict[str, float]:
+    before, after = _JudgeStats(old_row), _JudgeStats(new_row)
+    deltas = {eid: -before.z(score) for eid, score in old_row.items()}
+    for eid, score in new_row.items():
+        deltas[eid] = deltas.get(eid, 0.0) + after.z(score)
+    return deltas
+
+
+def stat_deltas(
+    mode: AggregationMode, old_row: dict[str, int], new_row: dict[str, int]
+) -> tuple[dict[tuple[str, int], int], dict[str, float]]:
+    """1参加者の採点が old_row から new_row に変わったときの、保存する統計の差分。
+
+    Args:
+        mode: イベントの集計方法。合計なら統計は持たない（差分は空）。
+        old_row: 変わる前の採点（イベントの採点対象のセルだけ）。
+        new_row: 変わった後の採点（同上）。
+
+    Returns:
+        ((採点対象, 点数) ごとの出現数の差分, 採点対象ごとの z スコアの合計の差分)。
+        0 の差分は含めない。z スコアの合計は zscore のときだけ返す。
+    """
+
+    counts: dict[tuple[str, int], int] = {}
+    if mode == "sum":
+        return counts, {}
+    for eid in old_row.keys() | new_row.keys():
+        old, new = old_row.get(eid), new_row.get(eid)
+        if old == new:
+            continue
+        if old is not None:
+            counts[(eid, old)] = counts.get((eid, old), 0) - 1
+        if new is not None:
+            counts[(eid, new)] = counts.get((eid, new), 0) + 1
+    zsums: dict[str, float] = {}
+    if mode == "zscore" and counts:
+        zsums = {eid: d for eid, d in _zscore_deltas(old_row, new_row).items() if d != 0.0}
+    return {k: d for k, d in counts.items() if d}, zsums
+
+
+def ranked_from_stats(
+    entry_ids: Iterable[str],
+    mode: AggregationMode,
+    counts: Iterable[tuple[str, int, int]],
+    zsums: Mapping[str, float],
+) -> Sequence[tuple[str, float]]:
+    """保存した統計（`stat_deltas` の累計）から集計値を求め、順位順に返す。
+
+    Args:
+        entry_ids: イベントの採点対象 ID。これ以外の統計は無視する。
+        mode: イベントの集計方法（合計以外）。
+        counts: (採点対象, 点数, 出現数) の並び。
+        zsums: 採点対象ごとの z スコアの合計。
+    """
+
+    totals = AggregateTotals(entry_ids, mode)
+    for eid, score, count in counts:
+        stats = totals._stats.get(eid)
+        if stats is not None and count:
+            stats.count += count
+            stats.total += count * score
+            stats.counts.add(score, count)
+    for eid, zsum in zsums.items():
+        if eid in totals._stats:
+            totals._stats[eid].zsum = zsum
+    for eid in totals._stats:
+        totals._refresh(eid)
+    return totals.ranked()
+
+
+def aggregate_ranked(
+    entry_ids: Iterable[str],
+    mode: AggregationMode,
+    scores_by_participant: dict[str, dict[str, int]],
+) -> Sequence[tuple[str, float]]:
+    """全参加者の採点から集計値を求め、順位順に返す（差分を持たないストア向け）。"""
+
+    totals = AggregateTotals(entry_ids, mode)
+    for row in scores_by_participant.values():
+        totals.apply_row({}, row)
+    return totals.ranked()
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import codecs
+import csv
+from collections.abc import AsyncIterator
+
+from pydantic import ValidationError
+
+from .domain import (
+    BulkJoinRequest,
+    BulkJoinResponse,
+    BulkJoinResult,
+    BulkScoreFailure,
+    BulkScoreRow,
+    BulkScoresRequest,
+    BulkScoresResponse,
+    JoinEventRequest,
+    ScoreItem,
+)
+from .store import AsyncStore
+
+CSV_COLUMNS = ["participant_id", "participant_key", "entry_id", "score"]
+
+# CSV はこの行数ごとにストアへ書き込む（取り込み全体をメモリに載せない）。
+CSV_BATCH_LINES = 1000
+
+
+async def join_bulk(store: AsyncStore, event_id: str, req: BulkJoinRequest) -> BulkJoinResponse:
+    """名前を行ごとに検証し、通ったものをまとめて参加させる。"""
+
+    results = [BulkJoinResult(index=i, name=name) for i, name in enumerate(req.names)]
+    valid: list[BulkJoinResult] = []
+    for result in results:
+        try:
+            result.name = JoinEventRequest(name=result.name).name
+        except ValidationError:
+            result.error = "invalid name"
+        else:
+            valid.append(result)
+
+    joined = await store.join_event_bulk(event_id, [r.name for r in valid])
+    for result, participant in zip(valid, joined):
+        if participant is None:
+            result.error = "participant name already exists"
+        else:
+            result.participant_id = participant.id
+            result.participant_key = participant.participant_key
+    return BulkJoinResponse(results=results)
+
+
+async def upload_json_scores(
+    store: AsyncStore, event_id: str, req: BulkScoresRequest
+) -> BulkScoresResponse:
+    errors = await store.put_scores_bulk(event_id, req.rows)
+    failures = [
+        BulkScoreFailure(row=i, participant_id=row.participant_id, error=error)
+        for i, (row, error) in enumerate(zip(req.rows, errors))
+        if error is not None
+    ]
+    return BulkScoresResponse(accepted=len(req.rows) - len(failures), failures=failures)
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer.rstrip("\r")
+
+
+async def upload_csv_scores(
+    store: AsyncStore, event_id: str, chunks: AsyncIterator[bytes]
+) -> BulkScoresResponse:
+    """`participant_id,participant_key,entry_id,score` 形式の CSV を読みながら書き込む。
+
+    1行目はヘッダー。不正な行はその行だけを失敗として報告し、残りは取り込む。
+    """
+
+    accepted = 0
+    failures: list[BulkScoreFailure] = []
+    # (participant_id, participant_key) -> (その参加者のデータ行の添字, 採点)
+    pending: dict[tuple[str, str], tuple[list[int], list[ScoreItem]]] = {}
+
+    async def flush() -> None:
+        nonlocal accepted
+        if not pending:
+            return
+        groups = list(pending.items())
+        pending.clear()
+        rows = [
+            BulkScoreRow(participant_id=pid, participant_key=key, scores=scores)
+            for (pid, key), (_lines, scores) in groups
+        ]
+        errors = await store.put_scores_bulk(event_id, rows)
+        for ((pid, _key), (lines, _scores)), error in zip(groups, errors):
+            if error is None:
+                accepted += len(lines)
+            else:
+                failures.extend(
+                    BulkScoreFailure(row=line, participant_id=pid, error=error) for line in lines
+                )
+
+    header_seen = False
+    row_index = 0
+    buffered = 0
+    async for line in _iter_lines(chunks):
+        if not line.strip():
+            continue
+        fields = next(csv.reader([line]))
+        if not header_seen:
+            if [f.strip() for f in fields] != CSV_COLUMNS:
+                raise ValueError(f"CSV header must be: {','.join(CSV_COLUMNS)}")
+            header_seen = True
+            continue
+
+        index, row_index = row_index, row_index + 1
+        if len(fields) != len(CSV_COLUMNS):
+            failures.append(BulkScoreFailure(row=index, participant_id=None, error="invalid row"))
+            continue
+        participant_id, participant_key, entry_id, score = (f.strip() for f in fields)
+        try:
+            item = ScoreItem(entry_id=entry_id, score=score)  # type: ignore[arg-type]
+        except ValidationError:
+            failures.append(
+                BulkScoreFailure(row=index, participant_id=participant_id, error="invalid score")
+            )
+            continue
+
+        lines, scores = pending.setdefault((participant_id, participant_key), ([], []))
+        lines.append(index)
+        scores.append(item)
+        buffered += 1
+        if buffered >= CSV_BATCH_LINES:
+            await flush()
+            buffered = 0
+
+    if not header_seen:
+        raise ValueError(f"CSV header must be: {','.join(CSV_COLUMNS)}")
+    await flush()
+    failures.sort(key=lambda f: f.row)
+    return BulkScoresResponse(accepted=accepted, failures=failures)
@@ -6,6 +6,9 @@ from uuid import uuid4
 
 from pydantic import BaseModel, Field, field_validator
 
+# 全員分の採点から採点対象ごとの値を求める方法（m1.aggregation を参照）。
+AggregationMode = Literal["sum", "average", "median", "trimmed_mean", "zscore"]
+
 
 def new_id(prefix: str) -> str:
     return f"{prefix}_{uuid4().hex}"
@@ -21,6 +24,7 @@ class Event(BaseModel):
     title: str
     entries: list[Entry]
     created_at: datetime
+    aggregation: AggregationMode = "sum"
 
 
 class Participant(BaseModel):
@@ -37,6 +41,7 @@ class ScoreItem(BaseModel):
 class CreateEventRequest(BaseModel):
     title: str = Field(min_length=1, max_length=100)
     entries: list[str] = Field(min_length=1, max_length=50)
+    aggregation: AggregationMode = "sum"
 
     @field_validator("title", mode="before")
     @classmethod
@@ -92,6 +97,45 @@ class PutScoresRequest(BaseModel):
     scores: list[ScoreItem]
 
 
+class BulkJoinRequest(BaseModel):
+    # 各行の名前は JoinEventRequest と同じ規則で行ごとに検証する。
+    names: list[str] = Field(min_length=1, max_length=1000)
+
+
+class BulkJoinResult(BaseModel):
+    index: int
+    name: str
+    participant_id: str | None = None
+    participant_key: str | None = None
+    error: str | None = None
+
+
+class BulkJoinResponse(BaseModel):
+    results: list[BulkJoinResult]
+
+
+class BulkScoreRow(BaseModel):
+    participant_id: str
+    participant_key: str
+    scores: list[ScoreItem]
+
+
+class BulkScoresRequest(BaseModel):
+    rows: list[BulkScoreRow] = Field(min_length=1, max_length=5000)
+
+
+class BulkScoreFailure(BaseModel):
+    # JSON なら rows の添字、CSV ならヘッダーを除いたデータ行の添字（0始まり）。
+    row: int
+    participant_id: str | None
+    error: str
+
+
+class BulkScoresResponse(BaseModel):
+    accepted: int
+    failures: list[BulkScoreFailure]
+
+
 class RankingRow(BaseModel):
     entry_id: str
     entry_name: str
@@ -108,7 +152,8 @@ class ParticipantResult(BaseModel):
 class OverallRow(BaseModel):
     entry_id: str
     entry_name: str
-    total_score: int
+    # 合計（sum）なら整数、それ以外の集計方法では小数。
+    total_score: int | float
     rank: int
 
 
@@ -119,5 +164,11 @@ class ResultsResponse(BaseModel):
     per_participant: list[ParticipantResult]
 
 
+class ParticipantResultsPage(BaseModel):
+    items: list[ParticipantResult]
+    # 次のページを取得するためのカーソル。最後のページなら None。
+    next_cursor: str | None
+
+
 class StoreBackend(BaseModel):
     kind: Literal["inmemory", "dynamodb"]
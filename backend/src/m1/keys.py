@@ -0,0 +1,86 @@
+"""イベントIDと参加者IDに結び付けた、HMAC 署名付きの参加者キー。
+
+署名付きキーはサーバーの秘密鍵だけで検証できるので、採点の書き込みで参加者を読まずに
+認可できる。秘密鍵は `PARTICIPANT_KEY_SECRETS` にカンマ区切りで並べ、先頭で発行し、
+残りは検証だけに使う（鍵の入れ替え中に古いキーを受け付けるため）。
+
+署名付きでない（導入前に発行したランダムな）キーや、外した秘密鍵で発行したキーは
+検証できないので、呼び出し側はこれまでどおりストアに保存したキーと比べる。
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import os
+
+from .domain import new_id
+
+_PREFIX = "pk1"
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+class ParticipantKeys:
+    """参加者キーの発行と検証。
+
+    Args:
+        secrets: 秘密鍵。先頭で署名し、全てを検証に使う。
+    """
+
+    def __init__(self, secrets: list[str]) -> None:
+        if not secrets:
+            raise ValueError("at least one secret is required")
+        # 鍵ID（秘密鍵のハッシュの先頭）で引くので、並び順を変えても検証できる。
+        self._secrets = {hashlib.sha256(s.encode()).hexdigest()[:8]: s.encode() for s in secrets}
+        self._current = next(iter(self._secrets))
+
+    @classmethod
+    def from_env(cls) -> "ParticipantKeys | None":
+        secrets = [s.strip() for s in os.environ.get("PARTICIPANT_KEY_SECRETS", "").split(",")]
+        secrets = [s for s in secrets if s]
+        return cls(secrets) if secrets else None
+
+    @staticmethod
+    def _signature(secret: bytes, event_id: str, participant_id: str) -> str:
+        message = f"{event_id}\0{participant_id}".encode()
+        return _b64(hmac.new(secret, message, hashlib.sha256).digest())
+
+    def issue(self, event_id: str, participant_id: str) -> str:
+        secret = self._secrets[self._current]
+        return f"{_PREFIX}.{self._current}.{self._signature(secret, event_id, participant_id)}"
+
+    def verify(self, event_id: str, participant_id: str, participant_key: str) -> bool | None:
+        """署名付きキーなら検証結果を、署名付きでなければ None を返す。
+
+        鍵IDが分からない（秘密鍵を外した）キーも検証できないので None を返し、呼び出し側で
+        保存したキーと比べさせる。
+        """
+
+        prefix, _, rest = participant_key.partition(".")
+        if prefix != _PREFIX:
+            return None
+        key_id, _, signature = rest.partition(".")
+        secret = self._secrets.get(key_id)
+        if secret is None:
+            return None
+        expected = self._signature(secret, event_id, participant_id)
+        # str 同士の compare_digest は非 ASCII で TypeError になるので、バイト列で比べる。
+        return hmac.compare_digest(expected.encode(), signature.encode())
+
+
+def new_participant_key(keys: ParticipantKeys | None, event_id: str, participant_id: str) -> str:
+    """参加者キーを発行する。秘密鍵が無ければ従来どおりランダムなキー。"""
+
+    if keys is None:
+        return new_id("k")
+    return keys.issue(event_id, participant_id)
+
+
+def verified(keys: ParticipantKeys | None, event_id: str, participant_id: str, key: str) -> bool:
+    """署名を検証できた（=参加者を読まずに認可してよい）ときだけ True。"""
+
+    return keys is not None and keys.verify(event_id, participant_id, key) is True
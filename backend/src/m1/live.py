@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from .domain import ResultsResponse
+
+VersionFn = Callable[[str], Awaitable["int | None"]]
+LoadFn = Callable[[str], Awaitable["ResultsResponse | None"]]
+
+
+def diff_results(old: ResultsResponse, new: ResultsResponse) -> dict[str, Any]:
+    """2つの結果の差分（変化した行・順位だけ）を返す。
+
+    - overall: 合計点または順位が変わった行
+    - per_participant: 参加者ごとに、点数または順位が変わった行（新規参加者は全行）
+    """
+
+    old_overall = {r.entry_id: r for r in old.overall}
+    overall = [r.model_dump() for r in new.overall if old_overall.get(r.entry_id) != r]
+
+    old_participants = {p.participant_id: p for p in old.per_participant}
+    per_participant: list[dict[str, Any]] = []
+    for p in new.per_participant:
+        prev = old_participants.get(p.participant_id)
+        prev_rows = {r.entry_id: r for r in prev.rankings} if prev is not None else {}
+        rows = [r.model_dump() for r in p.rankings if prev_rows.get(r.entry_id) != r]
+        if rows:
+            per_participant.append(
+                {
+                    "participant_id": p.participant_id,
+                    "participant_name": p.participant_name,
+                    "rankings": rows,
+                }
+            )
+
+    return {"event_id": new.event_id, "overall": overall, "per_participant": per_participant}
+
+
+def sse_message(event: str, data: dict[str, Any]) -> str:
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event}\ndata: {body}\n\n"
+
+
+class Subscription:
+    """1接続分の購読。配信メッセージ（SSE形式の文字列）を受け取る。"""
+
+    def __init__(self, max_pending: int) -> None:
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_pending)
+
+    def offer(self, message: str, snapshot_message: str) -> None:
+        """メッセージを積む。受信が追いつかない購読者には最新のスナップショットを送り直す。"""
+
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(snapshot_message)
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+
+@dataclass
+class _Channel:
+    subscribers: set[Subscription] = field(default_factory=set)
+    version: int | None = None
+    snapshot: ResultsResponse | None = None
+    snapshot_message: str | None = None
+    dirty: bool = False
+    task: asyncio.Task[None] | None = None
+
+
+class ResultsHub:
+    """イベントごとに結果の変化を購読者へ配信する asyncio ハブ。
+
+    書き込み側は `notify` を呼ぶだけでよい。短い間隔（`interval` 秒）に届いた
+    通知は1回の再計算にまとめ、差分を1度だけシリアライズして全購読者へ配る。
+
+    Args:
+        version: event_id から版数を返す非同期関数。
+        load: event_id から結果を組み立てる関数。版数が変わったときだけ呼ぶ。
+        interval: 通知をまとめる間隔（秒）。
+        max_pending: 購読者ごとの未送信メッセージの上限。
+    """
+
+    def __init__(
+        self, version: VersionFn, load: LoadFn, interval: float = 0.2, max_pending: int = 16
+    ) -> None:
+        self._version = version
+        self._load = load
+        self._interval = interval
+        self._max_pending = max_pending
+        self._channels: dict[str, _Channel] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def subscriber_count(self, event_id: str) -> int:
+        channel = self._channels.get(event_id)
+        return len(channel.subscribers) if channel is not None else 0
+
+    def notify(self, event_id: str) -> None:
+        """イベントの結果が変わった可能性を通知する。どのスレッドからでも呼べる。"""
+
+        loop = self._loop
+        if loop is None or event_id not in self._channels:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._mark_dirty(event_id)
+        else:
+            loop.call_soon_threadsafe(self._mark_dirty, event_id)
+
+    @asynccontextmanager
+    async def subscribe(self, event_id: str) -> AsyncIterator[Subscription]:
+        """購読を開始する。最初のメッセージは結果全体のスナップショット。"""
+
+        self._loop = asyncio.get_running_loop()
+        channel = self._channels.setdefault(event_id, _Channel())
+        subscription = Subscription(self._max_pending)
+        channel.subscribers.add(subscription)
+        try:
+            if channel.snapshot_message is None:
+                await self._refresh(event_id, channel)
+            if channel.snapshot_message is not None:
+                subscription.offer(channel.snapshot_message, channel.snapshot_message)
+            yield subscription
+        finally:
+            channel.subscribers.discard(subscription)
+            if not channel.subscribers and self._channels.get(event_id) is channel:
+                del self._channels[event_id]
+                if channel.task is not None:
+                    channel.task.cancel()
+
+    def _mark_dirty(self, event_id: str) -> None:
+        channel = self._channels.get(event_id)
+        if channel is None:
+            return
+        channel.dirty = True
+        if channel.task is None:
+            assert self._loop is not None
+            channel.task = self._loop.create_task(self._flush(event_id, channel))
+
+    async def _flush(self, event_id: str, channel: _Channel) -> None:
+        try:
+            while channel.dirty:
+                await asyncio.sleep(self._interval)
+                channel.dirty = False
+                await self._publish(event_id, channel)
+        finally:
+            channel.task = None
+
+    async def _refresh(self, event_id: str, channel: _Channel) -> ResultsResponse | None:
+        """版数が変わっていれば結果を読み直し、直前の結果を返す。変化がなければ None。"""
+
+        version = await self._version(event_id)
+        if version is None or version == channel.version:
+            return None
+        results = await self._load(event_id)
+        if results is None:
+            return None
+        previous = channel.snapshot
+        channel.version = version
+        channel.snapshot = results
+        channel.snapshot_message = sse_message(
+            "snapshot", {"version": version, **results.model_dump(mode="json")}
+        )
+        return previous
+
+    async def _publish(self, event_id: str, channel: _Channel) -> None:
+        previous = await self._refresh(event_id, channel)
+        if previous is None:
+            return
+        assert channel.snapshot is not None and channel.snapshot_message is not None
+
+        diff = diff_results(previous, channel.snapshot)
+        if not diff["overall"] and not diff["per_participant"]:
+            return
+        message = sse_message("diff", {"version": channel.version, **diff})
+        for subscription in list(channel.subscribers):
+            subscription.offer(message, channel.snapshot_message)
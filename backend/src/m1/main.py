@@ -1,24 +1,57 @@
 from __future__ import annotations
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, Header, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from mangum import Mangum
+from pydantic import ValidationError
 
+from . import metrics
+from .bulk import join_bulk, upload_csv_scores, upload_json_scores
 from .domain import (
+    BulkJoinRequest,
+    BulkJoinResponse,
+    BulkScoresRequest,
+    BulkScoresResponse,
     CreateEventRequest,
     CreateEventResponse,
     JoinEventRequest,
     JoinEventResponse,
+    OverallRow,
+    ParticipantResult,
+    ParticipantResultsPage,
     PutScoresRequest,
     ResultsResponse,
 )
-from .ranking import compute_overall, compute_per_participant
-from .store import build_store
+from .keys import ParticipantKeys
+from .live import ResultsHub
+from .results import (
+    ResultsCache,
+    build_overall,
+    build_participant_result,
+    build_per_participant_page,
+    build_results,
+    build_results_json,
+    etag_matches,
+    results_etag,
+)
+from .store import (
+    AsyncStore,
+    AsyncStoreAdapter,
+    InMemoryStore,
+    StoreUnavailableError,
+    build_async_store,
+    env_flag,
+    read_scope,
+    running_on_lambda,
+    unwrap_store,
+)
+from .write_behind import WriteBehindStore
 
 
 def _load_dotenv(repo_root: Path) -> None:
@@ -34,8 +67,44 @@ def _load_dotenv(repo_root: Path) -> None:
         return
 
 
+def _mount_web(app: FastAPI, web_dir: Path) -> None:
+    from fastapi.staticfiles import StaticFiles
+
+    # このMVPでは static/ を置かないので、同じ web/ をそのまま配信
+    app.mount("/static", StaticFiles(directory=str(web_dir)), name="static")
+
+    @app.get("/")
+    async def index():
+        index_path = web_dir / "index.html"
+        if not index_path.exists():
+            raise HTTPException(status_code=500, detail="index.html not found")
+        return FileResponse(str(index_path))
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="M1 Scoring")
+    repo_root = Path(__file__).resolve().parents[3]
+    on_lambda = running_on_lambda()
+    if not on_lambda:
+        _load_dotenv(repo_root)
+    # Lambda では画面を CloudFront / Amplify などから配信するので、API だけを公開する。
+    api_only = env_flag("API_ONLY", default=on_lambda)
+
+    metrics.configure()
+    participant_keys = ParticipantKeys.from_env()
+    store: AsyncStore = build_async_store()
+    write_behind_ms = int(os.environ.get("WRITE_BEHIND_MS", "0"))
+    if write_behind_ms > 0:
+        # 書き込みは遅れて反映されるので、反映したときに SSE の配信を起こす。
+        store = WriteBehindStore(
+            store, window=write_behind_ms / 1000, on_flush=lambda eid: live_hub.notify(eid)
+        )
+
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI):
+        yield
+        await store.aclose()
+
+    app = FastAPI(title="M1 Scoring", lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -45,56 +114,77 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    repo_root = Path(__file__).resolve().parents[3]
-    _load_dotenv(repo_root)
+    if metrics.enabled():
+        app.add_middleware(metrics.MetricsMiddleware)
 
-    store = build_store()
-    web_dir = Path(os.environ.get("WEB_DIR", str(repo_root / "web"))).resolve()
+    @app.exception_handler(StoreUnavailableError)
+    async def store_unavailable(_request: Request, exc: StoreUnavailableError):
+        # 書き込みの衝突やスロットリングが続いた。少し待てば処理できるので、再試行を促す。
+        return JSONResponse(
+            status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+        )
 
-    # このMVPでは static/ を置かないので、同じ web/ をそのまま配信
-    app.mount("/static", StaticFiles(directory=str(web_dir)), name="static")
+    results_cache = ResultsCache(
+        max_events=int(os.environ.get("RESULTS_CACHE_MAX_EVENTS", "1024")),
+    )
 
-    @app.get("/")
-    def index():
-        index_path = web_dir / "index.html"
-        if not index_path.exists():
-            raise HTTPException(status_code=500, detail="index.html not found")
-        return FileResponse(str(index_path))
+    async def load_results(event_id: str) -> ResultsResponse | None:
+        event = await store.get_event(event_id)
+        if event is None:
+            return None
+        return await build_results(store, event)
+
+    live_hub = ResultsHub(
+        store.get_event_version,
+        load_results,
+        interval=int(os.environ.get("RESULTS_STREAM_INTERVAL_MS", "200")) / 1000,
+    )
+    if not api_only:
+        _mount_web(app, Path(os.environ.get("WEB_DIR", str(repo_root / "web"))).resolve())
 
     @app.get("/health")
-    def health():
+    async def health():
         return {"ok": True}
 
+    @app.get("/metrics")
+    async def metrics_endpoint():
+        """Prometheus 形式のメトリクス。METRICS_ENABLED=true のときだけ有効。"""
+
+        if not metrics.enabled():
+            raise HTTPException(status_code=404, detail="metrics are disabled")
+        return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
     @app.post("/api/events", response_model=CreateEventResponse)
-    def create_event(req: CreateEventRequest):
-        event = store.create_event(req.title, req.entries)
+    async def create_event(req: CreateEventRequest):
+        event = await store.create_event(req.title, req.entries, req.aggregation)
         return CreateEventResponse(event_id=event.id)
 
     @app.get("/api/events/{event_id}")
-    def get_event(event_id: str):
-        event = store.get_event(event_id)
+    async def get_event(event_id: str):
+        event = await store.get_event(event_id)
         if event is None:
             raise HTTPException(status_code=404, detail="event not found")
         return event
 
     @app.post("/api/events/{event_id}/join", response_model=JoinEventResponse)
-    def join_event(event_id: str, req: JoinEventRequest):
-        event = store.get_event(event_id)
-        if event is None:
-            raise HTTPException(status_code=404, detail="event not found")
+    async def join_event(event_id: str, req: JoinEventRequest):
+        # イベントの有無は書き込みの条件で確かめる（先に読まない）。
         try:
-            participant = store.join_event(event_id, req.name)
+            participant = await store.join_event(event_id, req.name)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="event not found")
         except ValueError:
             raise HTTPException(
                 status_code=409,
                 detail="participant name already exists",
             )
+        live_hub.notify(event_id)
         return JoinEventResponse(
             participant_id=participant.id, participant_key=participant.participant_key
         )
 
     @app.put("/api/events/{event_id}/participants/{participant_id}/scores")
-    def put_scores(
+    async def put_scores(
         event_id: str,
         participant_id: str,
         req: PutScoresRequest,
@@ -102,35 +192,169 @@ def create_app() -> FastAPI:
     ):
         if not x_participant_key:
             raise HTTPException(status_code=401, detail="X-Participant-Key is required")
-        event = store.get_event(event_id)
-        if event is None:
-            raise HTTPException(status_code=404, detail="event not found")
-        try:
-            store.put_scores(event_id, participant_id, x_participant_key, req.scores)
-        except PermissionError:
+        # 署名付きキーは CPU だけで認可できる（イベント・参加者を読まない）。
+        signed = (
+            participant_keys.verify(event_id, participant_id, x_participant_key)
+            if participant_keys is not None
+            else None
+        )
+        if signed is False:
             raise HTTPException(status_code=403, detail="invalid participant key")
-        except KeyError:
-            raise HTTPException(status_code=404, detail="participant not found")
+        # イベントと参加者を1回でまとめて読み、put_scores 内の参加者確認はその結果を使う。
+        with read_scope():
+            if not signed:
+                event, _participant = await store.get_event_with_participant(
+                    event_id, participant_id
+                )
+                if event is None:
+                    raise HTTPException(status_code=404, detail="event not found")
+            try:
+                await store.put_scores(event_id, participant_id, x_participant_key, req.scores)
+            except PermissionError:
+                raise HTTPException(status_code=403, detail="invalid participant key")
+            except KeyError:
+                raise HTTPException(status_code=404, detail="participant not found")
+        live_hub.notify(event_id)
         return {"ok": True}
 
+    @app.post("/api/events/{event_id}/participants/bulk", response_model=BulkJoinResponse)
+    async def join_event_bulk(event_id: str, req: BulkJoinRequest):
+        """複数人をまとめて参加させる。名前の不正・重複は行ごとに返す。"""
+
+        if await store.get_event(event_id) is None:
+            raise HTTPException(status_code=404, detail="event not found")
+        response = await join_bulk(store, event_id, req)
+        live_hub.notify(event_id)
+        return response
+
+    @app.post("/api/events/{event_id}/scores/bulk", response_model=BulkScoresResponse)
+    async def put_scores_bulk(event_id: str, request: Request):
+        """複数参加者の採点をまとめて取り込む（JSON または CSV）。
+
+        `Content-Type: text/csv` のときは本文を読みながら一定行数ごとに書き込む。
+        認証できない行・不正な行は `failures` に行番号付きで返し、残りは取り込む。
+        """
+
+        if await store.get_event(event_id) is None:
+            raise HTTPException(status_code=404, detail="event not found")
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type == "text/csv":
+            try:
+                response = await upload_csv_scores(store, event_id, request.stream())
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        else:
+            try:
+                req = BulkScoresRequest.model_validate_json(await request.body())
+            except ValidationError as e:
+                raise HTTPException(
+                    status_code=422, detail=e.errors(include_url=False, include_context=False)
+                )
+            response = await upload_json_scores(store, event_id, req)
+        if response.accepted:
+            live_hub.notify(event_id)
+        return response
+
     @app.get("/api/events/{event_id}/results", response_model=ResultsResponse)
-    def results(event_id: str):
-        event = store.get_event(event_id)
-        if event is None:
+    async def results(
+        event_id: str,
+        if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    ):
+        version = await store.get_event_version(event_id)
+        if version is None:
             raise HTTPException(status_code=404, detail="event not found")
-        participants = store.list_participants(event_id)
-        scores_by_participant = store.list_scores_by_participant(event_id)
 
-        overall = compute_overall(event.entries, scores_by_participant)
-        per_participant = compute_per_participant(
-            event.entries, participants, scores_by_participant
+        # 版数が変わっていなければ順位計算なしで 304 を返す。
+        etag = results_etag(event_id, version)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        cached = results_cache.get(event_id, version)
+        if cached is None:
+            event = await store.get_event(event_id)
+            if event is None:
+                raise HTTPException(status_code=404, detail="event not found")
+            # response_model による再検証を通さず、直接エンコードした JSON を返す。
+            cached = results_cache.put(event_id, version, await build_results_json(store, event))
+
+        return Response(
+            content=cached.body,
+            media_type="application/json",
+            headers={"ETag": cached.etag, "Cache-Control": "no-cache"},
         )
 
-        return ResultsResponse(
-            event_id=event.id,
-            event_title=event.title,
-            overall=overall,
-            per_participant=per_participant,
+    @app.get("/api/events/{event_id}/results/overall", response_model=list[OverallRow])
+    async def results_overall(event_id: str, top: int | None = Query(default=None, ge=1)):
+        event = await store.get_event(event_id)
+        if event is None:
+            raise HTTPException(status_code=404, detail="event not found")
+        return await build_overall(store, event, top)
+
+    # 過去の時点の結果は InMemoryStore の追記ログ（INMEMORY_LOG_DIR）から作り直す。
+    history_store = unwrap_store(store)
+
+    @app.get("/api/events/{event_id}/results/history", response_model=ResultsResponse)
+    async def results_history(event_id: str, at: float = Query(description="UNIX 時間（秒）")):
+        if not isinstance(history_store, InMemoryStore):
+            raise HTTPException(status_code=404, detail="history not available")
+        # ログの読み直しはファイル I/O なのでイベントループの外で行う。
+        replica = await asyncio.to_thread(history_store.replay_event, event_id, at)
+        event = replica.get_event(event_id) if replica is not None else None
+        if replica is None or event is None:
+            raise HTTPException(status_code=404, detail="history not available")
+        return await build_results(AsyncStoreAdapter(replica), event)
+
+    @app.get(
+        "/api/events/{event_id}/results/participants/{participant_id}",
+        response_model=ParticipantResult,
+    )
+    async def results_participant(event_id: str, participant_id: str):
+        event, participant = await store.get_event_with_participant(event_id, participant_id)
+        if event is None:
+            raise HTTPException(status_code=404, detail="event not found")
+        if participant is None:
+            raise HTTPException(status_code=404, detail="participant not found")
+        return await build_participant_result(store, event, participant)
+
+    @app.get(
+        "/api/events/{event_id}/results/per-participant", response_model=ParticipantResultsPage
+    )
+    async def results_per_participant(
+        event_id: str,
+        cursor: str | None = None,
+        limit: int = Query(default=50, ge=1, le=200),
+    ):
+        event = await store.get_event(event_id)
+        if event is None:
+            raise HTTPException(status_code=404, detail="event not found")
+        try:
+            return await build_per_participant_page(store, event, cursor, limit)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid cursor")
+
+    @app.get("/api/events/{event_id}/results/stream")
+    async def results_stream(event_id: str):
+        """結果の変化を Server-Sent Events で配信する。
+
+        最初に `snapshot`（結果全体）、以降は `diff`（変化した行・順位のみ）を送る。
+        """
+
+        if await store.get_event_version(event_id) is None:
+            raise HTTPException(status_code=404, detail="event not found")
+
+        async def stream():
+            async with live_hub.subscribe(event_id) as subscription:
+                while True:
+                    try:
+                        yield await asyncio.wait_for(subscription.get(), timeout=15)
+                    except TimeoutError:
+                        # プロキシに接続を切られないよう定期的にコメント行を送る。
+                        yield ": keep-alive\n\n"
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
 
     return app
@@ -0,0 +1,344 @@
+"""Prometheus 形式のメトリクス（ヒストグラム・カウンタ）と計測用のヘルパー。
+
+`METRICS_ENABLED=true` のときだけ記録する。無効時は各記録関数がフラグを見てすぐ戻り、
+ミドルウェアや DynamoDB のフックも登録しないので、ほぼオーバーヘッドが無い。
+外部ライブラリは使わず、テキスト形式（exposition format 0.0.4）を直接出力する。
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import math
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any, TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 秒単位。ストア呼び出し（μs〜数百ms）と HTTP リクエストの両方を見られる範囲。
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def configure(enable: bool | None = None) -> bool:
+    """記録の有効・無効を設定する。省略時は環境変数 `METRICS_ENABLED` に従う。"""
+
+    global _enabled
+    if enable is None:
+        enable = os.environ.get("METRICS_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+    _enabled = enable
+    return _enabled
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """単調増加するカウンタ（ラベル付き）。"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram:
+    """累積バケットのヒストグラム（ラベル付き）。"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # ラベル値 -> [バケットごとの件数..., 合計, 件数]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, *labelvalues: str) -> int:
+        state = self._values.get(labelvalues)
+        return int(state[-1]) if state is not None else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for labelvalues, state in items:
+            for bound, count in zip(self.buckets, state):
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {_format_value(count)}"
+            labels = _format_labels(self.labelnames, labelvalues, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {_format_value(state[-1])}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(state[-2])}"
+            yield f"{self.name}_count{labels} {_format_value(state[-1])}"
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "m1_http_request_duration_seconds",
+    "HTTP request latency.",
+    ("method", "route", "status"),
+)
+STORE_CALL_DURATION = Histogram(
+    "m1_store_call_duration_seconds",
+    "Store method latency.",
+    ("backend", "method"),
+)
+STORE_CALL_ERRORS = Counter(
+    "m1_store_call_errors_total",
+    "Store method calls that raised.",
+    ("backend", "method", "error"),
+)
+COMPUTE_DURATION = Histogram(
+    "m1_compute_duration_seconds",
+    "Ranking and serialization latency.",
+    ("function",),
+)
+DYNAMODB_CONSUMED_CAPACITY = Counter(
+    "m1_dynamodb_consumed_capacity_units_total",
+    "DynamoDB capacity units reported by ReturnConsumedCapacity.",
+    ("store_method", "operation", "kind"),
+)
+INMEMORY_RETENTION = Counter(
+    "m1_inmemory_retention_total",
+    "In-memory store evictions, expirations, spills and reloads.",
+    ("action",),
+)
+WRITE_BEHIND_REQUESTS = Counter(
+    "m1_write_behind_requests_total",
+    "Score writes received by the write-behind layer and writes it issued to the store.",
+    ("stage",),
+)
+WRITE_BEHIND_CELLS = Counter(
+    "m1_write_behind_cells_total",
+    "Score cells received by the write-behind layer, cells it wrote and cells it dropped.",
+    ("stage",),
+)
+
+REGISTRY: list[Counter | Histogram] = [
+    HTTP_REQUEST_DURATION,
+    STORE_CALL_DURATION,
+    STORE_CALL_ERRORS,
+    COMPUTE_DURATION,
+    DYNAMODB_CONSUMED_CAPACITY,
+    INMEMORY_RETENTION,
+    WRITE_BEHIND_REQUESTS,
+    WRITE_BEHIND_CELLS,
+]
+
+
+def render() -> str:
+    """登録済みの全メトリクスを Prometheus のテキスト形式で返す。"""
+
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def timed(function: str) -> Callable[[_F], _F]:
+    """関数の実行時間を `m1_compute_duration_seconds{function=...}` に記録するデコレータ。"""
+
+    def decorate(fn: _F) -> _F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                COMPUTE_DURATION.observe(time.perf_counter() - start, function)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+# 実行中の Store メソッド名。DynamoDB の消費キャパシティをメソッド単位に集計するのに使う。
+_current_store_method: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "m1_store_method", default="-"
+)
+
+
+def call_store(backend: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """Store メソッドを呼び、所要時間（と例外）を記録する。"""
+
+    method = fn.__name__
+    token = _current_store_method.set(method)
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    except Exception as e:
+        STORE_CALL_ERRORS.inc(backend, method, type(e).__name__)
+        raise
+    finally:
+        STORE_CALL_DURATION.observe(time.perf_counter() - start, backend, method)
+        _current_store_method.reset(token)
+
+
+_CAPACITY_OPERATIONS = {
+    "GetItem": "read",
+    "BatchGetItem": "read",
+    "Query": "read",
+    "Scan": "read",
+    "TransactGetItems": "read",
+    "PutItem": "write",
+    "UpdateItem": "write",
+    "DeleteItem": "write",
+    "BatchWriteItem": "write",
+    "TransactWriteItems": "write",
+}
+
+
+def _request_consumed_capacity(params: dict[str, Any], model: Any, **_kwargs: Any) -> None:
+    if _enabled and model.name in _CAPACITY_OPERATIONS:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+def _record_consumed_capacity(parsed: dict[str, Any], model: Any, **_kwargs: Any) -> None:
+    kind = _CAPACITY_OPERATIONS.get(model.name)
+    if kind is None:
+        return
+    consumed = parsed.get("ConsumedCapacity")
+    if not consumed:
+        return
+    items = consumed if isinstance(consumed, list) else [consumed]
+    units = sum(float(c.get("CapacityUnits", 0)) for c in items)
+    DYNAMODB_CONSUMED_CAPACITY.inc(_current_store_method.get(), model.name, kind, amount=units)
+
+
+def instrument_dynamodb_client(client: Any) -> None:
+    """DynamoDB クライアントの全呼び出しに ReturnConsumedCapacity を付け、消費量を記録する。"""
+
+    events = client.meta.events
+    events.register(
+        "provide-client-params.dynamodb.*",
+        _request_consumed_capacity,
+        unique_id="m1-metrics-request-capacity",
+    )
+    events.register(
+        "after-call.dynamodb.*",
+        _record_consumed_capacity,
+        unique_id="m1-metrics-record-capacity",
+    )
+
+
+class MetricsMiddleware:
+    """リクエストの所要時間を、ルートのパス（テンプレート）単位で記録する ASGI ミドルウェア。"""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not _enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # 生のパスはラベルにしない（イベントIDごとに系列が増えるため）。
+            path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start, scope["method"], path, status
+            )
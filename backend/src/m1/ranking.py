@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import heapq
 from collections import defaultdict
+from collections.abc import Sequence
 
-from .domain import Entry, OverallRow, Participant, ParticipantResult, RankingRow
+from .aggregation import aggregate_ranked
+from .domain import AggregationMode, Entry, OverallRow, Participant, ParticipantResult, RankingRow
+from .metrics import timed
 
 
 def competition_rank_desc(pairs: list[tuple[str, int]]) -> dict[str, int]:
@@ -30,6 +34,7 @@ def competition_rank_desc(pairs: list[tuple[str, int]]) -> dict[str, int]:
     return ranks
 
 
+@timed("compute_per_participant")
 def compute_per_participant(
     entries: list[Entry],
     participants: list[Participant],
@@ -62,25 +67,64 @@ def compute_per_participant(
     return results
 
 
+@timed("compute_overall")
 def compute_overall(
-    entries: list[Entry], scores_by_participant: dict[str, dict[str, int]]
+    entries: list[Entry],
+    scores_by_participant: dict[str, dict[str, int]],
+    limit: int | None = None,
+    aggregation: AggregationMode = "sum",
 ) -> list[OverallRow]:
+    """全員合計の順位表を作る。`limit` を指定すると上位 `limit` 件だけを返す。
+
+    上位だけが必要な場合は全件ソートせず部分選択（heapq）で取り出す。
+    `aggregation` が合計以外なら、その集計方法の値で順位を付ける。
+    """
+
+    if aggregation != "sum":
+        ranked_values = aggregate_ranked(
+            (e.id for e in entries), aggregation, scores_by_participant
+        )
+        return compute_overall_from_ranked_totals(entries, ranked_values[:limit])
+
     totals: dict[str, int] = defaultdict(int)
     for _pid, score_map in scores_by_participant.items():
         for entry_id, score in score_map.items():
             totals[entry_id] += int(score)
 
     pairs = [(e.id, int(totals.get(e.id, 0))) for e in entries]
-    ranks = competition_rank_desc(pairs)
-    entry_name = {e.id: e.name for e in entries}
+    if limit is not None:
+        ranked = heapq.nsmallest(limit, pairs, key=lambda x: (-x[1], x[0]))
+    else:
+        ranked = sorted(pairs, key=lambda x: (-x[1], x[0]))
+    return compute_overall_from_ranked_totals(entries, ranked)
+
 
-    rows = [
-        OverallRow(
-            entry_id=eid,
-            entry_name=entry_name[eid],
-            total_score=total,
-            rank=ranks[eid],
+@timed("compute_overall_from_ranked_totals")
+def compute_overall_from_ranked_totals(
+    entries: list[Entry], ranked_totals: Sequence[tuple[str, float]]
+) -> list[OverallRow]:
+    """順位順に並んだ合計点から全員合計の順位表を作る。
+
+    `ranked_totals` は (entry_id, 合計点) を合計点降順・entry_id 昇順で並べたもの。
+    並べ替えは行わず、1回の走査で競技順位（1,1,3）を付ける。
+    順位は先頭からの並びだけで決まるため、上位の一部だけを渡してもよい。
+    """
+
+    entry_name = {e.id: e.name for e in entries}
+    rows: list[OverallRow] = []
+    last_total: float | None = None
+    last_rank = 0
+
+    for position, (eid, total) in enumerate(ranked_totals, start=1):
+        if total != last_total:
+            last_total = total
+            last_rank = position
+        rows.append(
+            OverallRow(
+                entry_id=eid,
+                entry_name=entry_name[eid],
+                total_score=total,
+                rank=last_rank,
+            )
         )
-        for eid, total in sorted(pairs, key=lambda x: (-x[1], x[0]))
-    ]
     return rows
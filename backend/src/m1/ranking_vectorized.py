@@ -0,0 +1,110 @@
+"""NumPy で順位をまとめて計算するエンジン（任意依存: `numpy`）。
+
+`m1.ranking` と同じ結果（1,1,3 方式、同点は entry_id 昇順）を返す。
+参加者数 × 採点対象数が大きいイベント向け。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import numpy as np
+
+from .domain import Entry, OverallRow, Participant, ParticipantResult, RankingRow
+from .metrics import timed
+
+
+def competition_ranks(sorted_scores: np.ndarray) -> np.ndarray:
+    """降順に並んだスコア（最後の軸）から競技順位（1,1,3）を求める。"""
+
+    positions = np.arange(1, sorted_scores.shape[-1] + 1)
+    starts_group = np.ones(sorted_scores.shape, dtype=bool)
+    starts_group[..., 1:] = sorted_scores[..., 1:] != sorted_scores[..., :-1]
+    return np.maximum.accumulate(np.where(starts_group, positions, 0), axis=-1)
+
+
+def _score_matrix(column_ids: list[str], score_maps: Iterable[dict[str, int] | None]) -> np.ndarray:
+    """採点（行ごとの entry_id -> score）を列 `column_ids` の行列にする。無い採点は 0。"""
+
+    zeros = [0] * len(column_ids)
+    rows = [list(map(m.get, column_ids, zeros)) if m else zeros for m in score_maps]
+    return np.array(rows, dtype=np.int64).reshape(len(rows), len(column_ids))
+
+
+def _rank_rows(scores: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """行ごとに (並び順の列番号, 並べたスコア, 順位) を返す。
+
+    列は entry_id 昇順に並べておくこと。安定ソートなので同点は列順（entry_id 昇順）になる。
+    """
+
+    order = np.argsort(-scores, axis=-1, kind="stable")
+    sorted_scores = np.take_along_axis(scores, order, axis=-1)
+    return order, sorted_scores, competition_ranks(sorted_scores)
+
+
+@timed("rank_participant_rows_vectorized")
+def rank_participant_rows_vectorized(
+    entries: list[Entry],
+    participants: list[Participant],
+    scores_by_participant: dict[str, dict[str, int]],
+) -> tuple[list[Entry], list[list[int]], list[list[int]], list[list[int]]]:
+    """参加者（渡した順）ごとに採点対象を順位順に並べる。
+
+    Returns:
+        (列の採点対象（entry_id 昇順）, 行ごとの列番号, 点数, 順位)。
+    """
+
+    columns = sorted(entries, key=lambda e: e.id)
+    matrix = _score_matrix(
+        [e.id for e in columns], (scores_by_participant.get(p.id) for p in participants)
+    )
+    order, sorted_scores, ranks = _rank_rows(matrix)
+    return columns, order.tolist(), sorted_scores.tolist(), ranks.tolist()
+
+
+@timed("compute_per_participant_vectorized")
+def compute_per_participant_vectorized(
+    entries: list[Entry],
+    participants: list[Participant],
+    scores_by_participant: dict[str, dict[str, int]],
+) -> list[ParticipantResult]:
+    ordered = sorted(participants, key=lambda p: p.name)
+    columns, order, sorted_scores, ranks = rank_participant_rows_vectorized(
+        entries, ordered, scores_by_participant
+    )
+    ids = [e.id for e in columns]
+    names = [e.name for e in columns]
+
+    results: list[ParticipantResult] = []
+    for participant, cols, row_scores, row_ranks in zip(ordered, order, sorted_scores, ranks):
+        rows = [
+            RankingRow(entry_id=ids[col], entry_name=names[col], score=score, rank=rank)
+            for col, score, rank in zip(cols, row_scores, row_ranks)
+        ]
+        results.append(
+            ParticipantResult(
+                participant_id=participant.id,
+                participant_name=participant.name,
+                rankings=rows,
+            )
+        )
+    return results
+
+
+@timed("compute_overall_vectorized")
+def compute_overall_vectorized(
+    entries: list[Entry], scores_by_participant: dict[str, dict[str, int]]
+) -> list[OverallRow]:
+    columns = sorted(entries, key=lambda e: e.id)
+    matrix = _score_matrix([e.id for e in columns], scores_by_participant.values())
+
+    order, sorted_totals, ranks = _rank_rows(matrix.sum(axis=0))
+    return [
+        OverallRow(
+            entry_id=columns[col].id,
+            entry_name=columns[col].name,
+            total_score=total,
+            rank=rank,
+        )
+        for col, total, rank in zip(order.tolist(), sorted_totals.tolist(), ranks.tolist())
+    ]
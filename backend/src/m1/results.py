@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from .domain import (
+    Entry,
+    Event,
+    OverallRow,
+    Participant,
+    ParticipantResult,
+    ParticipantResultsPage,
+    ResultsResponse,
+)
+from .metrics import timed
+from .ranking import compute_overall_from_ranked_totals, compute_per_participant
+from .store import AsyncStore
+
+# 参加者数 × 採点対象数がこの値以上なら、numpy があればベクトル化エンジンを使う。
+VECTORIZE_MIN_CELLS = int(os.environ.get("RANKING_VECTORIZE_MIN_CELLS", "2000"))
+
+
+@timed("rank_per_participant")
+def rank_per_participant(
+    entries: list[Entry],
+    participants: list[Participant],
+    scores_by_participant: dict[str, dict[str, int]],
+) -> list[ParticipantResult]:
+    """参加者別の順位を計算する。大きなイベントでは NumPy 版を使う。"""
+
+    if len(entries) * len(participants) >= VECTORIZE_MIN_CELLS:
+        try:
+            from .ranking_vectorized import compute_per_participant_vectorized
+        except ImportError:
+            # numpy is an optional dependency; fall back to the pure-Python ranking.
+            pass
+        else:
+            return compute_per_participant_vectorized(entries, participants, scores_by_participant)
+    return compute_per_participant(entries, participants, scores_by_participant)
+
+
+async def _load_results_inputs(
+    store: AsyncStore, event: Event
+) -> tuple[list[Participant], dict[str, dict[str, int]], Sequence[tuple[str, float]]]:
+    """結果の材料（参加者・採点・順位順の集計値）を並行に読む。
+
+    集計値はどの集計方法でもストアが差分で持っているものを読む（採点から計算し直さない）。
+    """
+
+    return await asyncio.gather(
+        store.list_participants(event.id),
+        store.list_scores_by_participant(event.id),
+        store.get_ranked_totals(event),
+    )
+
+
+async def build_results(store: AsyncStore, event: Event) -> ResultsResponse:
+    """イベントの結果（全員合計・参加者別）を組み立てる。
+
+    互いに依存しない読み出しは並行に行う。
+    """
+
+    participants, scores_by_participant, ranked_totals = await _load_results_inputs(store, event)
+
+    overall = compute_overall_from_ranked_totals(event.entries, ranked_totals)
+    per_participant = rank_per_participant(event.entries, participants, scores_by_participant)
+
+    return ResultsResponse(
+        event_id=event.id,
+        event_title=event.title,
+        overall=overall,
+        per_participant=per_participant,
+    )
+
+
+async def build_overall(store: AsyncStore, event: Event, top: int | None) -> list[OverallRow]:
+    """全員合計の順位表（`top` 指定時は上位だけ）を組み立てる。"""
+
+    ranked_totals = await store.get_ranked_totals(event)
+    if top is not None:
+        ranked_totals = ranked_totals[:top]
+    return compute_overall_from_ranked_totals(event.entries, ranked_totals)
+
+
+async def build_participant_result(
+    store: AsyncStore, event: Event, participant: Participant
+) -> ParticipantResult:
+    """1参加者分の順位だけを計算する。"""
+
+    scores = await store.get_scores(event.id, participant.id)
+    return compute_per_participant(event.entries, [participant], {participant.id: scores})[0]
+
+
+def encode_cursor(participant_name: str) -> str:
+    return base64.urlsafe_b64encode(participant_name.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """カーソルを参加者名に戻す。不正なカーソルは ValueError。"""
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.b64decode(padded, altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("invalid cursor") from e
+
+
+async def build_per_participant_page(
+    store: AsyncStore, event: Event, cursor: str | None, limit: int
+) -> ParticipantResultsPage:
+    """参加者別の順位を参加者名順にページ分割して返す。
+
+    カーソルは直前のページの最後の参加者名（イベント内で一意）。
+    ページに含まれる参加者の採点だけを読み、順位もその分だけ計算する。
+    """
+
+    participants = sorted(await store.list_participants(event.id), key=lambda p: p.name)
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        participants = [p for p in participants if p.name > after]
+    page, rest = participants[:limit], participants[limit:]
+
+    scores = await asyncio.gather(*(store.get_scores(event.id, p.id) for p in page))
+    items = rank_per_participant(event.entries, page, {p.id: s for p, s in zip(page, scores)})
+    return ParticipantResultsPage(
+        items=items, next_cursor=encode_cursor(page[-1].name) if rest else None
+    )
+
+
+def _json_str(value: str) -> str:
+    # Pydantic (model_dump_json) と同じく非ASCII文字はエスケープしない。
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _encode_rankings(
+    entries: list[Entry],
+    participants: list[Participant],
+    scores_by_participant: dict[str, dict[str, int]],
+    entry_prefix: dict[str, str],
+) -> list[str]:
+    """参加者（渡した順）ごとの rankings 配列の中身を JSON 断片で返す。
+
+    大きなイベントでは、numpy があれば順位付けをベクトル化エンジンで行う。
+    """
+
+    if len(entries) * len(participants) >= VECTORIZE_MIN_CELLS:
+        try:
+            from .ranking_vectorized import rank_participant_rows_vectorized
+        except ImportError:
+            # numpy is an optional dependency; fall back to the pure-Python ranking.
+            pass
+        else:
+            columns, order, sorted_scores, ranks = rank_participant_rows_vectorized(
+                entries, participants, scores_by_participant
+            )
+            prefixes = [entry_prefix[e.id] for e in columns]
+            return [
+                ",".join(
+                    f'{prefixes[col]}"score":{score},"rank":{rank}}}'
+                    for col, score, rank in zip(cols, row_scores, row_ranks)
+                )
+                for cols, row_scores, row_ranks in zip(order, sorted_scores, ranks)
+            ]
+
+    entry_ids = [e.id for e in entries]
+    encoded: list[str] = []
+    for participant in participants:
+        score_map = scores_by_participant.get(participant.id, {})
+        pairs = sorted(
+            ((eid, int(score_map.get(eid, 0))) for eid in entry_ids),
+            key=lambda x: (-x[1], x[0]),
+        )
+        rows: list[str] = []
+        last_score: int | None = None
+        rank = 0
+        for position, (eid, score) in enumerate(pairs, start=1):
+            if score != last_score:
+                last_score, rank = score, position
+            rows.append(f'{entry_prefix[eid]}"score":{score},"rank":{rank}}}')
+        encoded.append(",".join(rows))
+    return encoded
+
+
+@timed("encode_results_json")
+def encode_results_json(
+    event: Event,
+    participants: list[Participant],
+    scores_by_participant: dict[str, dict[str, int]],
+    ranked_totals: Sequence[tuple[str, float]],
+) -> bytes:
+    """結果を Pydantic モデルを経由せずに JSON バイト列へ直接書き出す。
+
+    `build_results(...).model_dump_json()` とバイト単位で同じ出力になる。
+    採点対象ごとの `{"entry_id":..,"entry_name":..,` 部分は1度だけエンコードして使い回し、
+    参加者 × 採点対象のセルごとにはオブジェクトを作らない。
+    """
+
+    entry_prefix = {
+        e.id: f'{{"entry_id":{_json_str(e.id)},"entry_name":{_json_str(e.name)},'
+        for e in event.entries
+    }
+
+    parts: list[str] = [
+        f'{{"event_id":{_json_str(event.id)},"event_title":{_json_str(event.title)},"overall":['
+    ]
+    overall: list[str] = []
+    last_total: float | None = None
+    rank = 0
+    for position, (eid, total) in enumerate(ranked_totals, start=1):
+        if total != last_total:
+            last_total, rank = total, position
+        overall.append(f'{entry_prefix[eid]}"total_score":{total},"rank":{rank}}}')
+    parts.append(",".join(overall))
+    parts.append('],"per_participant":[')
+
+    ordered = sorted(participants, key=lambda p: p.name)
+    rankings = _encode_rankings(event.entries, ordered, scores_by_participant, entry_prefix)
+    participant_parts = [
+        f'{{"participant_id":{_json_str(participant.id)},'
+        f'"participant_name":{_json_str(participant.name)},'
+        f'"rankings":[{rows}]}}'
+        for participant, rows in zip(ordered, rankings)
+    ]
+    parts.append(",".join(participant_parts))
+    parts.append("]}")
+    return "".join(parts).encode()
+
+
+async def build_results_json(store: AsyncStore, event: Event) -> bytes:
+    """`/results` 用の JSON を高速経路で組み立てる（`build_results` と同じ内容）。"""
+
+    participants, scores_by_participant, ranked_totals = await _load_results_inputs(store, event)
+    return encode_results_json(event, participants, scores_by_participant, ranked_totals)
+
+
+def results_etag(event_id: str, version: int) -> str:
+    """イベントの版数から強いETagを作る。"""
+
+    return f'"{event_id}.{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match ヘッダーが ETag に一致するかを判定する。"""
+
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@dataclass(frozen=True)
+class CachedResults:
+    version: int
+    etag: str
+    body: bytes
+
+
+class ResultsCache:
+    """イベントごとに最新版の結果（シリアライズ済みJSON）を保持するLRUキャッシュ。
+
+    Args:
+        max_events: 保持するイベント数の上限。
+    """
+
+    def __init__(self, max_events: int = 1024) -> None:
+        self._max_events = max_events
+        self._items: OrderedDict[str, CachedResults] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, event_id: str, version: int) -> CachedResults | None:
+        with self._lock:
+            cached = self._items.get(event_id)
+            if cached is None or cached.version != version:
+                return None
+            self._items.move_to_end(event_id)
+            return cached
+
+    def put(self, event_id: str, version: int, body: bytes) -> CachedResults:
+        cached = CachedResults(version=version, etag=results_etag(event_id, version), body=body)
+        with self._lock:
+            current = self._items.get(event_id)
+            # 並行リクエストが新しい版を先に書いていたら上書きしない。
+            if current is None or current.version <= version:
+                self._items[event_id] = cached
+                self._items.move_to_end(event_id)
+            while len(self._items) > self._max_events:
+                self._items.popitem(last=False)
+        return cached
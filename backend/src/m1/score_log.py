@@ -0,0 +1,237 @@
+"""InMemoryStore の操作を追記していくバイナリログと、スナップショットによる圧縮。
+
+ディレクトリには世代ごとに `log-{世代}.m1log`（操作の追記）と `snapshot-{世代}.m1snap`
+（その世代を始めた時点の全イベント）を置く。圧縮は「新しい世代のログに切り替え ->
+全イベントのスナップショットを書く -> 古い世代を消す」の順に行うので、途中で落ちても
+1つ前の世代のスナップショットとログから復元できる。
+
+1レコードは `<長さ, CRC32, 種類, 時刻, 版数>` のヘッダーと本文。書き込み途中で落ちた
+末尾のレコードは CRC で見分けて捨てる。fsync は `fsync_interval` 秒ごとにまとめて行う。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+OP_CREATE_EVENT = 1
+OP_JOIN = 2
+OP_SCORES = 3
+# スナップショット内の1イベント分の状態
+OP_EVENT_STATE = 4
+
+# (本文の長さ, CRC32) + (種類, 時刻, 版数)。CRC は後半と本文に対して取る。
+_FRAME = struct.Struct("<II")
+_META = struct.Struct("<BdQ")
+_HEADER_SIZE = _FRAME.size + _META.size
+_LOG_NAME = re.compile(r"log-(\d{8})\.m1log")
+_SNAPSHOT_NAME = re.compile(r"snapshot-(\d{8})\.m1snap")
+
+
+class Record(NamedTuple):
+    op: int
+    timestamp: float
+    version: int
+    payload: bytes
+
+
+@dataclass
+class ScoreLogStats:
+    appends: int = 0
+    fsyncs: int = 0
+    compactions: int = 0
+    # 直近の復元で読んだレコード数と所要時間（秒）
+    replayed: int = 0
+    recovery_seconds: float = 0.0
+
+
+def encode_record(record: Record) -> bytes:
+    meta = _META.pack(record.op, record.timestamp, record.version)
+    crc = zlib.crc32(meta + record.payload)
+    return _FRAME.pack(len(record.payload), crc) + meta + record.payload
+
+
+def read_records(f: BinaryIO) -> Iterator[tuple[Record, int]]:
+    """(レコード, そのレコードの終端オフセット) を順に返す。壊れた末尾で止まる。"""
+
+    offset = 0
+    while True:
+        header = f.read(_HEADER_SIZE)
+        if len(header) < _HEADER_SIZE:
+            return
+        length, crc = _FRAME.unpack_from(header)
+        meta = header[_FRAME.size :]
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(meta + payload) != crc:
+            return
+        op, timestamp, version = _META.unpack(meta)
+        offset += _HEADER_SIZE + length
+        yield Record(op, timestamp, version, payload), offset
+
+
+class ScoreLog:
+    """追記ログとスナップショットのファイルを管理する。
+
+    Args:
+        directory: ログとスナップショットを置くディレクトリ。
+        fsync_interval: この秒数ごとにまとめて fsync する。0 なら追記のたびに fsync する。
+        compact_bytes: 現在の世代のログがこの大きさを超えたら圧縮する（復元で読み直す量の上限）。
+        retain_generations: 圧縮後も残す世代数（過去の時点の結果を再生できる範囲）。
+        clock: レコードに記録する時刻（UNIX 時間）。
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        fsync_interval: float = 0.05,
+        compact_bytes: int = 64 * 1024 * 1024,
+        retain_generations: int = 1,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.compact_bytes = compact_bytes
+        self.retain_generations = max(1, retain_generations)
+        self.clock = clock
+        self.stats = ScoreLogStats()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._closed = threading.Event()
+        directory.mkdir(parents=True, exist_ok=True)
+        self.generation = max(
+            self._generations(_LOG_NAME) + self._generations(_SNAPSHOT_NAME) or [1]
+        )
+        self._file = open(self._log_path(self.generation), "ab")
+        self._syncer: threading.Thread | None = None
+        if fsync_interval > 0:
+            self._syncer = threading.Thread(
+                target=self._sync_loop, name="m1-score-log", daemon=True
+            )
+            self._syncer.start()
+
+    def _log_path(self, generation: int) -> Path:
+        return self.directory / f"log-{generation:08d}.m1log"
+
+    def _snapshot_path(self, generation: int) -> Path:
+        return self.directory / f"snapshot-{generation:08d}.m1snap"
+
+    def _generations(self, pattern: re.Pattern[str]) -> list[int]:
+        return sorted(
+            int(m.group(1)) for p in self.directory.iterdir() if (m := pattern.fullmatch(p.name))
+        )
+
+    def append(self, op: int, version: int, payload: bytes) -> None:
+        data = encode_record(Record(op, self.clock(), version, payload))
+        with self._lock:
+            self._file.write(data)
+            self.stats.appends += 1
+            if self._syncer is None:
+                self._sync_locked()
+            else:
+                self._dirty = True
+
+    def _sync_locked(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._dirty = False
+        self.stats.fsyncs += 1
+
+    def _sync_loop(self) -> None:
+        while not self._closed.wait(self.fsync_interval):
+            # ロック内ではバッファの書き出しだけを行い、時間のかかる fsync は複製した fd に
+            # 対してロックの外で行う（その間も追記を止めない）。
+            with self._lock:
+                if not self._dirty:
+                    continue
+                self._file.flush()
+                self._dirty = False
+                self.stats.fsyncs += 1
+                fd = os.dup(self._file.fileno())
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def needs_compaction(self) -> bool:
+        with self._lock:
+            return self._file.tell() > self.compact_bytes
+
+    def rotate(self) -> int:
+        """以降の追記を新しい世代のログに切り替え、その世代番号を返す。"""
+
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+            self.generation += 1
+            self._file = open(self._log_path(self.generation), "ab")
+            return self.generation
+
+    def write_snapshot(self, generation: int, states: Iterable[Record]) -> None:
+        """世代の開始時点のスナップショットを書き、残す世代より古いファイルを消す。"""
+
+        path = self._snapshot_path(generation)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            for state in states:
+                f.write(encode_record(state))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.stats.compactions += 1
+
+        oldest = generation - self.retain_generations + 1
+        for pattern, path_of in (
+            (_LOG_NAME, self._log_path),
+            (_SNAPSHOT_NAME, self._snapshot_path),
+        ):
+            for old in self._generations(pattern):
+                if old < oldest:
+                    path_of(old).unlink(missing_ok=True)
+
+    def replay(self, *, oldest: bool = False, repair: bool = False) -> Iterator[Record]:
+        """スナップショットとそれ以降のログのレコードを順に返す。
+
+        既定では最新の完全なスナップショットから（復元用）、`oldest=True` なら残っている
+        最も古い世代から（過去の時点の再生用）読む。`repair=True`（起動時の復元）なら
+        現在のログの壊れた末尾を切り詰める。
+        """
+
+        with self._lock:
+            self._file.flush()
+        snapshots = self._generations(_SNAPSHOT_NAME)
+        logs = self._generations(_LOG_NAME)
+        # 最初の世代のログはスナップショットが無くても最初から全部そろっている。
+        starts = snapshots + ([1] if logs and logs[0] == 1 else [])
+        start = (min(starts) if oldest else max(starts)) if starts else 1
+        if start in snapshots:
+            with open(self._snapshot_path(start), "rb") as f:
+                for record, _end in read_records(f):
+                    yield record
+        for generation in logs:
+            if generation < start:
+                continue
+            path = self._log_path(generation)
+            end = 0
+            with open(path, "rb") as f:
+                for record, end in read_records(f):
+                    yield record
+            if repair and generation == self.generation and end < path.stat().st_size:
+                with self._lock:
+                    self._file.truncate(end)
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._syncer is not None:
+            self._syncer.join()
+        with self._lock:
+            if not self._file.closed:
+                self._sync_locked()
+                self._file.close()
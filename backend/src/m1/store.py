@@ -1,19 +1,53 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import functools
+import json
 import os
-from collections import defaultdict
-from dataclasses import dataclass
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Protocol
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Literal, Protocol, TypeVar, get_args
 
-import boto3
-from boto3.dynamodb.conditions import Key
-
-from .domain import Entry, Event, Participant, ScoreItem, new_id
+from . import metrics
+from .aggregation import AggregateTotals, aggregate_ranked, ranked_from_stats, stat_deltas
+from .domain import (
+    AggregationMode,
+    BulkScoreRow,
+    Entry,
+    Event,
+    Participant,
+    ScoreItem,
+    new_id,
+)
+from .keys import ParticipantKeys, new_participant_key, verified
+from .score_log import (
+    OP_CREATE_EVENT,
+    OP_EVENT_STATE,
+    OP_JOIN,
+    OP_SCORES,
+    Record,
+    ScoreLog,
+)
+from .totals import RankedTotals
 
 
 class Store(Protocol):
-    def create_event(self, title: str, entry_names: list[str]) -> Event: ...
+    def create_event(
+        self, title: str, entry_names: list[str], aggregation: AggregationMode = "sum"
+    ) -> Event: ...
 
     def get_event(self, event_id: str) -> Event | None: ...
 
@@ -21,6 +55,12 @@ class Store(Protocol):
 
     def get_participant(self, event_id: str, participant_id: str) -> Participant | None: ...
 
+    def get_event_with_participant(
+        self, event_id: str, participant_id: str
+    ) -> tuple[Event | None, Participant | None]:
+        """イベントと参加者をまとめて読む（バックエンドによっては1往復）。"""
+        ...
+
     def list_participants(self, event_id: str) -> list[Participant]: ...
 
     def put_scores(
@@ -29,207 +69,2562 @@ class Store(Protocol):
 
     def list_scores_by_participant(self, event_id: str) -> dict[str, dict[str, int]]: ...
 
+    def get_scores(self, event_id: str, participant_id: str) -> dict[str, int]:
+        """1参加者分の採点（entry_id -> score）を返す。"""
+        ...
+
+    def join_event_bulk(
+        self, event_id: str, participant_names: list[str]
+    ) -> list[Participant | None]:
+        """複数人をまとめて参加させる。名前が重複した行は None。"""
+        ...
+
+    def put_scores_bulk(self, event_id: str, rows: list[BulkScoreRow]) -> list[str | None]:
+        """複数参加者の採点をまとめて書き込む。行ごとにエラー内容（成功なら None）を返す。"""
+        ...
+
+    def get_ranked_totals(self, event: Event) -> Sequence[tuple[str, float]]: ...
+
+    def get_event_version(self, event_id: str) -> int | None:
+        """イベントの版数を返す。イベントが無ければ None。
+
+        create_event / join_event / put_scores のたびに増える。
+        """
+        ...
+
+
+class AsyncStore(Protocol):
+    """Store の非同期版。async ハンドラーから await で呼ぶ。"""
+
+    async def create_event(
+        self, title: str, entry_names: list[str], aggregation: AggregationMode = "sum"
+    ) -> Event: ...
+
+    async def get_event(self, event_id: str) -> Event | None: ...
+
+    async def join_event(self, event_id: str, participant_name: str) -> Participant: ...
+
+    async def get_participant(self, event_id: str, participant_id: str) -> Participant | None: ...
+
+    async def get_event_with_participant(
+        self, event_id: str, participant_id: str
+    ) -> tuple[Event | None, Participant | None]: ...
+
+    async def list_participants(self, event_id: str) -> list[Participant]: ...
+
+    async def put_scores(
+        self, event_id: str, participant_id: str, participant_key: str, scores: list[ScoreItem]
+    ) -> None: ...
+
+    async def list_scores_by_participant(self, event_id: str) -> dict[str, dict[str, int]]: ...
+
+    async def get_scores(self, event_id: str, participant_id: str) -> dict[str, int]: ...
+
+    async def join_event_bulk(
+        self, event_id: str, participant_names: list[str]
+    ) -> list[Participant | None]: ...
+
+    async def put_scores_bulk(
+        self, event_id: str, rows: list[BulkScoreRow]
+    ) -> list[str | None]: ...
+
+    async def get_ranked_totals(self, event: Event) -> Sequence[tuple[str, float]]: ...
+
+    async def get_event_version(self, event_id: str) -> int | None: ...
+
+    async def aclose(self) -> None: ...
+
+
+# 未採点セルの値（ScoreItem の点数は 0〜100 なので1バイトに収まる）。
+UNSCORED = 0xFF
+
+
+class _ParticipantRecord:
+    """InMemoryStore 内部の参加者レコード。`row` は採点行列の行番号。作成後は変更しない。"""
+
+    __slots__ = ("id", "name", "participant_key", "row")
+
+    def __init__(self, id: str, name: str, participant_key: str, row: int) -> None:
+        self.id = id
+        self.name = name
+        self.participant_key = participant_key
+        self.row = row
+
+    def to_participant(self) -> Participant:
+        return Participant(id=self.id, name=self.name, participant_key=self.participant_key)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """イベントの読み取り用スナップショット。公開後は変更せず、書き込みのたびに作り直す。"""
+
+    version: int
+    entry_ids: tuple[str, ...]
+    participants: tuple[_ParticipantRecord, ...]
+    participants_by_id: dict[str, _ParticipantRecord]
+    cells: bytes
+    ranked: tuple[tuple[str, float], ...]
+
+    def row_scores(self, record: _ParticipantRecord) -> dict[str, int]:
+        width = len(self.entry_ids)
+        row = self.cells[record.row * width : (record.row + 1) * width]
+        return {eid: score for eid, score in zip(self.entry_ids, row) if score != UNSCORED}
+
+
+class _EventIndex:
+    """InMemoryStore のイベント単位インデックス。
+
+    採点は参加者 × 採点対象の行列を1つの `bytearray` に行優先で持つ（1セル1バイト、
+    未採点は `UNSCORED`）。参加者・採点対象の ID はイベント内の連番（行・列番号）に対応付ける。
+    書き込みはイベントのロック内で行い、最後に `publish` で読み取り用の `snapshot` を差し替える。
+    """
+
+    __slots__ = (
+        "event",
+        "entry_ids",
+        "columns",
+        "participants",
+        "participant_ids_by_name",
+        "cells",
+        "totals",
+        "version",
+        "snapshot",
+    )
+
+    def __init__(self, event: Event) -> None:
+        self.event = event
+        self.entry_ids = [e.id for e in event.entries]
+        # entry_id -> 列番号
+        self.columns: dict[str, int] = {eid: i for i, eid in enumerate(self.entry_ids)}
+        # participant_id -> レコード（参加順）
+        self.participants: dict[str, _ParticipantRecord] = {}
+        # 正規化済み参加者名 -> participant_id（同名チェックを O(1) にする）
+        self.participant_ids_by_name: dict[str, str] = {}
+        self.cells = bytearray()
+        self.totals = self._new_totals()
+        # 結果キャッシュ・ETag 用の版数。書き込みのたびに増やす。
+        self.version = 0
+        self.snapshot = _Snapshot(0, tuple(self.entry_ids), (), {}, b"", ())
+        self.publish(participants_changed=True)
+
+    def _new_totals(self) -> RankedTotals | AggregateTotals:
+        if self.event.aggregation == "sum":
+            return RankedTotals(self.entry_ids)
+        return AggregateTotals(self.entry_ids, self.event.aggregation)
+
+    def _row(self, offset: int) -> dict[str, int]:
+        row = self.cells[offset : offset + len(self.entry_ids)]
+        return {eid: score for eid, score in zip(self.entry_ids, row) if score != UNSCORED}
+
+    def publish(self, participants_changed: bool = False) -> None:
+        """現在の内容を読み取り用スナップショットとして公開する。"""
+
+        previous = self.snapshot
+        if participants_changed:
+            participants = tuple(self.participants.values())
+            by_id = dict(self.participants)
+        else:
+            participants, by_id = previous.participants, previous.participants_by_id
+        self.snapshot = _Snapshot(
+            version=self.version,
+            entry_ids=previous.entry_ids,
+            participants=participants,
+            participants_by_id=by_id,
+            cells=bytes(self.cells),
+            ranked=tuple(self.totals.ranked()),
+        )
+
+    def add_participant(self, participant: Participant) -> None:
+        self.participants[participant.id] = _ParticipantRecord(
+            participant.id, participant.name, participant.participant_key, len(self.participants)
+        )
+        self.participant_ids_by_name[participant.name] = participant.id
+        self.cells.extend(bytes([UNSCORED]) * len(self.entry_ids))
+
+    def set_scores(
+        self, record: _ParticipantRecord, scores: list[ScoreItem]
+    ) -> list[tuple[int, int]]:
+        """採点を書き込み、集計値に差分を反映する。イベントに無い採点対象は無視する。
+
+        Returns:
+            書き込んだ (列番号, 点数) の一覧（追記ログ用）。
+        """
+
+        offset = record.row * len(self.entry_ids)
+        written: list[tuple[int, int]] = []
+        totals = self.totals
+        if isinstance(totals, AggregateTotals):
+            old_row = self._row(offset)
+            for item in scores:
+                column = self.columns.get(item.entry_id)
+                if column is not None:
+                    self.cells[offset + column] = int(item.score)
+                    written.append((column, int(item.score)))
+            totals.apply_row(old_row, self._row(offset))
+            return written
+
+        for item in scores:
+            column = self.columns.get(item.entry_id)
+            if column is None:
+                continue
+            new_score = int(item.score)
+            old = self.cells[offset + column]
+            totals.apply_delta(item.entry_id, new_score - (0 if old == UNSCORED else old))
+            self.cells[offset + column] = new_score
+            written.append((column, new_score))
+        return written
+
+    def dump(self) -> bytes:
+        """「JSON ヘッダー1行 + 採点行列」の形式に書き出す（退避・スナップショット用）。"""
+
+        header = {
+            "event": self.event.model_dump(mode="json"),
+            "version": self.version,
+            "participants": [[r.id, r.name, r.participant_key] for r in self.participants.values()],
+        }
+        return json.dumps(header, ensure_ascii=False).encode() + b"\n" + self.cells
+
+    @classmethod
+    def load(cls, data: bytes) -> "_EventIndex":
+        """`dump` の出力から作り直す。読み取り用スナップショットも公開する。"""
+
+        header_line, _, cells = data.partition(b"\n")
+        header = json.loads(header_line)
+        index = cls(Event.model_validate(header["event"]))
+        for pid, name, key in header["participants"]:
+            index.add_participant(Participant(id=pid, name=name, participant_key=key))
+        index.cells[:] = cells
+        index.rebuild_totals()
+        index.version = header["version"]
+        index.publish(participants_changed=True)
+        return index
+
+    def rebuild_totals(self) -> None:
+        """採点行列から集計値を計算し直す。"""
+
+        width = len(self.entry_ids)
+        self.totals = totals = self._new_totals()
+        if isinstance(totals, AggregateTotals):
+            for record in self.participants.values():
+                totals.apply_row({}, self._row(record.row * width))
+            return
+        for column, entry_id in enumerate(self.entry_ids):
+            total = sum(s for s in self.cells[column::width] if s != UNSCORED) if width else 0
+            totals.apply_delta(entry_id, total)
+
+
+# メモリ量の見積もりに使う、参加者・採点対象1件あたりのおおよそのバイト数（ID 文字列込み）。
+_PARTICIPANT_OVERHEAD_BYTES = 400
+_ENTRY_OVERHEAD_BYTES = 300
+_SPILLABLE_EVENT_ID = re.compile(r"[A-Za-z0-9_-]+")
+# 追記ログの採点レコードの1セル分: (列番号, 点数)
+_LOGGED_CELL = struct.Struct("<HB")
+
+
+def _log_payload(event_id: str, body: bytes) -> bytes:
+    """追記ログのレコード本文。どの種類も先頭に (長さ1バイト + イベント ID) を置く。"""
+
+    encoded = event_id.encode()
+    return bytes([len(encoded)]) + encoded + body
+
+
+def _split_log_payload(payload: bytes) -> tuple[str, bytes]:
+    length = payload[0]
+    return payload[1 : 1 + length].decode(), payload[1 + length :]
+
+
+def _encode_scores(participant_id: str, cells: list[tuple[int, int]]) -> bytes:
+    encoded = participant_id.encode()
+    return bytes([len(encoded)]) + encoded + b"".join(_LOGGED_CELL.pack(*c) for c in cells)
+
+
+def _decode_scores(body: bytes) -> tuple[str, list[tuple[int, int]]]:
+    length = body[0]
+    participant_id = body[1 : 1 + length].decode()
+    return participant_id, list(_LOGGED_CELL.iter_unpack(body[1 + length :]))
+
+
+@dataclass
+class RetentionStats:
+    """InMemoryStore の保持期間・退避の統計。"""
+
+    evictions: int = 0
+    expirations: int = 0
+    spills: int = 0
+    reloads: int = 0
+
 
 @dataclass
 class InMemoryStore(Store):
+    """プロセス内メモリに保持するストア。
+
+    書き込みはイベント ID ごとのロック（`lock_stripes` 本に振り分け）で直列化するので、
+    別のイベントへの書き込みは互いに待たない。読み取りはロックを取らず、書き込みのたびに
+    公開される不変のスナップショットを読むので、結果の読み取りが採点の書き込みを塞がない。
+
+    上限（イベント数・推定バイト数）を超えたら最後にアクセスされてから最も時間の経った
+    イベントから追い出し、`ttl_seconds` の間アクセスの無いイベントも追い出す。
+    `spill_dir` を指定すると追い出したイベントをファイルに書き出し、次のアクセス時に読み戻す。
+    指定しなければ追い出したイベントは消える。
+
+    `score_log` を指定すると、書き込みを追記ログに残し、起動時に `recover` で復元する。
+    ログが `compact_bytes` を超えたら全イベントのスナップショットを書いて古いログを消す
+    （復元で読み直す量の上限になる）。残っている世代の範囲なら `replay_event` で過去の時点の
+    状態を作り直せる。
+
+    Args:
+        max_events: メモリに保持するイベント数の上限。
+        max_bytes: メモリに保持するイベントの推定バイト数の上限。
+        ttl_seconds: 最後のアクセスからこの秒数が経ったイベントを追い出す。
+        spill_dir: 追い出したイベントの書き出し先ディレクトリ。
+        lock_stripes: 書き込みロックの本数。
+        participant_keys: 参加者キーの署名に使う鍵。省略時はランダムなキーを発行する。
+        score_log: 書き込みを残す追記ログ。
+    """
+
     events: dict[str, Event]
-    participants: dict[tuple[str, str], Participant]
-    scores: dict[tuple[str, str, str], int]
+    indexes: dict[str, _EventIndex]
+    max_events: int | None = None
+    max_bytes: int | None = None
+    ttl_seconds: float | None = None
+    spill_dir: Path | None = None
+    lock_stripes: int = 64
+    participant_keys: ParticipantKeys | None = field(default=None, repr=False)
+    score_log: ScoreLog | None = field(default=None, repr=False)
+    clock: Callable[[], float] = field(default=time.monotonic, repr=False)
+    stats: RetentionStats = field(default_factory=RetentionStats)
+    # event_id -> 最終アクセス時刻（古い順）
+    _last_access: OrderedDict[str, float] = field(default_factory=OrderedDict, repr=False)
+    _sizes: dict[str, int] = field(default_factory=dict, repr=False)
+    _total_bytes: int = 0
+    # events / indexes の追加・削除と保持期間の管理用。イベントのロックを持ったまま取ってよい
+    # （逆順に取らない）。
+    _registry_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _locks: list[threading.Lock] = field(default_factory=list, repr=False)
+    # 圧縮は同時に1つだけ、別スレッドで行う。
+    _compaction_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _compaction: threading.Thread | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        self._locks = [threading.Lock() for _ in range(max(1, self.lock_stripes))]
 
     @classmethod
-    def create(cls) -> "InMemoryStore":
-        return cls(events={}, participants={}, scores={})
+    def create(cls, **options: Any) -> "InMemoryStore":
+        return cls(events={}, indexes={}, **options)
+
+    @classmethod
+    def from_env(cls) -> "InMemoryStore":
+        def _optional(name: str, parse: Callable[[str], Any]) -> Any:
+            value = os.environ.get(name, "").strip()
+            return parse(value) if value else None
+
+        log_dir = _optional("INMEMORY_LOG_DIR", Path)
+        score_log = None
+        if log_dir is not None:
+            score_log = ScoreLog(
+                log_dir,
+                fsync_interval=int(os.environ.get("INMEMORY_LOG_FSYNC_MS", "50")) / 1000,
+                compact_bytes=_optional("INMEMORY_LOG_COMPACT_BYTES", int) or 64 * 1024 * 1024,
+                retain_generations=_optional("INMEMORY_LOG_RETAIN_GENERATIONS", int) or 1,
+            )
+        store = cls.create(
+            max_events=_optional("INMEMORY_MAX_EVENTS", int),
+            max_bytes=_optional("INMEMORY_MAX_BYTES", int),
+            ttl_seconds=_optional("INMEMORY_EVENT_TTL_SECONDS", float),
+            spill_dir=_optional("INMEMORY_SPILL_DIR", Path),
+            participant_keys=ParticipantKeys.from_env(),
+            score_log=score_log,
+        )
+        if score_log is not None:
+            store.recover()
+        return store
+
+    def memory_bytes(self) -> int:
+        """メモリ上のイベントの推定バイト数の合計。"""
+
+        return self._total_bytes
+
+    def _lock_for(self, event_id: str) -> threading.Lock:
+        return self._locks[hash(event_id) % len(self._locks)]
+
+    def _lookup(self, event_id: str) -> _EventIndex | None:
+        """イベントのインデックスを返す。追い出し済みなら書き出し先から読み戻す。"""
+
+        index = self.indexes.get(event_id)
+        if index is None:
+            index = self._reload(event_id)
+            if index is None:
+                return None
+        else:
+            self._touch(event_id)
+        self._enforce_retention(keep=event_id)
+        return index
+
+    def _snapshot(self, event_id: str) -> _Snapshot | None:
+        index = self._lookup(event_id)
+        return index.snapshot if index is not None else None
+
+    @contextmanager
+    def _writing(self, event_id: str) -> Iterator[_EventIndex | None]:
+        """イベントのロックを取り、その間に書き込むインデックスを渡す。"""
+
+        while True:
+            index = self._lookup(event_id)
+            with self._lock_for(event_id):
+                # ロックを待つ間に追い出されていたら、読み戻してやり直す。
+                if index is not None and self.indexes.get(event_id) is not index:
+                    continue
+                yield index
+                return
+
+    def _register(self, index: _EventIndex, *, reloaded: bool = False) -> None:
+        event_id = index.event.id
+        with self._registry_lock:
+            self.events[event_id] = index.event
+            self.indexes[event_id] = index
+            self._last_access[event_id] = self.clock()
+            if reloaded:
+                self.stats.reloads += 1
+                metrics.INMEMORY_RETENTION.inc("reloaded")
+        self._account(event_id)
+
+    def _touch(self, event_id: str) -> None:
+        with self._registry_lock:
+            if event_id in self._last_access:
+                self._last_access[event_id] = self.clock()
+                self._last_access.move_to_end(event_id)
+
+    def _account(self, event_id: str) -> None:
+        """イベントの推定バイト数を計算し直す（書き込みで大きさが変わったとき）。"""
+
+        index = self.indexes.get(event_id)
+        if index is None:
+            return
+        size = (
+            len(index.cells)
+            + len(index.participants) * _PARTICIPANT_OVERHEAD_BYTES
+            + len(index.entry_ids) * _ENTRY_OVERHEAD_BYTES
+        )
+        with self._registry_lock:
+            if event_id in self._last_access:
+                self._total_bytes += size - self._sizes.get(event_id, 0)
+                self._sizes[event_id] = size
+
+    def _retention_victim(self, keep: str) -> tuple[str, bool] | None:
+        """次に追い出すイベントと、それが期限切れによるものかを返す。_registry_lock 内で呼ぶ。"""
+
+        if not self._last_access:
+            return None
+        event_id, last_access = next(iter(self._last_access.items()))
+        if event_id == keep:
+            return None
+        expired = self.ttl_seconds is not None and self.clock() - last_access > self.ttl_seconds
+        over_budget = (
+            self.max_events is not None and len(self._last_access) > self.max_events
+        ) or (self.max_bytes is not None and self._total_bytes > self.max_bytes)
+        return (event_id, expired) if expired or over_budget else None
+
+    def _enforce_retention(self, keep: str) -> None:
+        """期限切れ・上限超過のイベントを古い順に追い出す。`keep`（今アクセス中）は残す。
+
+        ロックを持たない状態で呼ぶこと。
+        """
+
+        while True:
+            with self._registry_lock:
+                victim = self._retention_victim(keep)
+            if victim is None:
+                return
+            event_id, expired = victim
+            # 書き込み中のイベントは追い出さない（そのイベントのロックを取ってから外す）。
+            with self._lock_for(event_id):
+                with self._registry_lock:
+                    if self._retention_victim(keep) != victim:
+                        continue
+                    self.events.pop(event_id, None)
+                    index = self.indexes.pop(event_id)
+                    del self._last_access[event_id]
+                    self._total_bytes -= self._sizes.pop(event_id, 0)
+                    self.stats.evictions += 1
+                    metrics.INMEMORY_RETENTION.inc("evicted")
+                    if expired:
+                        self.stats.expirations += 1
+                        metrics.INMEMORY_RETENTION.inc("expired")
+                    if self.spill_dir is not None:
+                        self.stats.spills += 1
+                        metrics.INMEMORY_RETENTION.inc("spilled")
+                if self.spill_dir is not None:
+                    self._spill(index)
+
+    def _spill_path(self, event_id: str) -> Path | None:
+        if self.spill_dir is None or not _SPILLABLE_EVENT_ID.fullmatch(event_id):
+            return None
+        return self.spill_dir / f"{event_id}.m1ev"
+
+    def _spill(self, index: _EventIndex) -> None:
+        """イベントを「JSON ヘッダー1行 + 採点行列のバイト列」の形式で書き出す。"""
+
+        path = self._spill_path(index.event.id)
+        assert path is not None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(index.dump())
+        os.replace(tmp, path)
+
+    def _reload(self, event_id: str) -> _EventIndex | None:
+        path = self._spill_path(event_id)
+        if path is None:
+            return None
+        with self._lock_for(event_id):
+            # 他のスレッドが先に読み戻していればそれを使う。
+            index = self.indexes.get(event_id)
+            if index is not None:
+                return index
+            if not path.exists():
+                return None
+            index = _EventIndex.load(path.read_bytes())
+            path.unlink()
+            self._register(index, reloaded=True)
+        return index
+
+    def _log(self, op: int, index: _EventIndex, body: bytes) -> None:
+        """書き込みを追記ログに残す。イベントのロック内で、版数を上げた後に呼ぶ。"""
+
+        if self.score_log is not None:
+            self.score_log.append(op, index.version, _log_payload(index.event.id, body))
+
+    def _log_join(self, index: _EventIndex, participant: Participant) -> None:
+        body = [participant.id, participant.name, participant.participant_key]
+        self._log(OP_JOIN, index, json.dumps(body, ensure_ascii=False).encode())
+
+    def _apply_record(self, record: Record) -> None:
+        """追記ログのレコードを1件反映する（読み取り用の公開は呼び出し元でまとめて行う）。
+
+        スナップショットとその直後のログは重なることがあるので、同じ書き込みを2回反映しても
+        結果が変わらないようにしている。
+        """
+
+        event_id, body = _split_log_payload(record.payload)
+        if record.op == OP_EVENT_STATE:
+            self._register(_EventIndex.load(body))
+            return
+        if record.op == OP_CREATE_EVENT:
+            if event_id not in self.indexes:
+                created = _EventIndex(Event.model_validate_json(body))
+                created.version = record.version
+                self._register(created)
+            return
+
+        index = self.indexes.get(event_id)
+        if index is None:
+            return
+        if record.op == OP_JOIN:
+            participant_id, name, key = json.loads(body)
+            if participant_id not in index.participants:
+                index.add_participant(
+                    Participant(id=participant_id, name=name, participant_key=key)
+                )
+        elif record.op == OP_SCORES:
+            participant_id, cells = _decode_scores(body)
+            participant = index.participants.get(participant_id)
+            if participant is None:
+                return
+            scores = [
+                ScoreItem.model_construct(entry_id=index.entry_ids[column], score=score)
+                for column, score in cells
+            ]
+            index.set_scores(participant, scores)
+        index.version = record.version
+
+    def _publish_all(self) -> None:
+        for event_id, index in list(self.indexes.items()):
+            index.publish(participants_changed=True)
+            self._account(event_id)
+
+    def recover(self) -> int:
+        """追記ログ（最新のスナップショットとそれ以降のログ）からイベントを復元する。
+
+        起動直後、読み書きを始める前に呼ぶ。
+
+        Returns:
+            読み直したレコード数。
+        """
+
+        assert self.score_log is not None
+        start = time.perf_counter()
+        replayed = 0
+        for record in self.score_log.replay(repair=True):
+            self._apply_record(record)
+            replayed += 1
+        self._publish_all()
+        for event_id in list(self.indexes):
+            # 退避ファイルより追記ログの方が新しいので、残っていれば消す。
+            path = self._spill_path(event_id)
+            if path is not None:
+                path.unlink(missing_ok=True)
+        self.score_log.stats.replayed = replayed
+        self.score_log.stats.recovery_seconds = time.perf_counter() - start
+        self._enforce_retention(keep="")
+        return replayed
 
-    def create_event(self, title: str, entry_names: list[str]) -> Event:
+    def replay_event(self, event_id: str, at: float) -> "InMemoryStore | None":
+        """追記ログから、時刻 `at`（UNIX 時間）の時点のイベントだけを持つストアを作る。
+
+        追記ログを使っていない場合や、残っている最も古い世代より前の時点なら None を返す。
+        """
+
+        if self.score_log is None:
+            return None
+        replica = InMemoryStore.create()
+        for record in self.score_log.replay(oldest=True):
+            if _split_log_payload(record.payload)[0] != event_id:
+                continue
+            # 1イベントのレコードはそのイベントのロック内で書くので、時刻順に並んでいる。
+            if record.timestamp > at:
+                break
+            replica._apply_record(record)
+        if event_id not in replica.indexes:
+            return None
+        replica._publish_all()
+        return replica
+
+    def _maybe_compact(self) -> None:
+        log = self.score_log
+        if log is None or not log.needs_compaction():
+            return
+        if not self._compaction_lock.acquire(blocking=False):
+            return
+        self._compaction = threading.Thread(
+            target=self._compact_in_background, name="m1-score-log-compaction", daemon=True
+        )
+        self._compaction.start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self._compact_locked()
+        finally:
+            self._compaction_lock.release()
+
+    def compact(self) -> None:
+        """追記ログを新しい世代に切り替え、全イベントのスナップショットを書く。"""
+
+        with self._compaction_lock:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        log = self.score_log
+        assert log is not None
+        # 先に切り替えるので、スナップショットを取る間の書き込みは新しい世代のログに残る。
+        generation = log.rotate()
+        event_ids = set(self.indexes)
+        if self.spill_dir is not None and self.spill_dir.exists():
+            event_ids.update(p.stem for p in self.spill_dir.glob("*.m1ev"))
+
+        def states() -> Iterator[Record]:
+            for event_id in sorted(event_ids):
+                with self._lock_for(event_id):
+                    index = self.indexes.get(event_id)
+                    if index is not None:
+                        data, version = index.dump(), index.version
+                    else:
+                        path = self._spill_path(event_id)
+                        if path is None or not path.exists():
+                            continue
+                        data = path.read_bytes()
+                        version = json.loads(data.partition(b"\n")[0])["version"]
+                    # この時刻までの書き込みを含む状態（過去の時点の再生で使う）
+                    captured_at = log.clock()
+                yield Record(OP_EVENT_STATE, captured_at, version, _log_payload(event_id, data))
+
+        log.write_snapshot(generation, states())
+
+    def close(self) -> None:
+        """圧縮の完了を待ち、追記ログを閉じる。"""
+
+        if self._compaction is not None:
+            self._compaction.join()
+        if self.score_log is not None:
+            self.score_log.close()
+
+    def create_event(
+        self, title: str, entry_names: list[str], aggregation: AggregationMode = "sum"
+    ) -> Event:
         event_id = new_id("evt")
         entries = [
             Entry(id=new_id("ent"), name=name.strip()) for name in entry_names if name.strip()
         ]
         if not entries:
             raise ValueError("entry_names must contain at least one non-blank item")
-        event = Event(id=event_id, title=title.strip(), entries=entries, created_at=_now())
-        self.events[event_id] = event
+        event = Event(
+            id=event_id,
+            title=title.strip(),
+            entries=entries,
+            created_at=_now(),
+            aggregation=aggregation,
+        )
+        index = _EventIndex(event)
+        index.version += 1
+        index.publish()
+        # 登録前なので他のスレッドはまだこのイベントに書き込めない（ロック不要）。
+        self._log(OP_CREATE_EVENT, index, event.model_dump_json().encode())
+        self._register(index)
+        self._enforce_retention(keep=event_id)
+        self._maybe_compact()
         return event
 
     def get_event(self, event_id: str) -> Event | None:
-        return self.events.get(event_id)
+        index = self._lookup(event_id)
+        return index.event if index is not None else None
 
-    def join_event(self, event_id: str, participant_name: str) -> Participant:
+    def _join_locked(self, index: _EventIndex, participant_name: str) -> Participant:
         normalized_name = participant_name.strip()
 
         # Enforce unique participant name within the same event.
-        if any(p.name == normalized_name for p in self.list_participants(event_id)):
+        if normalized_name in index.participant_ids_by_name:
             raise ValueError("participant name already exists")
 
+        participant_id = new_id("p")
         participant = Participant(
-            id=new_id("p"),
+            id=participant_id,
             name=normalized_name,
-            participant_key=new_id("k"),
+            participant_key=new_participant_key(
+                self.participant_keys, index.event.id, participant_id
+            ),
         )
-        self.participants[(event_id, participant.id)] = participant
+        index.add_participant(participant)
+        return participant
+
+    def join_event(self, event_id: str, participant_name: str) -> Participant:
+        with self._writing(event_id) as index:
+            if index is None:
+                raise KeyError("event not found")
+            participant = self._join_locked(index, participant_name)
+            index.version += 1
+            self._log_join(index, participant)
+            index.publish(participants_changed=True)
+        self._account(event_id)
+        self._enforce_retention(keep=event_id)
+        self._maybe_compact()
         return participant
 
+    def join_event_bulk(
+        self, event_id: str, participant_names: list[str]
+    ) -> list[Participant | None]:
+        joined: list[Participant | None] = []
+        with self._writing(event_id) as index:
+            if index is None:
+                raise KeyError("event not found")
+            for name in participant_names:
+                try:
+                    joined.append(self._join_locked(index, name))
+                except ValueError:
+                    joined.append(None)
+            if any(p is not None for p in joined):
+                index.version += 1
+                for participant in joined:
+                    if participant is not None:
+                        self._log_join(index, participant)
+                index.publish(participants_changed=True)
+        self._account(event_id)
+        self._enforce_retention(keep=event_id)
+        self._maybe_compact()
+        return joined
+
     def get_participant(self, event_id: str, participant_id: str) -> Participant | None:
-        return self.participants.get((event_id, participant_id))
+        snapshot = self._snapshot(event_id)
+        record = snapshot.participants_by_id.get(participant_id) if snapshot else None
+        return record.to_participant() if record is not None else None
+
+    def get_event_with_participant(
+        self, event_id: str, participant_id: str
+    ) -> tuple[Event | None, Participant | None]:
+        return self.get_event(event_id), self.get_participant(event_id, participant_id)
 
     def list_participants(self, event_id: str) -> list[Participant]:
-        return [p for (eid, _), p in self.participants.items() if eid == event_id]
+        snapshot = self._snapshot(event_id)
+        if snapshot is None:
+            return []
+        return [record.to_participant() for record in snapshot.participants]
+
+    @staticmethod
+    def _put_scores_locked(
+        index: _EventIndex | None,
+        participant_id: str,
+        participant_key: str,
+        scores: list[ScoreItem],
+    ) -> list[tuple[int, int]]:
+        record = index.participants.get(participant_id) if index is not None else None
+        if index is None or record is None:
+            raise KeyError("participant not found")
+        if record.participant_key != participant_key:
+            raise PermissionError("invalid participant key")
+        return index.set_scores(record, scores)
 
     def put_scores(
         self, event_id: str, participant_id: str, participant_key: str, scores: list[ScoreItem]
     ) -> None:
-        participant = self.get_participant(event_id, participant_id)
-        if participant is None:
-            raise KeyError("participant not found")
-        if participant.participant_key != participant_key:
-            raise PermissionError("invalid participant key")
+        with self._writing(event_id) as index:
+            cells = self._put_scores_locked(index, participant_id, participant_key, scores)
+            assert index is not None
+            index.version += 1
+            self._log(OP_SCORES, index, _encode_scores(participant_id, cells))
+            index.publish()
+        self._maybe_compact()
 
-        for item in scores:
-            self.scores[(event_id, participant_id, item.entry_id)] = int(item.score)
+    def put_scores_bulk(self, event_id: str, rows: list[BulkScoreRow]) -> list[str | None]:
+        errors: list[str | None] = []
+        written: list[tuple[str, list[tuple[int, int]]]] = []
+        with self._writing(event_id) as index:
+            for row in rows:
+                try:
+                    cells = self._put_scores_locked(
+                        index, row.participant_id, row.participant_key, row.scores
+                    )
+                except KeyError:
+                    errors.append("participant not found")
+                except PermissionError:
+                    errors.append("invalid participant key")
+                else:
+                    errors.append(None)
+                    written.append((row.participant_id, cells))
+            if index is not None and written:
+                index.version += 1
+                for participant_id, cells in written:
+                    self._log(OP_SCORES, index, _encode_scores(participant_id, cells))
+                index.publish()
+        self._maybe_compact()
+        return errors
 
     def list_scores_by_participant(self, event_id: str) -> dict[str, dict[str, int]]:
-        result: dict[str, dict[str, int]] = defaultdict(dict)
-        for (eid, pid, entry_id), score in self.scores.items():
-            if eid != event_id:
-                continue
-            result[pid][entry_id] = int(score)
-        return dict(result)
+        snapshot = self._snapshot(event_id)
+        if snapshot is None:
+            return {}
+        result: dict[str, dict[str, int]] = {}
+        for record in snapshot.participants:
+            score_map = snapshot.row_scores(record)
+            if score_map:
+                result[record.id] = score_map
+        return result
+
+    def get_scores(self, event_id: str, participant_id: str) -> dict[str, int]:
+        snapshot = self._snapshot(event_id)
+        record = snapshot.participants_by_id.get(participant_id) if snapshot else None
+        if snapshot is None or record is None:
+            return {}
+        return snapshot.row_scores(record)
+
+    def get_ranked_totals(self, event: Event) -> Sequence[tuple[str, float]]:
+        snapshot = self._snapshot(event.id)
+        if snapshot is None:
+            return [(e.id, 0) for e in sorted(event.entries, key=lambda e: e.id)]
+        return list(snapshot.ranked)
+
+    def get_event_version(self, event_id: str) -> int | None:
+        snapshot = self._snapshot(event_id)
+        return snapshot.version if snapshot is not None else None
+
+
+@functools.cache
+def _type_codecs() -> tuple[Any, Any]:
+    # boto3 の import は重い（数百ms）ので、DynamoDB を使うときまで遅らせる。
+    from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+    return TypeSerializer(), TypeDeserializer()
+
+
+# リクエスト単位の読み取りキャッシュ: (pk, sk) -> アイテム（存在しなければ None）
+_read_scope: contextvars.ContextVar[dict[tuple[str, str], dict[str, Any] | None] | None] = (
+    contextvars.ContextVar("m1_read_scope", default=None)
+)
+
+
+@contextmanager
+def read_scope() -> Iterator[None]:
+    """1リクエスト分の作業単位。スコープ内では同じキーの GetItem を1回にまとめる。"""
+
+    token = _read_scope.set({})
+    try:
+        yield
+    finally:
+        _read_scope.reset(token)
+
+
+def _serialize(item: dict[str, Any]) -> dict[str, Any]:
+    serializer = _type_codecs()[0]
+    return {k: serializer.serialize(v) for k, v in item.items()}
+
+
+def _deserialize(item: dict[str, Any]) -> dict[str, Any]:
+    deserializer = _type_codecs()[1]
+    return {k: deserializer.deserialize(v) for k, v in item.items()}
+
+
+def _key(pk: str, sk: str) -> dict[str, Any]:
+    return {"pk": {"S": pk}, "sk": {"S": sk}}
+
+
+def build_dynamodb_client() -> Any:
+    """接続プール・リトライ設定済みの DynamoDB クライアントを作る。
+
+    低レベルクライアントはスレッドセーフなので、プロセス内で1つを共有する。
+    """
+
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "dynamodb",
+        config=Config(
+            max_pool_connections=int(os.environ.get("DDB_MAX_POOL_CONNECTIONS", "32")),
+            retries={
+                "max_attempts": int(os.environ.get("DDB_MAX_ATTEMPTS", "3")),
+                "mode": os.environ.get("DDB_RETRY_MODE", "standard"),
+            },
+        ),
+    )
+
+
+def _score_segment_bounds(segments: int, prefix: str = "SCORE#") -> list[tuple[str, str]]:
+    """SCORE#（または BALLOT#）の範囲を participant_id の先頭（16進1文字）で分割する。
+
+    participant_id は `p_{uuid4().hex}` なので、`SCORE#p_0`〜`SCORE#p_f` で区切れる。
+    BETWEEN は両端を含むが、境界値そのものと一致する sk は存在しない。
+    先頭と末尾は `SCORE#` 全体を覆うように広げる。
+
+    Returns:
+        (下限, 上限) の一覧。
+    """
+
+    hex_digits = "0123456789abcdef"
+    segments = max(1, min(segments, len(hex_digits)))
+    starts = [hex_digits[len(hex_digits) * i // segments] for i in range(segments)]
+    lows = [prefix] + [f"{prefix}p_{c}" for c in starts[1:]]
+    highs = lows[1:] + [prefix[:-1] + "$"]
+    return list(zip(lows, highs))
+
+
+# 採点アイテムの持ち方。cell: 1セル1アイテム（SCORE#{participant}#{entry}）、
+# ballot: 1参加者1アイテム（BALLOT#{participant} に scores のマップと楽観ロック用の rev）。
+ScoreLayout = Literal["cell", "ballot"]
+_SCORE_PREFIXES: dict[str, str] = {"cell": "SCORE#", "ballot": "BALLOT#"}
+
+
+_TRANSACT_MAX_ITEMS = 100
+_SCORE_WRITE_ATTEMPTS = 5
+# BatchGetItem / BatchWriteItem の未処理分を送り直す回数の上限（最初の1回を含む）。
+_BATCH_ATTEMPTS = 8
+# 衝突・スロットリング後の再試行の待ち時間（上限付きの指数バックオフ、ジッターあり）。
+_RETRY_BASE_SECONDS = 0.01
+_RETRY_MAX_SECONDS = 0.5
+# 採点対象 ID の集合と集計方法を覚えておくイベント数（どちらも作成後に変わらない）。
+_ENTRY_IDS_CACHE_SIZE = 1024
+# 合計以外の集計方法のイベントで、TOTALS に集計用の統計を持っていることを示す属性。
+_STATS_MARKER = "#stats"
+# 合計以外の集計方法では、1トランザクションで書くセル数をこれ以下にする（TOTALS の更新式が
+# 1セルあたり最大3項増え、式の長さの上限 4KB を超えないようにする）。
+_STATS_TRANSACT_CELLS = 50
+# 1回の UpdateItem の ADD に並べる項の数の上限（まとめての採点で TOTALS を更新するとき）。
+_UPDATE_MAX_TERMS = 200
+
+
+class StoreUnavailableError(RuntimeError):
+    """ストアが一時的に要求を処理できなかった。少し待ってやり直せばよい。"""
+
+
+class WriteConflictError(StoreUnavailableError):
+    """並行する書き込みとの衝突が続き、書き込めなかった。少し待ってやり直せば書ける。"""
+
+
+class ThrottledError(StoreUnavailableError):
+    """BatchGetItem / BatchWriteItem の未処理分が、送り直しを使い切っても残った。"""
+
+
+def _backoff(attempt: int) -> None:
+    """attempt 回目（0始まり）の再試行の前に、上限付きの指数バックオフ（full jitter）で待つ。"""
+
+    time.sleep(random.uniform(0, min(_RETRY_MAX_SECONDS, _RETRY_BASE_SECONDS * 2**attempt)))
+
+
+def _stat_attributes(
+    counts: dict[tuple[str, int], int], zsums: dict[str, float]
+) -> dict[str, float]:
+    """`stat_deltas` の差分を TOTALS の属性（`{entry_id}#{点数}`・`{entry_id}#z`）にする。"""
+
+    attributes: dict[str, float] = {f"{eid}#{score}": c for (eid, score), c in counts.items()}
+    attributes.update({f"{eid}#z": z for eid, z in zsums.items()})
+    return attributes
+
+
+def _add_into(target: dict[str, float], deltas: dict[str, float]) -> None:
+    for name, delta in deltas.items():
+        target[name] = target.get(name, 0) + delta
+
+
+def _is_condition_conflict(error: Any) -> bool:
+    reasons = error.response.get("CancellationReasons", [])
+    return any(r.get("Code") in ("ConditionalCheckFailed", "TransactionConflict") for r in reasons)
 
 
 @dataclass
 class DynamoDBStore(Store):
+    """DynamoDB（単一テーブル）を使うストア。
+
+    Args:
+        table_name: テーブル名。
+        client: 共有する DynamoDB クライアント。省略時は環境変数の設定で作る。
+        consistent_read: Query を強い整合性で読むか。False なら結果整合性（読み取り容量半分）。
+        score_query_segments: 採点の一覧取得を並行に分割する数（1なら分割しない）。
+        query_page_size: Query 1ページあたりの最大件数。省略時は DynamoDB の上限（1MB）まで。
+        participant_keys: 参加者キーの署名に使う鍵。署名を検証できた書き込みは参加者を読まない。
+        score_layout: 採点アイテムの持ち方（`ScoreLayout`）。ballot なら1回の採点の書き込みは
+            アイテム1件の条件付き書き込みになり、イベント全体の採点は参加者数分のアイテムで読める。
+            既存のデータは scripts/migrate_score_layout.py で変換する。
+    """
+
     table_name: str
+    client: Any = field(default=None, repr=False, compare=False)
+    consistent_read: bool = True
+    score_query_segments: int = 1
+    query_page_size: int | None = None
+    participant_keys: ParticipantKeys | None = field(default=None, repr=False, compare=False)
+    score_layout: ScoreLayout = "cell"
+    _entry_ids: OrderedDict[str, tuple[frozenset[str], AggregationMode]] = field(
+        default_factory=OrderedDict, init=False, repr=False, compare=False
+    )
+    _entry_ids_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        if self.score_layout not in get_args(ScoreLayout):
+            raise ValueError(f"unknown score layout: {self.score_layout}")
+        if self.client is None:
+            self.client = build_dynamodb_client()
+        if metrics.enabled():
+            metrics.instrument_dynamodb_client(self.client)
 
     @classmethod
     def from_env(cls) -> "DynamoDBStore":
         table_name = os.environ.get("DDB_TABLE_NAME", "")
         if not table_name:
             raise RuntimeError("DDB_TABLE_NAME is required for dynamodb store")
-        return cls(table_name=table_name)
+        score_layout = os.environ.get("DDB_SCORE_LAYOUT", "").strip().lower() or "cell"
+        return cls(
+            table_name=table_name,
+            consistent_read=os.environ.get("DDB_CONSISTENT_READ", "true").strip().lower()
+            not in ("0", "false", "no"),
+            score_query_segments=int(os.environ.get("DDB_SCORE_QUERY_SEGMENTS", "1")),
+            participant_keys=ParticipantKeys.from_env(),
+            score_layout=score_layout,  # type: ignore[arg-type]
+        )
+
+    def _query(
+        self,
+        key_condition: str,
+        values: dict[str, Any],
+        *,
+        projection: str | None = None,
+        names: dict[str, str] | None = None,
+        consistent: bool | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Query を LastEvaluatedKey に沿って最後のページまで読み、アイテムを順に返す。"""
+
+        kwargs: dict[str, Any] = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": key_condition,
+            "ExpressionAttributeValues": _serialize(values),
+            "ConsistentRead": self.consistent_read if consistent is None else consistent,
+        }
+        if projection is not None:
+            kwargs["ProjectionExpression"] = projection
+        if names:
+            kwargs["ExpressionAttributeNames"] = names
+        if self.query_page_size is not None:
+            kwargs["PaginationConfig"] = {"PageSize": self.query_page_size}
+
+        for page in self.client.get_paginator("query").paginate(**kwargs):
+            for raw in page.get("Items", []):
+                yield _deserialize(raw)
+
+    def _query_score_range(
+        self,
+        event_id: str,
+        low: str,
+        high: str,
+        projection: str,
+        *,
+        consistent: bool | None = None,
+    ) -> list[dict[str, Any]]:
+        return list(
+            self._query(
+                "pk = :pk AND sk BETWEEN :low AND :high",
+                {":pk": f"EVENT#{event_id}", ":low": low, ":high": high},
+                projection=projection,
+                consistent=consistent,
+            )
+        )
+
+    def _get_item(self, pk: str, sk: str) -> dict[str, Any] | None:
+        cache = _read_scope.get()
+        if cache is not None and (pk, sk) in cache:
+            return cache[(pk, sk)]
+        resp = self.client.get_item(TableName=self.table_name, Key=_key(pk, sk))
+        item = _deserialize(resp["Item"]) if "Item" in resp else None
+        if cache is not None:
+            cache[(pk, sk)] = item
+        return item
+
+    def _batch_get(
+        self, keys: list[tuple[str, str]], *, consistent: bool = False
+    ) -> dict[tuple[str, str], dict[str, Any] | None]:
+        """BatchGetItem で複数キーを1往復で読む。結果は読み取りスコープにも載せる。
+
+        `consistent=True`（書き込み前の読み取り）なら強い整合性で読み、スコープ内の値は使わない。
+        """
+
+        cache = _read_scope.get()
+        found: dict[tuple[str, str], dict[str, Any] | None] = {}
+        pending = [k for k in dict.fromkeys(keys) if consistent or cache is None or k not in cache]
+        # BatchGetItem は1回100キーまで。
+        for start in range(0, len(pending), 100):
+            chunk = pending[start : start + 100]
+            table_request: dict[str, Any] = {"Keys": [_key(pk, sk) for pk, sk in chunk]}
+            if consistent:
+                table_request["ConsistentRead"] = True
+            request: dict[str, Any] = {self.table_name: table_request}
+            for attempt in range(_BATCH_ATTEMPTS):
+                if attempt:
+                    _backoff(attempt - 1)
+                resp = self.client.batch_get_item(RequestItems=request)
+                for raw in resp.get("Responses", {}).get(self.table_name, []):
+                    item = _deserialize(raw)
+                    found[(item["pk"], item["sk"])] = item
+                request = resp.get("UnprocessedKeys") or {}
+                if not request:
+                    break
+            else:
+                raise ThrottledError("batch_get_item left unprocessed keys")
+
+        result: dict[tuple[str, str], dict[str, Any] | None] = {}
+        for k in keys:
+            if not consistent and cache is not None and k in cache:
+                result[k] = cache[k]
+                continue
+            result[k] = found.get(k)
+            if cache is not None:
+                cache[k] = result[k]
+        return result
 
-    @property
-    def _table(self):
-        ddb = boto3.resource("dynamodb")
-        return ddb.Table(self.table_name)
+    def _batch_write(self, items: list[dict[str, Any]]) -> None:
+        """BatchWriteItem を25件ずつに分けて書き込み、未処理分は間隔を空けて再送する。"""
 
-    def create_event(self, title: str, entry_names: list[str]) -> Event:
+        self._batch_write_requests([{"PutRequest": {"Item": _serialize(it)}} for it in items])
+
+    def _batch_delete(self, keys: list[tuple[str, str]]) -> None:
+        self._batch_write_requests([{"DeleteRequest": {"Key": _key(pk, sk)}} for pk, sk in keys])
+
+    def _batch_write_requests(self, requests: list[dict[str, Any]]) -> None:
+        for start in range(0, len(requests), 25):
+            request: dict[str, Any] = {self.table_name: requests[start : start + 25]}
+            for attempt in range(_BATCH_ATTEMPTS):
+                if attempt:
+                    _backoff(attempt - 1)
+                resp = self.client.batch_write_item(RequestItems=request)
+                request = resp.get("UnprocessedItems") or {}
+                if not request:
+                    break
+            else:
+                raise ThrottledError("batch_write_item left unprocessed items")
+
+    @staticmethod
+    def _to_event(event_id: str, item: dict[str, Any]) -> Event:
+        return Event(
+            id=event_id,
+            title=item["title"],
+            entries=[Entry(**e) for e in item.get("entries", [])],
+            created_at=datetime.fromisoformat(item["created_at"]),
+            aggregation=item.get("aggregation", "sum"),
+        )
+
+    @staticmethod
+    def _to_participant(participant_id: str, item: dict[str, Any]) -> Participant:
+        return Participant(
+            id=participant_id, name=item["name"], participant_key=item["participant_key"]
+        )
+
+    def create_event(
+        self, title: str, entry_names: list[str], aggregation: AggregationMode = "sum"
+    ) -> Event:
         event_id = new_id("evt")
         entries = [
             Entry(id=new_id("ent"), name=name.strip()) for name in entry_names if name.strip()
         ]
         if not entries:
             raise ValueError("entry_names must contain at least one non-blank item")
-        event = Event(id=event_id, title=title.strip(), entries=entries, created_at=_now())
-
-        self._table.put_item(
-            Item={
-                "pk": f"EVENT#{event_id}",
-                "sk": "META",
-                "title": event.title,
-                "created_at": event.created_at.isoformat(),
-                "entries": [e.model_dump() for e in entries],
-            }
+        event = Event(
+            id=event_id,
+            title=title.strip(),
+            entries=entries,
+            created_at=_now(),
+            aggregation=aggregation,
         )
+
+        self.client.put_item(
+            TableName=self.table_name,
+            Item=_serialize(
+                {
+                    "pk": f"EVENT#{event_id}",
+                    "sk": "META",
+                    "title": event.title,
+                    "created_at": event.created_at.isoformat(),
+                    "entries": [e.model_dump() for e in entries],
+                    "aggregation": aggregation,
+                    "version": 1,
+                }
+            ),
+        )
+        totals: dict[str, float] = {e.id: 0 for e in entries}
+        if aggregation != "sum":
+            totals[_STATS_MARKER] = 1
+        self._put_totals(event_id, totals)
+        self._remember_entry_ids(event_id, frozenset(e.id for e in entries), aggregation)
         return event
 
+    def _remember_entry_ids(
+        self, event_id: str, entry_ids: frozenset[str], aggregation: AggregationMode
+    ) -> None:
+        with self._entry_ids_lock:
+            self._entry_ids[event_id] = (entry_ids, aggregation)
+            self._entry_ids.move_to_end(event_id)
+            while len(self._entry_ids) > _ENTRY_IDS_CACHE_SIZE:
+                self._entry_ids.popitem(last=False)
+
+    def _event_entry_ids(self, event_id: str) -> tuple[frozenset[str], AggregationMode]:
+        """イベントの採点対象 ID の集合と集計方法。一度 META を読んだイベントは読み直さない。
+
+        Raises:
+            KeyError: イベントが無い。
+        """
+
+        with self._entry_ids_lock:
+            cached = self._entry_ids.get(event_id)
+        if cached is not None:
+            return cached
+        meta = self._get_item(f"EVENT#{event_id}", "META")
+        if meta is None:
+            raise KeyError("event not found")
+        entry_ids = frozenset(e["id"] for e in meta.get("entries", []))
+        aggregation: AggregationMode = meta.get("aggregation", "sum")
+        self._remember_entry_ids(event_id, entry_ids, aggregation)
+        return entry_ids, aggregation
+
     def get_event(self, event_id: str) -> Event | None:
-        resp = self._table.get_item(Key={"pk": f"EVENT#{event_id}", "sk": "META"})
-        item = resp.get("Item")
+        item = self._get_item(f"EVENT#{event_id}", "META")
         if not item:
             return None
-        return Event(
-            id=event_id,
-            title=item["title"],
-            entries=[Entry(**e) for e in item.get("entries", [])],
-            created_at=datetime.fromisoformat(item["created_at"]),
+        return self._to_event(event_id, item)
+
+    def get_event_with_participant(
+        self, event_id: str, participant_id: str
+    ) -> tuple[Event | None, Participant | None]:
+        pk = f"EVENT#{event_id}"
+        meta_key, participant_key = (pk, "META"), (pk, f"PARTICIPANT#{participant_id}")
+        items = self._batch_get([meta_key, participant_key])
+        meta, participant = items[meta_key], items[participant_key]
+        return (
+            self._to_event(event_id, meta) if meta else None,
+            self._to_participant(participant_id, participant) if participant else None,
         )
 
-    def join_event(self, event_id: str, participant_name: str) -> Participant:
-        normalized_name = participant_name.strip()
+    def _new_participant(self, event_id: str, name: str) -> Participant:
+        participant_id = new_id("p")
+        key = new_participant_key(self.participant_keys, event_id, participant_id)
+        return Participant(id=participant_id, name=name, participant_key=key)
 
-        # Enforce unique participant name within the same event.
-        # MVP implementation: query existing participants for the event.
-        if any(p.name == normalized_name for p in self.list_participants(event_id)):
-            raise ValueError("participant name already exists")
+    def _join_actions(self, event_id: str, participant: Participant) -> list[dict[str, Any]]:
+        """参加者名の予約（NAME#）と参加者アイテムを、どちらも未作成を条件に書く操作。"""
 
-        participant = Participant(
-            id=new_id("p"),
-            name=normalized_name,
-            participant_key=new_id("k"),
-        )
-        self._table.put_item(
-            Item={
-                "pk": f"EVENT#{event_id}",
+        pk = f"EVENT#{event_id}"
+        items = [
+            {"pk": pk, "sk": f"NAME#{participant.name}", "participant_id": participant.id},
+            {
+                "pk": pk,
                 "sk": f"PARTICIPANT#{participant.id}",
                 "name": participant.name,
                 "participant_key": participant.participant_key,
+            },
+        ]
+        return [
+            {
+                "Put": {
+                    "TableName": self.table_name,
+                    "Item": _serialize(item),
+                    "ConditionExpression": "attribute_not_exists(sk)",
+                }
             }
-        )
+            for item in items
+        ]
+
+    def _transact_join(self, event_id: str, participants: list[Participant]) -> set[int]:
+        """参加者をまとめて1つのトランザクションで書く（最後に META の版数を上げる）。
+
+        名前が予約済みの参加者は除いて書き直し、その位置（participants の添字）を返す。
+        並行する書き込みと衝突したら（TransactionConflict）間隔を空けてやり直す。
+
+        Raises:
+            KeyError: イベントが無い。
+            WriteConflictError: 衝突が続き、やり直しを使い切った。
+        """
+
+        version_update = {
+            **self._version_update(event_id),
+            "ConditionExpression": "attribute_exists(sk)",
+        }
+        taken: set[int] = set()
+        attempts = 0
+        while True:
+            pending = [i for i in range(len(participants)) if i not in taken]
+            if not pending:
+                return taken
+            actions = [a for i in pending for a in self._join_actions(event_id, participants[i])]
+            try:
+                self.client.transact_write_items(
+                    TransactItems=[*actions, {"Update": version_update}]
+                )
+                return taken
+            except self.client.exceptions.TransactionCanceledException as e:
+                codes = [r.get("Code") for r in e.response.get("CancellationReasons", [])]
+                if codes and codes[-1] == "ConditionalCheckFailed":
+                    raise KeyError("event not found") from e
+                # 操作は参加者ごとに (NAME#, PARTICIPANT#) の順に並んでいる。
+                conflicts = {
+                    pending[n // 2]
+                    for n, code in enumerate(codes[:-1])
+                    if code == "ConditionalCheckFailed"
+                }
+                if not conflicts:
+                    if "TransactionConflict" not in codes:
+                        raise
+                    attempts += 1
+                    if attempts >= _SCORE_WRITE_ATTEMPTS:
+                        raise WriteConflictError(
+                            "join conflicted with concurrent writes too many times"
+                        ) from e
+                    _backoff(attempts - 1)
+                taken |= conflicts
+
+    def join_event(self, event_id: str, participant_name: str) -> Participant:
+        # 参加者名の一意性は NAME# の予約アイテムの条件付き書き込みで保証する（読み取りなし）。
+        participant = self._new_participant(event_id, participant_name.strip())
+        if self._transact_join(event_id, [participant]):
+            raise ValueError("participant name already exists")
         return participant
 
+    def join_event_bulk(
+        self, event_id: str, participant_names: list[str]
+    ) -> list[Participant | None]:
+        joined: list[Participant | None] = []
+        names: set[str] = set()
+        for name in participant_names:
+            normalized_name = name.strip()
+            if normalized_name in names:
+                joined.append(None)
+                continue
+            names.add(normalized_name)
+            joined.append(self._new_participant(event_id, normalized_name))
+
+        # 1トランザクションは100アイテムまで（参加者1人あたり2件と META の分）。
+        chunk_size = (_TRANSACT_MAX_ITEMS - 1) // 2
+        positions = [i for i, p in enumerate(joined) if p is not None]
+        for start in range(0, len(positions), chunk_size):
+            chunk = positions[start : start + chunk_size]
+            participants = [p for i in chunk if (p := joined[i]) is not None]
+            for taken in self._transact_join(event_id, participants):
+                joined[chunk[taken]] = None
+        return joined
+
+    def reserve_participant_names(self, event_id: str) -> int:
+        """NAME# の予約アイテムが無い既存の参加者の名前を予約し、予約した件数を返す。
+
+        予約アイテムの導入前に参加した参加者と同じ名前で参加できないようにする。
+        書き込みが止まっている間に実行すること。
+        """
+
+        pk = f"EVENT#{event_id}"
+        reserved = {
+            it["sk"][len("NAME#") :]
+            for it in self._query(
+                "pk = :pk AND begins_with(sk, :prefix)",
+                {":pk": pk, ":prefix": "NAME#"},
+                projection="sk",
+            )
+        }
+        items = [
+            {"pk": pk, "sk": f"NAME#{p.name}", "participant_id": p.id}
+            for p in self.list_participants(event_id)
+            if p.name not in reserved
+        ]
+        self._batch_write(items)
+        return len(items)
+
     def get_participant(self, event_id: str, participant_id: str) -> Participant | None:
-        resp = self._table.get_item(
-            Key={"pk": f"EVENT#{event_id}", "sk": f"PARTICIPANT#{participant_id}"}
-        )
-        item = resp.get("Item")
+        item = self._get_item(f"EVENT#{event_id}", f"PARTICIPANT#{participant_id}")
         if not item:
             return None
-        return Participant(
-            id=participant_id, name=item["name"], participant_key=item["participant_key"]
-        )
+        return self._to_participant(participant_id, item)
 
     def list_participants(self, event_id: str) -> list[Participant]:
-        resp = self._table.query(
-            KeyConditionExpression=Key("pk").eq(f"EVENT#{event_id}")
-            & Key("sk").begins_with("PARTICIPANT#")
+        items = self._query(
+            "pk = :pk AND begins_with(sk, :prefix)",
+            {":pk": f"EVENT#{event_id}", ":prefix": "PARTICIPANT#"},
+            projection="sk, #n, participant_key",
+            names={"#n": "name"},
         )
-        items = resp.get("Items", [])
         participants: list[Participant] = []
         for it in items:
             pid = it["sk"].split("#", 1)[1]
-            participants.append(
-                Participant(id=pid, name=it["name"], participant_key=it["participant_key"])
-            )
+            participants.append(self._to_participant(pid, it))
         return participants
 
     def put_scores(
         self, event_id: str, participant_id: str, participant_key: str, scores: list[ScoreItem]
     ) -> None:
-        participant = self.get_participant(event_id, participant_id)
-        if participant is None:
-            raise KeyError("participant not found")
-        if participant.participant_key != participant_key:
-            raise PermissionError("invalid participant key")
+        # 署名付きキーを検証できれば参加者は読まない（キーは参加時にこの参加者へ発行したもの）。
+        if not verified(self.participant_keys, event_id, participant_id, participant_key):
+            participant = self.get_participant(event_id, participant_id)
+            if participant is None:
+                raise KeyError("participant not found")
+            if participant.participant_key != participant_key:
+                raise PermissionError("invalid participant key")
 
-        with self._table.batch_writer() as batch:
-            for item in scores:
-                batch.put_item(
-                    Item={
-                        "pk": f"EVENT#{event_id}",
-                        "sk": f"SCORE#{participant_id}#{item.entry_id}",
-                        "score": int(item.score),
+        # イベントに無い採点対象は無視する（属性名として TOTALS に書かない）。同じ entry_id が
+        # 複数あれば後勝ち。
+        entry_ids, aggregation = self._event_entry_ids(event_id)
+        latest = {item.entry_id: int(item.score) for item in scores if item.entry_id in entry_ids}
+        write = self._write_ballot if self.score_layout == "ballot" else self._write_scores
+        for attempt in range(_SCORE_WRITE_ATTEMPTS):
+            if attempt:
+                _backoff(attempt - 1)
+            try:
+                write(event_id, participant_id, latest, entry_ids, aggregation)
+                return
+            except self.client.exceptions.TransactionCanceledException as e:
+                # 並行する書き込みで旧スコアが変わっていたら、読み直して差分を取り直す。
+                if not _is_condition_conflict(e):
+                    raise
+        raise WriteConflictError("put_scores conflicted with concurrent writes too many times")
+
+    def _write_scores(
+        self,
+        event_id: str,
+        participant_id: str,
+        latest: dict[str, int],
+        entry_ids: frozenset[str],
+        aggregation: AggregationMode,
+    ) -> None:
+        """変化したセルと TOTALS の差分（ADD）を1つのトランザクションで書く。
+
+        各セルは「読んだときの旧スコアのまま」を条件にするので、並行書き込みがあれば
+        トランザクション全体が取り消され、合計がずれることはない。z スコアの差分は参加者の
+        採点全体から求めるため、同じ参加者の別のセルへの並行書き込みとはずれ得る
+        （ballot の持ち方なら rev の条件で防げる。ずれたら rebuild_totals で直す）。
+        """
+
+        pk = f"EVENT#{event_id}"
+        prefix = f"SCORE#{participant_id}#"
+        current = self._query_participant_scores(event_id, participant_id, consistent=True)
+        changed = [
+            (entry_id, current.get(entry_id), score)
+            for entry_id, score in latest.items()
+            if current.get(entry_id) != score
+        ]
+        if not changed:
+            return
+
+        # 1トランザクションは100アイテムまで（TOTALS と META の分を残して分割する）。
+        size = _TRANSACT_MAX_ITEMS - 2 if aggregation == "sum" else _STATS_TRANSACT_CELLS
+        row = {eid: s for eid, s in current.items() if eid in entry_ids}
+        for start in range(0, len(changed), size):
+            chunk = changed[start : start + size]
+            actions: list[dict[str, Any]] = []
+            for entry_id, old, new in chunk:
+                put: dict[str, Any] = {
+                    "TableName": self.table_name,
+                    "Item": _serialize({"pk": pk, "sk": f"{prefix}{entry_id}", "score": new}),
+                }
+                if old is None:
+                    put["ConditionExpression"] = "attribute_not_exists(sk)"
+                else:
+                    put["ConditionExpression"] = "score = :old"
+                    put["ExpressionAttributeValues"] = {":old": {"N": str(old)}}
+                actions.append({"Put": put})
+
+            deltas: dict[str, float] = {
+                eid: new - (old or 0) for eid, old, new in chunk if new != (old or 0)
+            }
+            after = {**row, **{eid: new for eid, _old, new in chunk}}
+            deltas.update(_stat_attributes(*stat_deltas(aggregation, row, after)))
+            row = after
+            if deltas:
+                actions.append({"Update": self._totals_update(event_id, deltas)})
+            actions.append({"Update": self._version_update(event_id)})
+            self.client.transact_write_items(TransactItems=actions)
+
+    def _totals_update(self, event_id: str, deltas: dict[str, float]) -> dict[str, Any]:
+        return {
+            "TableName": self.table_name,
+            "Key": _key(f"EVENT#{event_id}", "TOTALS"),
+            "UpdateExpression": "ADD " + ", ".join(f"#t{i} :d{i}" for i in range(len(deltas))),
+            "ExpressionAttributeNames": {f"#t{i}": eid for i, eid in enumerate(deltas)},
+            "ExpressionAttributeValues": {
+                f":d{i}": {"N": str(d)} for i, d in enumerate(deltas.values())
+            },
+        }
+
+    def _get_ballot(
+        self, event_id: str, participant_id: str, *, consistent: bool | None = None
+    ) -> tuple[dict[str, int], int | None]:
+        """参加者の採点アイテム（ballot）を読み、(採点, rev) を返す。無ければ rev は None。"""
+
+        resp = self.client.get_item(
+            TableName=self.table_name,
+            Key=_key(f"EVENT#{event_id}", f"BALLOT#{participant_id}"),
+            ProjectionExpression="scores, rev",
+            ConsistentRead=self.consistent_read if consistent is None else consistent,
+        )
+        if "Item" not in resp:
+            return {}, None
+        item = _deserialize(resp["Item"])
+        return {eid: int(s) for eid, s in item.get("scores", {}).items()}, int(item["rev"])
+
+    def _write_ballot(
+        self,
+        event_id: str,
+        participant_id: str,
+        latest: dict[str, int],
+        entry_ids: frozenset[str],
+        aggregation: AggregationMode,
+    ) -> None:
+        """参加者の採点アイテムを「読んだときの rev のまま」を条件に1件で書き、TOTALS に差分を足す。
+
+        並行書き込みで rev が変わっていればトランザクション全体が取り消される（呼び出し元で
+        読み直してやり直す）。
+        """
+
+        current, rev = self._get_ballot(event_id, participant_id, consistent=True)
+        merged = {**current, **latest}
+        if merged == current and rev is not None:
+            return
+
+        put: dict[str, Any] = {
+            "TableName": self.table_name,
+            "Item": _serialize(
+                {
+                    "pk": f"EVENT#{event_id}",
+                    "sk": f"BALLOT#{participant_id}",
+                    "scores": merged,
+                    "rev": (rev or 0) + 1,
+                }
+            ),
+        }
+        if rev is None:
+            put["ConditionExpression"] = "attribute_not_exists(sk)"
+        else:
+            put["ConditionExpression"] = "rev = :rev"
+            put["ExpressionAttributeValues"] = {":rev": {"N": str(rev)}}
+        actions: list[dict[str, Any]] = [{"Put": put}]
+
+        deltas: dict[str, float] = {
+            eid: score - current.get(eid, 0)
+            for eid, score in latest.items()
+            if score != current.get(eid, 0)
+        }
+        before = {eid: s for eid, s in current.items() if eid in entry_ids}
+        deltas.update(_stat_attributes(*stat_deltas(aggregation, before, {**before, **latest})))
+        if deltas:
+            actions.append({"Update": self._totals_update(event_id, deltas)})
+        actions.append({"Update": self._version_update(event_id)})
+        self.client.transact_write_items(TransactItems=actions)
+
+    def put_scores_bulk(self, event_id: str, rows: list[BulkScoreRow]) -> list[str | None]:
+        """採点をまとめて BatchWriteItem で書き、TOTALS には差分の合計を1回で加算する。
+
+        取り込み（紙の採点表の入力や記録の再生）向け。セル単位の条件付き書き込みは行わないため、
+        同じ参加者への通常の put_scores と並行させないこと。
+        """
+
+        pk = f"EVENT#{event_id}"
+        try:
+            entry_ids, aggregation = self._event_entry_ids(event_id)
+        except KeyError:
+            return ["participant not found"] * len(rows)
+        trusted = [
+            verified(self.participant_keys, event_id, row.participant_id, row.participant_key)
+            for row in rows
+        ]
+        stored = self._batch_get(
+            [(pk, f"PARTICIPANT#{row.participant_id}") for row, ok in zip(rows, trusted) if not ok]
+        )
+        errors: list[str | None] = []
+        latest: dict[str, dict[str, int]] = {}
+        for row, ok in zip(rows, trusted):
+            item = None if ok else stored[(pk, f"PARTICIPANT#{row.participant_id}")]
+            if not ok and item is None:
+                errors.append("participant not found")
+            elif item is not None and item["participant_key"] != row.participant_key:
+                errors.append("invalid participant key")
+            else:
+                errors.append(None)
+                cells = latest.setdefault(row.participant_id, {})
+                cells.update(
+                    {s.entry_id: int(s.score) for s in row.scores if s.entry_id in entry_ids}
+                )
+        if not latest:
+            return errors
+
+        # 直前のまとめ書き（CSV の前のチャンク）が見えるよう、書く参加者の分だけを強い整合性で読む。
+        ballots = self._read_participant_scores(event_id, list(latest))
+        items: list[dict[str, Any]] = []
+        deltas: dict[str, float] = {}
+        for participant_id, cells in latest.items():
+            before, rev = ballots.get(participant_id, ({}, None))
+            changed = {eid: s for eid, s in cells.items() if before.get(eid) != s}
+            if not changed:
+                continue
+            _add_into(deltas, {eid: s - before.get(eid, 0) for eid, s in changed.items()})
+            kept = {eid: s for eid, s in before.items() if eid in entry_ids}
+            _add_into(
+                deltas, _stat_attributes(*stat_deltas(aggregation, kept, {**kept, **changed}))
+            )
+            if self.score_layout == "ballot":
+                # rev を進めるので、並行する put_scores は読み直してやり直す。
+                items.append(
+                    {
+                        "pk": pk,
+                        "sk": f"BALLOT#{participant_id}",
+                        "scores": {**before, **changed},
+                        "rev": (rev or 0) + 1,
                     }
                 )
+                continue
+            items.extend(
+                {"pk": pk, "sk": f"SCORE#{participant_id}#{entry_id}", "score": score}
+                for entry_id, score in changed.items()
+            )
+        if not items:
+            return errors
+
+        self._batch_write(items)
+        nonzero = [(name, d) for name, d in deltas.items() if d]
+        # 統計の属性が多いと更新式の長さの上限を超えるので分けて足す。
+        for start in range(0, len(nonzero), _UPDATE_MAX_TERMS):
+            chunk = dict(nonzero[start : start + _UPDATE_MAX_TERMS])
+            self.client.update_item(**self._totals_update(event_id, chunk))
+        self._bump_version(event_id)
+        return errors
+
+    def _query_participant_scores(
+        self, event_id: str, participant_id: str, *, consistent: bool | None = None
+    ) -> dict[str, int]:
+        prefix = f"SCORE#{participant_id}#"
+        return {
+            it["sk"][len(prefix) :]: int(it.get("score", 0))
+            for it in self._query(
+                "pk = :pk AND begins_with(sk, :prefix)",
+                {":pk": f"EVENT#{event_id}", ":prefix": prefix},
+                projection="sk, score",
+                consistent=consistent,
+            )
+        }
+
+    def get_scores(self, event_id: str, participant_id: str) -> dict[str, int]:
+        if self.score_layout == "ballot":
+            return self._get_ballot(event_id, participant_id)[0]
+        return self._query_participant_scores(event_id, participant_id)
 
     def list_scores_by_participant(self, event_id: str) -> dict[str, dict[str, int]]:
-        resp = self._table.query(
-            KeyConditionExpression=Key("pk").eq(f"EVENT#{event_id}")
-            & Key("sk").begins_with("SCORE#")
-        )
-        items = resp.get("Items", [])
-        result: dict[str, dict[str, int]] = defaultdict(dict)
+        return {
+            participant_id: scores
+            for participant_id, (scores, _rev) in self._list_score_items(
+                event_id, self.score_layout
+            ).items()
+            if scores
+        }
+
+    def _read_participant_scores(
+        self, event_id: str, participant_ids: list[str]
+    ) -> dict[str, tuple[dict[str, int], int | None]]:
+        """指定の参加者の採点を強い整合性で読み、participant_id -> (採点, rev) を返す。
+
+        ballot の持ち方は BatchGetItem、cell の持ち方は参加者ごとの Query
+        （score_query_segments 本まで並行）で読む。
+        """
+
+        if self.score_layout == "ballot":
+            pk = f"EVENT#{event_id}"
+            keys = [(pk, f"BALLOT#{pid}") for pid in participant_ids]
+            items = self._batch_get(keys, consistent=True)
+            result: dict[str, tuple[dict[str, int], int | None]] = {}
+            for participant_id, key in zip(participant_ids, keys):
+                item = items[key]
+                if item is not None:
+                    scores = {eid: int(s) for eid, s in item.get("scores", {}).items()}
+                    result[participant_id] = (scores, int(item["rev"]))
+            return result
+
+        def _read(participant_id: str) -> tuple[str, tuple[dict[str, int], int | None]]:
+            scores = self._query_participant_scores(event_id, participant_id, consistent=True)
+            return participant_id, (scores, None)
+
+        workers = min(self.score_query_segments, len(participant_ids))
+        if workers <= 1:
+            return dict(map(_read, participant_ids))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(pool.map(_read, participant_ids))
+
+    def _list_score_items(
+        self, event_id: str, layout: ScoreLayout, *, consistent: bool | None = None
+    ) -> dict[str, tuple[dict[str, int], int | None]]:
+        """イベントの採点を指定の持ち方で読み、participant_id -> (採点, rev) を返す。
+
+        cell の持ち方には rev が無いので None になる。
+        """
+
+        prefix = _SCORE_PREFIXES[layout]
+        projection = "sk, scores, rev" if layout == "ballot" else "sk, score"
+        bounds = _score_segment_bounds(self.score_query_segments, prefix)
+        if len(bounds) == 1:
+            items: Iterable[dict[str, Any]] = self._query_score_range(
+                event_id, *bounds[0], projection, consistent=consistent
+            )
+        else:
+            # 大きなイベントは participant_id の先頭文字で範囲を分け、並行に読む。
+            with ThreadPoolExecutor(max_workers=len(bounds)) as pool:
+                pages = pool.map(
+                    lambda b: self._query_score_range(
+                        event_id, b[0], b[1], projection, consistent=consistent
+                    ),
+                    bounds,
+                )
+                items = [it for page in pages for it in page]
+
+        result: dict[str, tuple[dict[str, int], int | None]] = {}
         for it in items:
+            if layout == "ballot":
+                # sk: BALLOT#{participant_id}
+                participant_id = it["sk"][len(prefix) :]
+                scores = {eid: int(s) for eid, s in it.get("scores", {}).items()}
+                result[participant_id] = (scores, int(it["rev"]))
+                continue
             # sk: SCORE#{participant_id}#{entry_id}
             _score, participant_id, entry_id = it["sk"].split("#", 2)
-            result[participant_id][entry_id] = int(it.get("score", 0))
+            result.setdefault(participant_id, ({}, None))[0][entry_id] = int(it.get("score", 0))
+        return result
+
+    def migrate_score_layout(self, event_id: str, source: ScoreLayout) -> int:
+        """イベントの採点を `source` の持ち方からこのストアの持ち方（score_layout）に写す。
+
+        書き込みが止まっている間に実行すること。写した後で DDB_SCORE_LAYOUT を切り替え、
+        元のアイテムは `delete_score_items` で消す。TOTALS は変わらない。
+
+        Returns:
+            写した参加者数。
+        """
+
+        if source == self.score_layout:
+            raise ValueError("source layout must differ from the store's layout")
+        pk = f"EVENT#{event_id}"
+        rows = self._list_score_items(event_id, source, consistent=True)
+        existing = self._list_score_items(event_id, self.score_layout, consistent=True)
+        items: list[dict[str, Any]] = []
+        for participant_id, (scores, _rev) in rows.items():
+            if self.score_layout == "ballot":
+                rev = existing.get(participant_id, ({}, None))[1]
+                items.append(
+                    {
+                        "pk": pk,
+                        "sk": f"BALLOT#{participant_id}",
+                        "scores": scores,
+                        "rev": (rev or 0) + 1,
+                    }
+                )
+            else:
+                items.extend(
+                    {"pk": pk, "sk": f"SCORE#{participant_id}#{entry_id}", "score": score}
+                    for entry_id, score in scores.items()
+                )
+        self._batch_write(items)
+        if rows:
+            self._bump_version(event_id)
+        return len(rows)
+
+    def delete_score_items(self, event_id: str, layout: ScoreLayout) -> int:
+        """イベントの `layout` の持ち方の採点アイテムを消し、消した件数を返す。"""
+
+        if layout == self.score_layout:
+            raise ValueError("cannot delete the score items of the store's own layout")
+        pk = f"EVENT#{event_id}"
+        rows = self._list_score_items(event_id, layout)
+        if layout == "ballot":
+            keys = [(pk, f"BALLOT#{pid}") for pid in rows]
+        else:
+            keys = [
+                (pk, f"SCORE#{pid}#{eid}") for pid, (scores, _) in rows.items() for eid in scores
+            ]
+        self._batch_delete(keys)
+        return len(keys)
+
+    def get_ranked_totals(self, event: Event) -> Sequence[tuple[str, float]]:
+        resp = self.client.get_item(
+            TableName=self.table_name,
+            Key=_key(f"EVENT#{event.id}", "TOTALS"),
+            ConsistentRead=self.consistent_read,
+        )
+        if event.aggregation != "sum":
+            item = _deserialize(resp["Item"]) if "Item" in resp else {}
+            if _STATS_MARKER not in item:
+                # 統計を持つ前のイベントは採点アイテムから求める（rebuild_totals で作成できる）。
+                return aggregate_ranked(
+                    (e.id for e in event.entries),
+                    event.aggregation,
+                    self.list_scores_by_participant(event.id),
+                )
+            return self._ranked_from_totals_item(event, item)
+        if "Item" in resp:
+            stored = _deserialize(resp["Item"])
+        else:
+            # TOTALS 導入前のイベントは採点アイテムから集計する（rebuild_totals で作成できる）。
+            stored = self._aggregate_totals(event)
+        totals = RankedTotals(e.id for e in event.entries)
+        for entry in event.entries:
+            totals.apply_delta(entry.id, int(stored.get(entry.id, 0)))
+        return totals.ranked()
+
+    @staticmethod
+    def _ranked_from_totals_item(event: Event, item: dict[str, Any]) -> Sequence[tuple[str, float]]:
+        counts: list[tuple[str, int, int]] = []
+        zsums: dict[str, float] = {}
+        for name, value in item.items():
+            entry_id, sep, stat = name.rpartition("#")
+            if not sep or not entry_id:
+                continue
+            if stat == "z":
+                zsums[entry_id] = float(value)
+            else:
+                counts.append((entry_id, int(stat), int(value)))
+        return ranked_from_stats((e.id for e in event.entries), event.aggregation, counts, zsums)
+
+    def _aggregate_totals(
+        self, event: Event, rows: dict[str, dict[str, int]] | None = None
+    ) -> dict[str, int]:
+        totals = {e.id: 0 for e in event.entries}
+        if rows is None:
+            rows = self.list_scores_by_participant(event.id)
+        for score_map in rows.values():
+            for entry_id, score in score_map.items():
+                if entry_id in totals:
+                    totals[entry_id] += score
+        return totals
+
+    def _put_totals(self, event_id: str, totals: dict[str, float]) -> None:
+        # TypeSerializer は float を受け付けないので Decimal にする（z スコアの合計）。
+        values = {k: Decimal(str(v)) if isinstance(v, float) else v for k, v in totals.items()}
+        self.client.put_item(
+            TableName=self.table_name,
+            Item=_serialize({"pk": f"EVENT#{event_id}", "sk": "TOTALS", **values}),
+        )
+
+    def rebuild_totals(self, event_id: str) -> dict[str, int] | None:
+        """採点アイテムから TOTALS（合計以外の集計方法なら統計も）を計算し直して上書きする。
+
+        イベントが無ければ None。
+
+        書き込みが止まっている間に実行すること（実行中の put_scores の差分は失われ得る）。
+        """
+
+        event = self.get_event(event_id)
+        if event is None:
+            return None
+        rows = self.list_scores_by_participant(event_id)
+        totals = self._aggregate_totals(event, rows)
+        item: dict[str, float] = dict(totals)
+        if event.aggregation != "sum":
+            item[_STATS_MARKER] = 1
+            entry_ids = set(totals)
+            for row in rows.values():
+                row = {eid: s for eid, s in row.items() if eid in entry_ids}
+                _add_into(item, _stat_attributes(*stat_deltas(event.aggregation, {}, row)))
+        self._put_totals(event_id, item)
+        self._bump_version(event_id)
+        return totals
+
+    def get_event_version(self, event_id: str) -> int | None:
+        resp = self.client.get_item(
+            TableName=self.table_name,
+            Key=_key(f"EVENT#{event_id}", "META"),
+            ProjectionExpression="#v",
+            ExpressionAttributeNames={"#v": "version"},
+            ConsistentRead=True,
+        )
+        if "Item" not in resp:
+            return None
+        return int(_deserialize(resp["Item"]).get("version", 0))
+
+    def _version_update(self, event_id: str) -> dict[str, Any]:
+        return {
+            "TableName": self.table_name,
+            "Key": _key(f"EVENT#{event_id}", "META"),
+            "UpdateExpression": "ADD #v :one",
+            "ExpressionAttributeNames": {"#v": "version"},
+            "ExpressionAttributeValues": {":one": {"N": "1"}},
+        }
+
+    def _bump_version(self, event_id: str) -> None:
+        self.client.update_item(**self._version_update(event_id))
+
+    def prewarm(self) -> None:
+        """DynamoDB への接続（TLS）を先に張っておく。
+
+        Lambda の初期化フェーズで呼ぶと、最初のリクエストで接続を確立する時間が無くなる。
+        失敗しても起動は止めない（最初のリクエストで改めて接続する）。
+        """
+
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        try:
+            self.client.get_item(
+                TableName=self.table_name,
+                Key=_key("PREWARM", "PREWARM"),
+                ProjectionExpression="pk",
+            )
+        except (BotoCoreError, ClientError):
+            pass
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    aggregation TEXT NOT NULL DEFAULT 'sum'
+);
+CREATE TABLE IF NOT EXISTS entries (
+    event_id TEXT NOT NULL REFERENCES events (id),
+    position INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (event_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS participants (
+    event_id TEXT NOT NULL REFERENCES events (id),
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    participant_key TEXT NOT NULL,
+    PRIMARY KEY (event_id, id)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS participants_name ON participants (event_id, name);
+CREATE TABLE IF NOT EXISTS scores (
+    event_id TEXT NOT NULL,
+    participant_id TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (event_id, participant_id, entry_id)
+) WITHOUT ROWID;
+-- 採点対象ごとの SUM をテーブルを読まずにこのインデックスだけで計算する。
+CREATE INDEX IF NOT EXISTS scores_by_entry ON scores (event_id, entry_id, score);
+-- 合計以外の集計方法のイベントの統計（採点と同じトランザクションで差分を足す）。
+-- 採点対象ごとの点数の出現数と、z スコアの合計。
+CREATE TABLE IF NOT EXISTS score_counts (
+    event_id TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (event_id, entry_id, score)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS score_zsums (
+    event_id TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    zsum REAL NOT NULL,
+    PRIMARY KEY (event_id, entry_id)
+) WITHOUT ROWID;
+"""
+# score_counts / score_zsums を既存のイベントについて作り終えたデータベースの user_version。
+_SQLITE_STATS_VERSION = 1
+
+
+class SQLiteStore(Store):
+    """SQLite（WALモード）を使うストア。単一ノードでのセルフホスト向け。
+
+    接続はスレッドごとに1本持つ。WAL なので読み取りは書き込みを待たず、
+    同じファイルを複数の uvicorn ワーカー（プロセス）から共有できる。
+    書き込みは `BEGIN IMMEDIATE` で始め、競合時は `busy_timeout` の間待つ。
+
+    Args:
+        path: データベースファイルのパス。
+        busy_timeout_ms: 他の接続の書き込みを待つ最大時間（ミリ秒）。
+        participant_keys: 参加者キーの署名に使う鍵。署名を検証できた書き込みは参加者を読まない。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout_ms: int = 5000,
+        participant_keys: ParticipantKeys | None = None,
+    ) -> None:
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.participant_keys = participant_keys
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # 複数ワーカーが同時に起動してもよいよう、スキーマ作成も1トランザクションで行う。
+        self._conn().executescript(f"BEGIN IMMEDIATE;{_SQLITE_SCHEMA}COMMIT;")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """古いスキーマで作ったデータベースに、後から増えた列と統計を足す。"""
+
+        with self._write() as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+            if "aggregation" not in columns:
+                conn.execute(
+                    "ALTER TABLE events ADD COLUMN aggregation TEXT NOT NULL DEFAULT 'sum'"
+                )
+            if conn.execute("PRAGMA user_version").fetchone()[0] < _SQLITE_STATS_VERSION:
+                events = conn.execute("SELECT id FROM events WHERE aggregation != 'sum'")
+                for (event_id,) in events.fetchall():
+                    self._rebuild_stats(conn, event_id)
+                conn.execute(f"PRAGMA user_version = {_SQLITE_STATS_VERSION}")
+
+    @classmethod
+    def from_env(cls) -> "SQLiteStore":
+        return cls(
+            path=os.environ.get("SQLITE_PATH", "m1.sqlite3"),
+            busy_timeout_ms=int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+            participant_keys=ParticipantKeys.from_env(),
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            # トランザクションは _write で明示的に張る（autocommit モード）。
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection, event_id: str) -> None:
+        cur = conn.execute("UPDATE events SET version = version + 1 WHERE id = ?", (event_id,))
+        if cur.rowcount == 0:
+            raise KeyError("event not found")
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def create_event(
+        self, title: str, entry_names: list[str], aggregation: AggregationMode = "sum"
+    ) -> Event:
+        event_id = new_id("evt")
+        entries = [
+            Entry(id=new_id("ent"), name=name.strip()) for name in entry_names if name.strip()
+        ]
+        if not entries:
+            raise ValueError("entry_names must contain at least one non-blank item")
+        event = Event(
+            id=event_id,
+            title=title.strip(),
+            entries=entries,
+            created_at=_now(),
+            aggregation=aggregation,
+        )
+
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO events (id, title, created_at, aggregation) VALUES (?, ?, ?, ?)",
+                (event.id, event.title, event.created_at.isoformat(), aggregation),
+            )
+            conn.executemany(
+                "INSERT INTO entries (event_id, position, id, name) VALUES (?, ?, ?, ?)",
+                [(event_id, i, e.id, e.name) for i, e in enumerate(entries)],
+            )
+        return event
+
+    def get_event(self, event_id: str) -> Event | None:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT title, created_at, aggregation FROM events WHERE id = ?", (event_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        entries = [
+            Entry(id=eid, name=name)
+            for eid, name in conn.execute(
+                "SELECT id, name FROM entries WHERE event_id = ? ORDER BY position", (event_id,)
+            )
+        ]
+        return Event(
+            id=event_id,
+            title=row[0],
+            entries=entries,
+            created_at=datetime.fromisoformat(row[1]),
+            aggregation=row[2],
+        )
+
+    def get_event_with_participant(
+        self, event_id: str, participant_id: str
+    ) -> tuple[Event | None, Participant | None]:
+        return self.get_event(event_id), self.get_participant(event_id, participant_id)
+
+    def _insert_participant(
+        self, conn: sqlite3.Connection, event_id: str, name: str
+    ) -> Participant:
+        participant_id = new_id("p")
+        key = new_participant_key(self.participant_keys, event_id, participant_id)
+        participant = Participant(id=participant_id, name=name.strip(), participant_key=key)
+        conn.execute(
+            "INSERT INTO participants (event_id, id, name, participant_key) VALUES (?, ?, ?, ?)",
+            (event_id, participant.id, participant.name, participant.participant_key),
+        )
+        return participant
+
+    def join_event(self, event_id: str, participant_name: str) -> Participant:
+        try:
+            with self._write() as conn:
+                self._bump_version(conn, event_id)
+                return self._insert_participant(conn, event_id, participant_name)
+        except sqlite3.IntegrityError as e:
+            raise ValueError("participant name already exists") from e
+
+    def join_event_bulk(
+        self, event_id: str, participant_names: list[str]
+    ) -> list[Participant | None]:
+        joined: list[Participant | None] = []
+        with self._write() as conn:
+            self._bump_version(conn, event_id)
+            for name in participant_names:
+                conn.execute("SAVEPOINT join_one")
+                try:
+                    joined.append(self._insert_participant(conn, event_id, name))
+                except sqlite3.IntegrityError:
+                    conn.execute("ROLLBACK TO join_one")
+                    joined.append(None)
+                conn.execute("RELEASE join_one")
+        return joined
+
+    def get_participant(self, event_id: str, participant_id: str) -> Participant | None:
+        row = (
+            self._conn()
+            .execute(
+                "SELECT name, participant_key FROM participants WHERE event_id = ? AND id = ?",
+                (event_id, participant_id),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return Participant(id=participant_id, name=row[0], participant_key=row[1])
+
+    def list_participants(self, event_id: str) -> list[Participant]:
+        rows = self._conn().execute(
+            "SELECT id, name, participant_key FROM participants WHERE event_id = ?", (event_id,)
+        )
+        return [Participant(id=pid, name=name, participant_key=key) for pid, name, key in rows]
+
+    def _rebuild_stats(self, conn: sqlite3.Connection, event_id: str) -> None:
+        """イベントの統計を採点から作り直す。"""
+
+        conn.execute("DELETE FROM score_counts WHERE event_id = ?", (event_id,))
+        conn.execute("DELETE FROM score_zsums WHERE event_id = ?", (event_id,))
+        entry_ids, aggregation = self._event_entry_ids(conn, event_id)
+        rows: dict[str, dict[str, int]] = defaultdict(dict)
+        for participant_id, entry_id, score in conn.execute(
+            "SELECT participant_id, entry_id, score FROM scores WHERE event_id = ?", (event_id,)
+        ):
+            if entry_id in entry_ids:
+                rows[participant_id][entry_id] = score
+        for row in rows.values():
+            self._add_stats(conn, event_id, *stat_deltas(aggregation, {}, row))
+
+    @staticmethod
+    def _add_stats(
+        conn: sqlite3.Connection,
+        event_id: str,
+        counts: dict[tuple[str, int], int],
+        zsums: dict[str, float],
+    ) -> None:
+        conn.executemany(
+            "INSERT INTO score_counts (event_id, entry_id, score, count) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (event_id, entry_id, score) DO UPDATE SET count = count + excluded.count",
+            [(event_id, eid, score, c) for (eid, score), c in counts.items()],
+        )
+        conn.executemany(
+            "INSERT INTO score_zsums (event_id, entry_id, zsum) VALUES (?, ?, ?)"
+            " ON CONFLICT (event_id, entry_id) DO UPDATE SET zsum = zsum + excluded.zsum",
+            [(event_id, eid, z) for eid, z in zsums.items()],
+        )
+
+    @staticmethod
+    def _event_entry_ids(
+        conn: sqlite3.Connection, event_id: str
+    ) -> tuple[frozenset[str], AggregationMode]:
+        """イベントの採点対象 ID の集合と集計方法。
+
+        Raises:
+            KeyError: イベントが無い。
+        """
+
+        row = conn.execute("SELECT aggregation FROM events WHERE id = ?", (event_id,)).fetchone()
+        if row is None:
+            raise KeyError("event not found")
+        entry_ids = frozenset(
+            eid for (eid,) in conn.execute("SELECT id FROM entries WHERE event_id = ?", (event_id,))
+        )
+        return entry_ids, row[0]
+
+    def _update_stats(
+        self,
+        conn: sqlite3.Connection,
+        event_id: str,
+        participant_id: str,
+        scores: list[ScoreItem],
+        entry_ids: frozenset[str],
+        aggregation: AggregationMode,
+    ) -> None:
+        """合計以外の集計方法のイベントなら、書き込む前の採点と比べて統計に差分を足す。
+
+        `scores` はイベントの採点対象のものだけにしておくこと。
+        """
+
+        if aggregation == "sum":
+            return
+        before = {
+            eid: score
+            for eid, score in conn.execute(
+                "SELECT entry_id, score FROM scores WHERE event_id = ? AND participant_id = ?",
+                (event_id, participant_id),
+            )
+            if eid in entry_ids
+        }
+        after = dict(before)
+        after.update({s.entry_id: int(s.score) for s in scores})
+        self._add_stats(conn, event_id, *stat_deltas(aggregation, before, after))
+
+    @staticmethod
+    def _upsert_scores(
+        conn: sqlite3.Connection, event_id: str, participant_id: str, scores: list[ScoreItem]
+    ) -> None:
+        conn.executemany(
+            "INSERT INTO scores (event_id, participant_id, entry_id, score) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (event_id, participant_id, entry_id)"
+            " DO UPDATE SET score = excluded.score",
+            [(event_id, participant_id, item.entry_id, int(item.score)) for item in scores],
+        )
+
+    def _check_participant_key(
+        self, conn: sqlite3.Connection, event_id: str, participant_id: str, participant_key: str
+    ) -> None:
+        if verified(self.participant_keys, event_id, participant_id, participant_key):
+            return
+        row = conn.execute(
+            "SELECT participant_key FROM participants WHERE event_id = ? AND id = ?",
+            (event_id, participant_id),
+        ).fetchone()
+        if row is None:
+            raise KeyError("participant not found")
+        if row[0] != participant_key:
+            raise PermissionError("invalid participant key")
+
+    def put_scores(
+        self, event_id: str, participant_id: str, participant_key: str, scores: list[ScoreItem]
+    ) -> None:
+        with self._write() as conn:
+            self._check_participant_key(conn, event_id, participant_id, participant_key)
+            entry_ids, aggregation = self._event_entry_ids(conn, event_id)
+            # イベントに無い採点対象は書かない（InMemoryStore・DynamoDBStore と同じ）。
+            scores = [item for item in scores if item.entry_id in entry_ids]
+            self._update_stats(conn, event_id, participant_id, scores, entry_ids, aggregation)
+            self._upsert_scores(conn, event_id, participant_id, scores)
+            self._bump_version(conn, event_id)
+
+    def put_scores_bulk(self, event_id: str, rows: list[BulkScoreRow]) -> list[str | None]:
+        errors: list[str | None] = []
+        with self._write() as conn:
+            try:
+                entry_ids, aggregation = self._event_entry_ids(conn, event_id)
+            except KeyError:
+                return ["participant not found"] * len(rows)
+            for row in rows:
+                try:
+                    self._check_participant_key(
+                        conn, event_id, row.participant_id, row.participant_key
+                    )
+                except KeyError:
+                    errors.append("participant not found")
+                    continue
+                except PermissionError:
+                    errors.append("invalid participant key")
+                    continue
+                scores = [item for item in row.scores if item.entry_id in entry_ids]
+                self._update_stats(
+                    conn, event_id, row.participant_id, scores, entry_ids, aggregation
+                )
+                self._upsert_scores(conn, event_id, row.participant_id, scores)
+                errors.append(None)
+            if any(e is None for e in errors):
+                self._bump_version(conn, event_id)
+        return errors
+
+    def list_scores_by_participant(self, event_id: str) -> dict[str, dict[str, int]]:
+        result: dict[str, dict[str, int]] = defaultdict(dict)
+        for participant_id, entry_id, score in self._conn().execute(
+            "SELECT participant_id, entry_id, score FROM scores WHERE event_id = ?", (event_id,)
+        ):
+            result[participant_id][entry_id] = score
         return dict(result)
 
+    def get_scores(self, event_id: str, participant_id: str) -> dict[str, int]:
+        rows = self._conn().execute(
+            "SELECT entry_id, score FROM scores WHERE event_id = ? AND participant_id = ?",
+            (event_id, participant_id),
+        )
+        return dict(rows.fetchall())
+
+    def get_ranked_totals(self, event: Event) -> Sequence[tuple[str, float]]:
+        if event.aggregation != "sum":
+            # 採点のたびに足している統計から求める（1文で読み、出現数と z スコアの合計をそろえる）。
+            counts: list[tuple[str, int, int]] = []
+            zsums: dict[str, float] = {}
+            for entry_id, score, count, zsum in self._conn().execute(
+                "SELECT c.entry_id, c.score, c.count, z.zsum FROM score_counts AS c"
+                " LEFT JOIN score_zsums AS z USING (event_id, entry_id) WHERE c.event_id = ?",
+                (event.id,),
+            ):
+                counts.append((entry_id, score, count))
+                if zsum is not None:
+                    zsums[entry_id] = zsum
+            return ranked_from_stats(
+                (e.id for e in event.entries), event.aggregation, counts, zsums
+            )
+        # 集計は SQL 側で行い、採点セルを Python に読み込まない。
+        rows = self._conn().execute(
+            "SELECT entry_id, SUM(score) FROM scores WHERE event_id = ? GROUP BY entry_id",
+            (event.id,),
+        )
+        stored = dict(rows.fetchall())
+        totals = RankedTotals(e.id for e in event.entries)
+        for entry in event.entries:
+            totals.apply_delta(entry.id, int(stored.get(entry.id, 0)))
+        return totals.ranked()
+
+    def get_event_version(self, event_id: str) -> int | None:
+        row = (
+            self._conn().execute("SELECT version FROM events WHERE id = ?", (event_id,)).fetchone()
+        )
+        return None if row is None else int(row[0])
+
+
+_T = TypeVar("_T")
+
+
+class AsyncStoreAdapter(AsyncStore):
+    """同期の Store を AsyncStore として使うアダプタ。
+
+    `executor` を渡さない場合はイベントループ上でそのまま呼ぶ（InMemoryStore のように
+    I/O を伴わないストア向け）。渡した場合はその executor で実行し、ループを塞がない。
+    """
+
+    def __init__(self, store: Store, executor: Executor | None = None) -> None:
+        self.store = store
+        self._executor = executor
+        self._backend = type(store).__name__
+
+    async def _call(self, fn: Callable[..., _T], *args: Any) -> _T:
+        if metrics.enabled():
+            # 実行スレッド内で計測する（executor の待ち時間は含めない）。
+            return await self._run(metrics.call_store, self._backend, fn, *args)
+        return await self._run(fn, *args)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._executor is None:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        # 呼び出し元の contextvars をワーカースレッドへ引き継ぐ。
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, ctx.run, fn, *args)
+
+    async def create_event(
+        self, title: str, entry_names: list[str], aggregation: AggregationMode = "sum"
+    ) -> Event:
+        return await self._call(self.store.create_event, title, entry_names, aggregation)
+
+    async def get_event(self, event_id: str) -> Event | None:
+        return await self._call(self.store.get_event, event_id)
+
+    async def join_event(self, event_id: str, participant_name: str) -> Participant:
+        return await self._call(self.store.join_event, event_id, participant_name)
+
+    async def get_participant(self, event_id: str, participant_id: str) -> Participant | None:
+        return await self._call(self.store.get_participant, event_id, participant_id)
+
+    async def get_event_with_participant(
+        self, event_id: str, participant_id: str
+    ) -> tuple[Event | None, Participant | None]:
+        return await self._call(self.store.get_event_with_participant, event_id, participant_id)
+
+    async def list_participants(self, event_id: str) -> list[Participant]:
+        return await self._call(self.store.list_participants, event_id)
+
+    async def put_scores(
+        self, event_id: str, participant_id: str, participant_key: str, scores: list[ScoreItem]
+    ) -> None:
+        await self._call(self.store.put_scores, event_id, participant_id, participant_key, scores)
+
+    async def list_scores_by_participant(self, event_id: str) -> dict[str, dict[str, int]]:
+        return await self._call(self.store.list_scores_by_participant, event_id)
+
+    async def get_scores(self, event_id: str, participant_id: str) -> dict[str, int]:
+        return await self._call(self.store.get_scores, event_id, participant_id)
+
+    async def join_event_bulk(
+        self, event_id: str, participant_names: list[str]
+    ) -> list[Participant | None]:
+        return await self._call(self.store.join_event_bulk, event_id, participant_names)
+
+    async def put_scores_bulk(self, event_id: str, rows: list[BulkScoreRow]) -> list[str | None]:
+        return await self._call(self.store.put_scores_bulk, event_id, rows)
+
+    async def get_ranked_totals(self, event: Event) -> Sequence[tuple[str, float]]:
+        return await self._call(self.store.get_ranked_totals, event)
+
+    async def get_event_version(self, event_id: str) -> int | None:
+        return await self._call(self.store.get_event_version, event_id)
+
+    async def aclose(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if isinstance(self.store, InMemoryStore):
+            self.store.close()
+
+
+class AsyncDynamoDBStore(AsyncStoreAdapter):
+    """DynamoDBStore の非同期版。
+
+    boto3 の呼び出しは専用のスレッドプール（Starlette のスレッドプールとは別）で行う。
+    DynamoDBStore の共有クライアントの接続プールと同じ数だけワーカーを持つ。
+
+    Args:
+        store: 実際に読み書きする DynamoDBStore。
+        max_connections: 同時に DynamoDB へ発行できるリクエスト数（ワーカースレッド数）。
+    """
+
+    def __init__(self, store: DynamoDBStore, max_connections: int = 32) -> None:
+        super().__init__(
+            store,
+            ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="m1-ddb"),
+        )
+
+    @classmethod
+    def from_env(cls) -> "AsyncDynamoDBStore":
+        store = DynamoDBStore.from_env()
+        if env_flag("DDB_PREWARM", default=running_on_lambda()):
+            store.prewarm()
+        return cls(store, max_connections=int(os.environ.get("DDB_MAX_POOL_CONNECTIONS", "32")))
+
+
+class AsyncSQLiteStore(AsyncStoreAdapter):
+    """SQLiteStore の非同期版。SQLite の呼び出しは専用のスレッドプールで行う。
+
+    Args:
+        store: 実際に読み書きする SQLiteStore。
+        max_workers: ワーカースレッド数（= SQLite 接続数）。
+    """
+
+    def __init__(self, store: SQLiteStore, max_workers: int = 8) -> None:
+        super().__init__(
+            store, ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="m1-sqlite")
+        )
+
+    @classmethod
+    def from_env(cls) -> "AsyncSQLiteStore":
+        return cls(
+            SQLiteStore.from_env(),
+            max_workers=int(os.environ.get("SQLITE_MAX_WORKERS", "8")),
+        )
+
+    async def aclose(self) -> None:
+        await super().aclose()
+        assert isinstance(self.store, SQLiteStore)
+        self.store.close()
+
+
+def running_on_lambda() -> bool:
+    return bool(os.environ.get("AWS_LAMBDA_FUNCTION_NAME"))
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name, "").strip().lower()
+    if not value:
+        return default
+    return value in ("1", "true", "yes")
+
 
 def build_store() -> Store:
     kind = os.environ.get("STORE_BACKEND", "inmemory").strip().lower()
     if kind == "dynamodb":
         return DynamoDBStore.from_env()
-    return InMemoryStore.create()
+    if kind == "sqlite":
+        return SQLiteStore.from_env()
+    return InMemoryStore.from_env()
+
+
+def build_async_store() -> AsyncStore:
+    kind = os.environ.get("STORE_BACKEND", "inmemory").strip().lower()
+    if kind == "dynamodb":
+        return AsyncDynamoDBStore.from_env()
+    if kind == "sqlite":
+        return AsyncSQLiteStore.from_env()
+    store = InMemoryStore.from_env()
+    if store.score_log is None and store.spill_dir is None:
+        return AsyncStoreAdapter(store)
+    # 追記ログや追い出したイベントの書き出し・読み戻し（ファイル I/O）を伴うので、
+    # スレッドプールで呼んでイベントループを塞がない。
+    return AsyncStoreAdapter(
+        store,
+        ThreadPoolExecutor(
+            max_workers=int(os.environ.get("INMEMORY_MAX_WORKERS", "8")),
+            thread_name_prefix="m1-inmemory",
+        ),
+    )
+
+
+def unwrap_store(store: Any) -> Any:
+    """アダプタや write-behind 層（`.store` 属性）をたどって、いちばん内側のストアを返す。"""
+
+    while hasattr(store, "store"):
+        store = store.store
+    return store
 
 
 def _now() -> datetime:
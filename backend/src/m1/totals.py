@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from collections.abc import Iterable, Sequence
+
+
+class RankedTotals:
+    """採点対象ごとの合計点を、順位順に並べた状態で保持する。
+
+    並び順は `compute_overall` と同じ（合計点の降順、同点は entry_id の昇順）。
+    `put_scores` の差分（新スコア - 旧スコア）で更新し、参照時に再ソートしない。
+    """
+
+    __slots__ = ("_totals", "_order")
+
+    def __init__(self, entry_ids: Iterable[str]) -> None:
+        self._totals: dict[str, int] = {eid: 0 for eid in entry_ids}
+        # (-total, entry_id) の昇順 = 合計点降順・entry_id 昇順
+        self._order: list[tuple[int, str]] = sorted((0, eid) for eid in self._totals)
+
+    def apply_delta(self, entry_id: str, delta: int) -> None:
+        """合計点に差分を加算する。イベントに存在しない採点対象は無視する。"""
+
+        if delta == 0:
+            return
+        old = self._totals.get(entry_id)
+        if old is None:
+            return
+        del self._order[bisect_left(self._order, (-old, entry_id))]
+        new = old + delta
+        self._totals[entry_id] = new
+        insort(self._order, (-new, entry_id))
+
+    def total(self, entry_id: str) -> int:
+        return self._totals.get(entry_id, 0)
+
+    def ranked(self) -> Sequence[tuple[str, float]]:
+        """(entry_id, 合計点) を順位順で返す。"""
+
+        return [(eid, -neg_total) for neg_total, eid in self._order]
@@ -0,0 +1,265 @@
+"""採点の書き込みを参加者ごとに短い間隔でまとめる write-behind 層。
+
+スライダー操作中の画面は同じ参加者の `PUT .../scores` を1秒に何十回も送る。
+`WriteBehindStore` はそれを参加者単位で `window` 秒ためてから、セルごとに最後の値だけを
+下のストアへ1回で書く。保存済みの値との差分は下のストアが取る（他のワーカーや取り込みが
+同じセルを書き換えていることがあるので、ここでは保存済みの値を覚えない）。
+その参加者の `get_scores` には未書き込みの値を重ねて返す。
+
+イベント全体の結果（合計・版数）は書き込みまで最大 `window` 秒遅れる。書き込んだときは
+`on_flush` で通知するので、SSE の配信はそこから再計算する。保留中の値はプロセス内に
+しか無いため、応答後にプロセスが凍結される Lambda では使わないこと。
+
+書き込みに失敗した値は間隔を倍にしながら書き直し、`max_attempts` 回続けて失敗したら
+捨てる（`m1_write_behind_cells_total{stage="dropped"}` に数える）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+from . import metrics
+from .domain import AggregationMode, BulkScoreRow, Event, Participant, ScoreItem
+from .store import AsyncStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WriteBehindStats:
+    requests: int = 0
+    writes: int = 0
+    cells_received: int = 0
+    cells_written: int = 0
+    failures: int = 0
+    dropped_cells: int = 0
+
+
+class _Pending:
+    """1参加者分の状態（未書き込みの値と、書き込み中の値、続けて失敗した回数）。"""
+
+    __slots__ = ("participant_key", "cells", "inflight", "task", "lock", "failures")
+
+    def __init__(self, participant_key: str) -> None:
+        self.participant_key = participant_key
+        self.cells: dict[str, int] = {}
+        self.inflight: dict[str, int] = {}
+        self.task: asyncio.Task[None] | None = None
+        self.lock = asyncio.Lock()
+        self.failures = 0
+
+    def idle(self) -> bool:
+        return not self.cells and not self.inflight and self.task is None
+
+
+class WriteBehindStore(AsyncStore):
+    """`put_scores` を参加者単位でまとめて書く AsyncStore。
+
+    Args:
+        store: 実際に読み書きする AsyncStore。
+        window: 書き込みをまとめる間隔（秒）。
+        on_flush: 書き込んだ後に event_id を渡して呼ぶ関数。
+        max_participants: 参加者キーを覚えておく参加者数の上限。
+        max_attempts: 同じ値の書き込みを続けて失敗してよい回数。超えたらその値を捨てる。
+    """
+
+    def __init__(
+        self,
+        store: AsyncStore,
+        window: float = 0.2,
+        on_flush: Callable[[str], None] | None = None,
+        max_participants: int = 10_000,
+        max_attempts: int = 5,
+    ) -> None:
+        self.store = store
+        self.window = window
+        self.on_flush = on_flush
+        self.max_participants = max_participants
+        self.max_attempts = max(1, max_attempts)
+        self.stats = WriteBehindStats()
+        self._states: OrderedDict[tuple[str, str], _Pending] = OrderedDict()
+
+    async def _state(self, event_id: str, participant_id: str) -> _Pending:
+        key = (event_id, participant_id)
+        state = self._states.get(key)
+        if state is not None:
+            self._states.move_to_end(key)
+            return state
+
+        participant = await self.store.get_participant(event_id, participant_id)
+        if participant is None:
+            raise KeyError("participant not found")
+        # 読んでいる間に同じ参加者の書き込みが来ていれば、そちらの状態を使う。
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _Pending(participant.participant_key)
+            self._evict()
+        return state
+
+    def _evict(self) -> None:
+        excess = len(self._states) - self.max_participants
+        if excess <= 0:
+            return
+        for key in [k for k, s in self._states.items() if s.idle()][:excess]:
+            del self._states[key]
+
+    async def put_scores(
+        self, event_id: str, participant_id: str, participant_key: str, scores: list[ScoreItem]
+    ) -> None:
+        state = await self._state(event_id, participant_id)
+        if state.participant_key != participant_key:
+            raise PermissionError("invalid participant key")
+
+        self.stats.requests += 1
+        self.stats.cells_received += len(scores)
+        metrics.WRITE_BEHIND_REQUESTS.inc("received")
+        metrics.WRITE_BEHIND_CELLS.inc("received", amount=len(scores))
+        # 同じ entry_id が複数あれば後勝ち。
+        state.cells.update((item.entry_id, int(item.score)) for item in scores)
+        if state.task is None:
+            # リクエストの contextvars（読み取りスコープのキャッシュなど）は引き継がない。
+            state.task = asyncio.get_running_loop().create_task(
+                self._flush_later(event_id, participant_id, state), context=contextvars.Context()
+            )
+
+    async def _flush_later(self, event_id: str, participant_id: str, state: _Pending) -> None:
+        try:
+            while state.cells:
+                # 失敗が続いている間は間隔を倍にしていく。
+                await asyncio.sleep(self.window * 2**state.failures)
+                await self._write(event_id, participant_id, state)
+        finally:
+            state.task = None
+
+    async def _write(self, event_id: str, participant_id: str, state: _Pending) -> None:
+        async with state.lock:
+            changed, state.cells = state.cells, {}
+            if not changed:
+                return
+            state.inflight = changed
+            try:
+                await self.store.put_scores(
+                    event_id,
+                    participant_id,
+                    state.participant_key,
+                    [ScoreItem(entry_id=eid, score=score) for eid, score in changed.items()],
+                )
+            except (KeyError, PermissionError):
+                # 参加者が消えた・鍵が変わったなら書き直しても通らないので捨てる。
+                self._record_failure(event_id, participant_id)
+                self._drop(event_id, participant_id, state, changed)
+                return
+            except Exception as e:
+                self._record_failure(event_id, participant_id)
+                state.failures += 1
+                if state.failures >= self.max_attempts:
+                    self._drop(event_id, participant_id, state, changed)
+                    return
+                logger.warning(
+                    "write-behind flush failed (attempt %d/%d): event=%s participant=%s: %r",
+                    state.failures,
+                    self.max_attempts,
+                    event_id,
+                    participant_id,
+                    e,
+                )
+                # 後から届いた値を優先して、次の周期で書き直す。
+                state.cells = {**changed, **state.cells}
+                return
+            finally:
+                state.inflight = {}
+
+            state.failures = 0
+            self.stats.writes += 1
+            self.stats.cells_written += len(changed)
+            metrics.WRITE_BEHIND_REQUESTS.inc("written")
+            metrics.WRITE_BEHIND_CELLS.inc("written", amount=len(changed))
+        if self.on_flush is not None:
+            self.on_flush(event_id)
+
+    def _record_failure(self, event_id: str, participant_id: str) -> None:
+        self.stats.failures += 1
+        metrics.WRITE_BEHIND_REQUESTS.inc("failed")
+
+    def _drop(
+        self, event_id: str, participant_id: str, state: _Pending, cells: dict[str, int]
+    ) -> None:
+        state.failures = 0
+        self.stats.dropped_cells += len(cells)
+        metrics.WRITE_BEHIND_CELLS.inc("dropped", amount=len(cells))
+        logger.exception(
+            "write-behind dropped %d cells: event=%s participant=%s",
+            len(cells),
+            event_id,
+            participant_id,
+        )
+
+    async def flush(self, event_id: str | None = None) -> None:
+        """保留中の採点をすぐに書き込む。event_id を省略すると全イベント分。"""
+
+        for (eid, pid), state in list(self._states.items()):
+            if event_id is None or eid == event_id:
+                await self._write(eid, pid, state)
+
+    async def get_scores(self, event_id: str, participant_id: str) -> dict[str, int]:
+        scores = await self.store.get_scores(event_id, participant_id)
+        state = self._states.get((event_id, participant_id))
+        if state is None:
+            return scores
+        return {**scores, **state.inflight, **state.cells}
+
+    async def put_scores_bulk(self, event_id: str, rows: list[BulkScoreRow]) -> list[str | None]:
+        # 取り込みより前の書き込みが後から上書きしないよう、先に書き出しておく。
+        await self.flush(event_id)
+        return await self.store.put_scores_bulk(event_id, rows)
+
+    async def create_event(
+        self, title: str, entry_names: list[str], aggregation: AggregationMode = "sum"
+    ) -> Event:
+        return await self.store.create_event(title, entry_names, aggregation)
+
+    async def get_event(self, event_id: str) -> Event | None:
+        return await self.store.get_event(event_id)
+
+    async def join_event(self, event_id: str, participant_name: str) -> Participant:
+        return await self.store.join_event(event_id, participant_name)
+
+    async def get_participant(self, event_id: str, participant_id: str) -> Participant | None:
+        return await self.store.get_participant(event_id, participant_id)
+
+    async def get_event_with_participant(
+        self, event_id: str, participant_id: str
+    ) -> tuple[Event | None, Participant | None]:
+        return await self.store.get_event_with_participant(event_id, participant_id)
+
+    async def list_participants(self, event_id: str) -> list[Participant]:
+        return await self.store.list_participants(event_id)
+
+    async def list_scores_by_participant(self, event_id: str) -> dict[str, dict[str, int]]:
+        return await self.store.list_scores_by_participant(event_id)
+
+    async def join_event_bulk(
+        self, event_id: str, participant_names: list[str]
+    ) -> list[Participant | None]:
+        return await self.store.join_event_bulk(event_id, participant_names)
+
+    async def get_ranked_totals(self, event: Event) -> Sequence[tuple[str, float]]:
+        return await self.store.get_ranked_totals(event)
+
+    async def get_event_version(self, event_id: str) -> int | None:
+        return await self.store.get_event_version(event_id)
+
+    async def aclose(self) -> None:
+        """保留中の採点を書き出してから、下のストアを閉じる。"""
+
+        await self.flush()
+        tasks = [s.task for s in self._states.values() if s.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.store.aclose()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+
+@pytest.fixture
+def dynamodb_table_name(monkeypatch: pytest.MonkeyPatch):
+    """moto 上に m1 用の DynamoDB テーブルを作り、そのテーブル名を返す。"""
+
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "ap-northeast-1")
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+
+    with moto.mock_aws():
+        table_name = "m1_test"
+        boto3.client("dynamodb").create_table(
+            TableName=table_name,
+            AttributeDefinitions=[
+                {"AttributeName": "pk", "AttributeType": "S"},
+                {"AttributeName": "sk", "AttributeType": "S"},
+            ],
+            KeySchema=[
+                {"AttributeName": "pk", "KeyType": "HASH"},
+                {"AttributeName": "sk", "KeyType": "RANGE"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield table_name
+
+
+@pytest.fixture
+def count_calls():
+    """DynamoDB ストアのクライアントが呼んだ操作名を順に記録するリストを返す関数。"""
+
+    def _count_calls(store: Any) -> list[str]:
+        calls: list[str] = []
+        store.client.meta.events.register(
+            "before-call.dynamodb.*", lambda model, **_kwargs: calls.append(model.name)
+        )
+        return calls
+
+    return _count_calls
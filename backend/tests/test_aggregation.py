@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import sqlite3
+import statistics
+
+import pytest
+from fastapi.testclient import TestClient
+
+from m1.aggregation import AggregateTotals
+from m1.domain import BulkScoreRow, ScoreItem
+from m1.main import create_app
+from m1.results import build_results, build_results_json
+from m1.store import AsyncStoreAdapter, DynamoDBStore, InMemoryStore, SQLiteStore
+
+MODES = ["average", "median", "trimmed_mean", "zscore"]
+
+
+def _reference(mode: str, entry_ids: list[str], rows: dict[str, dict[str, int]]) -> dict:
+    """採点の全件から素朴に計算した集計値。"""
+
+    if mode == "zscore":
+        z: dict[str, list[float]] = {eid: [] for eid in entry_ids}
+        for row in rows.values():
+            values = list(row.values())
+            std = statistics.pstdev(values) if len(values) >= 2 else 0.0
+            mean = statistics.fmean(values) if values else 0.0
+            for eid, score in row.items():
+                z[eid].append((score - mean) / std if std > 1e-6 else 0.0)
+        return {eid: statistics.fmean(v) if v else 0.0 for eid, v in z.items()}
+
+    result = {}
+    for eid in entry_ids:
+        values = sorted(row[eid] for row in rows.values() if eid in row)
+        if not values:
+            result[eid] = 0.0
+        elif mode == "average":
+            result[eid] = statistics.fmean(values)
+        elif mode == "median":
+            result[eid] = statistics.median(values)
+        else:
+            trimmed = values[1:-1] if len(values) >= 3 else values
+            result[eid] = statistics.fmean(trimmed)
+    return result
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_incremental_updates_match_full_recomputation(mode: str):
+    """差分更新の結果は、毎回全件から計算し直した値と一致する。"""
+
+    rng = random.Random(mode)
+    entry_ids = [f"e{i}" for i in range(6)]
+    totals = AggregateTotals(entry_ids, mode)  # type: ignore[arg-type]
+    rows: dict[str, dict[str, int]] = {f"p{i}": {} for i in range(8)}
+
+    for _ in range(300):
+        pid = rng.choice(list(rows))
+        old = rows[pid]
+        new = dict(old)
+        for eid in rng.sample(entry_ids, rng.randint(1, 3)):
+            new[eid] = rng.randint(0, 100)
+        totals.apply_row(old, new)
+        rows[pid] = new
+
+        expected = _reference(mode, entry_ids, rows)
+        for eid, value in totals.ranked():
+            assert value == pytest.approx(expected[eid], abs=1e-3)
+        values = [v for _eid, v in totals.ranked()]
+        assert values == sorted(values, reverse=True)
+
+
+def test_median_and_trimmed_mean_examples():
+    """中央値は偶数件なら中央2件の平均、トリム平均は最高点と最低点を1件ずつ除く。"""
+
+    rows = [{"a": 10, "b": 0}, {"a": 20, "b": 100}, {"a": 90, "b": 50}, {"a": 30}]
+    median = AggregateTotals(["a", "b"], "median")
+    trimmed = AggregateTotals(["a", "b"], "trimmed_mean")
+    for row in rows:
+        median.apply_row({}, row)
+        trimmed.apply_row({}, row)
+
+    assert dict(median.ranked()) == {"a": 25.0, "b": 50.0}
+    assert dict(trimmed.ranked()) == {"a": 25.0, "b": 50.0}
+    # 同値は entry_id 順に並ぶ。
+    assert median.ranked() == [("b", 50.0), ("a", 25.0)]
+
+
+def test_results_use_event_aggregation_with_competition_ranks():
+    """イベントの集計方法で全員合計の値と競技順位（1,1,3）を付ける。"""
+
+    store = InMemoryStore.create()
+    event = store.create_event("t", ["A", "B", "C"], aggregation="average")
+    a, b, c = (e.id for e in event.entries)
+    for name, scores in (("p1", {a: 80, b: 80, c: 10}), ("p2", {a: 60, b: 60})):
+        p = store.join_event(event.id, name)
+        items = [ScoreItem(entry_id=eid, score=s) for eid, s in scores.items()]
+        store.put_scores(event.id, p.id, p.participant_key, items)
+
+    async_store = AsyncStoreAdapter(store)
+    results = asyncio.run(build_results(async_store, event))
+    assert [(r.entry_id, r.total_score, r.rank) for r in results.overall] == sorted(
+        [(a, 70.0, 1), (b, 70.0, 1)]
+    ) + [(c, 10.0, 3)]
+
+    # 直接エンコードする高速経路も同じ JSON を返す。
+    body = asyncio.run(build_results_json(async_store, event))
+    assert json.loads(body) == json.loads(results.model_dump_json())
+
+    # 採点行列から作り直しても（退避ファイルからの読み戻し）同じ値になる。
+    ranked = store.get_ranked_totals(event)
+    store.indexes[event.id].rebuild_totals()
+    assert store.indexes[event.id].totals.ranked() == ranked
+
+
+def test_create_event_api_accepts_aggregation():
+    """イベント作成 API で集計方法を指定でき、未知の方法は 422 になる。"""
+
+    client = TestClient(create_app())
+    resp = client.post(
+        "/api/events", json={"title": "t", "entries": ["A"], "aggregation": "median"}
+    )
+    event_id = resp.json()["event_id"]
+    assert client.get(f"/api/events/{event_id}").json()["aggregation"] == "median"
+
+    bad = client.post("/api/events", json={"title": "t", "entries": ["A"], "aggregation": "max"})
+    assert bad.status_code == 422
+
+
+def _fill(store, event):
+    rng = random.Random(0)
+    for i in range(5):
+        p = store.join_event(event.id, f"p{i}")
+        items = [ScoreItem(entry_id=e.id, score=rng.randint(0, 100)) for e in event.entries]
+        store.put_scores(event.id, p.id, p.participant_key, items)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_sqlite_store_persists_aggregation(tmp_path, mode: str):
+    """SQLiteStore は集計方法を保存し、採点から集計値を求める。"""
+
+    store = SQLiteStore(str(tmp_path / "m1.sqlite3"))
+    event = store.create_event("t", ["A", "B", "C"], aggregation=mode)  # type: ignore[arg-type]
+    _fill(store, event)
+    loaded = store.get_event(event.id)
+    assert loaded is not None and loaded.aggregation == mode
+
+    rows = store.list_scores_by_participant(event.id)
+    totals = AggregateTotals([e.id for e in event.entries], mode)  # type: ignore[arg-type]
+    for row in rows.values():
+        totals.apply_row({}, row)
+    assert store.get_ranked_totals(loaded) == totals.ranked()
+
+
+def test_dynamodb_store_persists_aggregation(dynamodb_table_name: str):
+    """DynamoDBStore は集計方法を META に保存し、採点から集計値を求める。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A", "B"], aggregation="trimmed_mean")
+    _fill(store, event)
+    loaded = store.get_event(event.id)
+    assert loaded is not None and loaded.aggregation == "trimmed_mean"
+
+    rows = store.list_scores_by_participant(event.id)
+    expected = _reference("trimmed_mean", [e.id for e in event.entries], rows)
+    assert {eid: v for eid, v in store.get_ranked_totals(loaded)} == pytest.approx(expected)
+
+
+def _rescore(store, event, rounds: int = 30) -> None:
+    """参加して採点し、点数の付け直し・まとめての採点・イベントに無い対象の採点も混ぜる。"""
+
+    rng = random.Random(1)
+    entry_ids = [e.id for e in event.entries]
+    joined = [store.join_event(event.id, f"p{i}") for i in range(4)]
+    for _ in range(rounds):
+        p = rng.choice(joined)
+        items = [
+            ScoreItem(entry_id=eid, score=rng.randint(0, 100))
+            for eid in rng.sample(entry_ids, rng.randint(1, len(entry_ids)))
+        ]
+        store.put_scores(event.id, p.id, p.participant_key, items)
+    rows = [
+        BulkScoreRow(
+            participant_id=p.id,
+            participant_key=p.participant_key,
+            scores=[
+                ScoreItem(entry_id=rng.choice(entry_ids), score=rng.randint(0, 100)),
+                ScoreItem(entry_id="ent_missing", score=rng.randint(0, 100)),
+            ],
+        )
+        for p in joined
+    ]
+    store.put_scores_bulk(event.id, rows)
+
+
+def _assert_ranked_from_stats(store, event) -> None:
+    """集計値を採点の全件を読まずに求め、全件から計算し直した値と一致する。"""
+
+    rows = store.list_scores_by_participant(event.id)
+    expected = AggregateTotals([e.id for e in event.entries], event.aggregation)
+    for row in rows.values():
+        expected.apply_row({}, row)
+
+    def _no_full_read(event_id: str) -> dict[str, dict[str, int]]:
+        raise AssertionError("get_ranked_totals read every score")
+
+    original = store.list_scores_by_participant
+    store.list_scores_by_participant = _no_full_read
+    try:
+        ranked = store.get_ranked_totals(event)
+    finally:
+        store.list_scores_by_participant = original
+    assert [eid for eid, _v in ranked] == [eid for eid, _v in expected.ranked()]
+    assert [v for _eid, v in ranked] == pytest.approx([v for _eid, v in expected.ranked()])
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_sqlite_store_keeps_running_stats(tmp_path, mode: str):
+    """SQLiteStore は統計を採点と一緒に更新し、集計値を採点の全件から計算し直さない。"""
+
+    store = SQLiteStore(str(tmp_path / "m1.sqlite3"))
+    event = store.create_event("t", ["A", "B", "C"], aggregation=mode)  # type: ignore[arg-type]
+    _rescore(store, event)
+    _assert_ranked_from_stats(store, event)
+
+
+def test_sqlite_builds_stats_for_existing_events(tmp_path):
+    """統計を持つ前のデータベースでは、開いたときに既存のイベントの統計を作る。"""
+
+    path = str(tmp_path / "m1.sqlite3")
+    store = SQLiteStore(path)
+    event = store.create_event("t", ["A", "B", "C"], aggregation="median")
+    _fill(store, event)
+    conn = store._conn()
+    conn.execute("DELETE FROM score_counts")
+    conn.execute("PRAGMA user_version = 0")
+    store.close()
+
+    _assert_ranked_from_stats(SQLiteStore(path), event)
+
+
+@pytest.mark.parametrize("layout", ["cell", "ballot"])
+@pytest.mark.parametrize("mode", MODES)
+def test_dynamodb_store_keeps_running_stats(dynamodb_table_name: str, mode: str, layout: str):
+    """DynamoDBStore は統計を TOTALS に差分で足し、集計値を採点アイテムから計算し直さない。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name, score_layout=layout)  # type: ignore[arg-type]
+    event = store.create_event("t", ["A", "B", "C"], aggregation=mode)  # type: ignore[arg-type]
+    _rescore(store, event)
+    _assert_ranked_from_stats(store, event)
+
+
+def test_dynamodb_rebuilds_stats_for_existing_events(dynamodb_table_name: str):
+    """統計を持つ前のイベントは採点アイテムから求め、rebuild_totals の後は統計を使う。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A", "B"], aggregation="zscore")
+    _fill(store, event)
+    rows = store.list_scores_by_participant(event.id)
+    store._put_totals(
+        event.id,
+        {eid: sum(r.get(eid, 0) for r in rows.values()) for eid in (e.id for e in event.entries)},
+    )
+
+    expected = _reference("zscore", [e.id for e in event.entries], rows)
+    assert dict(store.get_ranked_totals(event)) == pytest.approx(expected)
+
+    store.rebuild_totals(event.id)
+    _assert_ranked_from_stats(store, event)
+
+
+def test_sqlite_adds_aggregation_column_to_existing_database(tmp_path):
+    """集計方法の列が無い既存のデータベースには列を足し、既存イベントは合計になる。"""
+
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE events (id TEXT PRIMARY KEY, title TEXT NOT NULL,"
+        " created_at TEXT NOT NULL, version INTEGER NOT NULL DEFAULT 1)"
+    )
+    conn.execute("INSERT INTO events VALUES ('evt_1', 't', '2024-01-01T00:00:00+00:00', 1)")
+    conn.commit()
+    conn.close()
+
+    store = SQLiteStore(path)
+    loaded = store.get_event("evt_1")
+    assert loaded is not None and loaded.aggregation == "sum"
+
+
+def test_results_read_scores_once_for_non_sum_aggregation(tmp_path):
+    """合計以外の集計方法でも、結果の組み立てで採点は1回しか読まない。"""
+
+    store = SQLiteStore(str(tmp_path / "m1.sqlite3"))
+    event = store.create_event("t", ["A", "B", "C"], aggregation="median")
+    _fill(store, event)
+    reads: list[str] = []
+    original = store.list_scores_by_participant
+
+    def _counting(event_id: str) -> dict[str, dict[str, int]]:
+        reads.append(event_id)
+        return original(event_id)
+
+    store.list_scores_by_participant = _counting  # type: ignore[method-assign]
+    async_store = AsyncStoreAdapter(store)
+    body = json.loads(asyncio.run(build_results_json(async_store, event)))
+    assert reads == [event.id]
+    expected = asyncio.run(build_results(async_store, event))
+    assert body == json.loads(expected.model_dump_json())
+    assert [row["total_score"] for row in body["overall"]] == [
+        v for _eid, v in store.get_ranked_totals(event)
+    ]
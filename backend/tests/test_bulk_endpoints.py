@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from m1.main import create_app
+
+
+def _setup(client: TestClient) -> tuple[str, list[str]]:
+    event_id = client.post("/api/events", json={"title": "t", "entries": ["A", "B"]}).json()[
+        "event_id"
+    ]
+    entry_ids = [e["id"] for e in client.get(f"/api/events/{event_id}").json()["entries"]]
+    return event_id, entry_ids
+
+
+def test_bulk_join_reports_invalid_and_duplicate_names_per_row():
+    """一括参加では不正な名前・既存や同じバッチ内での重複を行ごとに返し、残りは参加させる。"""
+
+    client = TestClient(create_app())
+    event_id, _ = _setup(client)
+    client.post(f"/api/events/{event_id}/join", json={"name": "たろう"})
+
+    resp = client.post(
+        f"/api/events/{event_id}/participants/bulk",
+        json={"names": [" はなこ ", "たろう", "", "じろう", "はなこ"]},
+    )
+
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["error"] for r in results] == [
+        None,
+        "participant name already exists",
+        "invalid name",
+        None,
+        "participant name already exists",
+    ]
+    assert results[0]["name"] == "はなこ" and results[0]["participant_key"]
+    names = {
+        p["participant_name"]
+        for p in client.get(f"/api/events/{event_id}/results").json()["per_participant"]
+    }
+    assert names == {"たろう", "はなこ", "じろう"}
+
+    missing = client.post("/api/events/nope/participants/bulk", json={"names": ["a"]})
+    assert missing.status_code == 404
+
+
+def test_bulk_scores_accept_json_and_streamed_csv_with_per_row_failures():
+    """一括採点は JSON と CSV のどちらでも取り込め、不正な行だけを failures に返す。"""
+
+    client = TestClient(create_app())
+    event_id, (a, b) = _setup(client)
+    joined = client.post(
+        f"/api/events/{event_id}/participants/bulk", json={"names": ["p1", "p2"]}
+    ).json()["results"]
+    p1, p2 = ((r["participant_id"], r["participant_key"]) for r in joined)
+
+    resp = client.post(
+        f"/api/events/{event_id}/scores/bulk",
+        json={
+            "rows": [
+                {
+                    "participant_id": p1[0],
+                    "participant_key": p1[1],
+                    "scores": [{"entry_id": a, "score": 10}],
+                },
+                {
+                    "participant_id": p2[0],
+                    "participant_key": "wrong",
+                    "scores": [{"entry_id": a, "score": 90}],
+                },
+            ]
+        },
+    )
+    assert resp.json() == {
+        "accepted": 1,
+        "failures": [{"row": 1, "participant_id": p2[0], "error": "invalid participant key"}],
+    }
+
+    csv_body = "\n".join(
+        [
+            "participant_id,participant_key,entry_id,score",
+            f"{p1[0]},{p1[1]},{b},30",
+            f"{p2[0]},{p2[1]},{a},5",
+            f"{p2[0]},{p2[1]},{b},101",
+            "broken",
+            f"nobody,k,{a},1",
+            f"{p2[0]},{p2[1]},{b},7",
+        ]
+    )
+    resp = client.post(
+        f"/api/events/{event_id}/scores/bulk",
+        content=csv_body.encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+    assert resp.json() == {
+        "accepted": 3,
+        "failures": [
+            {"row": 2, "participant_id": p2[0], "error": "invalid score"},
+            {"row": 3, "participant_id": None, "error": "invalid row"},
+            {"row": 4, "participant_id": "nobody", "error": "participant not found"},
+        ],
+    }
+
+    overall = client.get(f"/api/events/{event_id}/results").json()["overall"]
+    assert {r["entry_id"]: r["total_score"] for r in overall} == {a: 15, b: 37}
+
+    bad_header = client.post(
+        f"/api/events/{event_id}/scores/bulk",
+        content=b"id,key\n",
+        headers={"Content-Type": "text/csv"},
+    )
+    assert bad_header.status_code == 400
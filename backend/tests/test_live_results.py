@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from m1.domain import ScoreItem
+from m1.live import ResultsHub
+from m1.results import build_results
+from m1.store import AsyncStoreAdapter, InMemoryStore
+
+
+def _parse(message: str) -> tuple[str, dict]:
+    event_line, data_line = message.strip().split("\n")
+    return event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))
+
+
+def test_results_hub_coalesces_writes_into_one_diff():
+    """短時間の連続書き込みは1回の差分配信にまとめ、変化した行だけを送る。"""
+
+    store = InMemoryStore.create()
+    event = store.create_event("t", ["A", "B"])
+    a, b = (e.id for e in event.entries)
+    p = store.join_event(event.id, "たろう")
+
+    async_store = AsyncStoreAdapter(store)
+
+    async def load(event_id: str):
+        loaded = await async_store.get_event(event_id)
+        return await build_results(async_store, loaded) if loaded is not None else None
+
+    hub = ResultsHub(async_store.get_event_version, load, interval=0.05)
+
+    async def scenario():
+        async with hub.subscribe(event.id) as subscription:
+            kind, snapshot = _parse(await subscription.get())
+            assert kind == "snapshot"
+            assert [r["total_score"] for r in snapshot["overall"]] == [0, 0]
+
+            for score in (10, 20, 30):
+                store.put_scores(
+                    event.id, p.id, p.participant_key, [ScoreItem(entry_id=b, score=score)]
+                )
+                hub.notify(event.id)
+
+            kind, diff = _parse(await asyncio.wait_for(subscription.get(), timeout=1))
+            assert kind == "diff"
+            assert {r["entry_id"]: (r["total_score"], r["rank"]) for r in diff["overall"]} == {
+                a: (0, 2),
+                b: (30, 1),
+            }
+            assert [r["participant_id"] for r in diff["per_participant"]] == [p.id]
+
+            try:
+                await asyncio.wait_for(subscription.get(), timeout=0.2)
+                raise AssertionError("unexpected extra message")
+            except TimeoutError:
+                pass
+        assert hub.subscriber_count(event.id) == 0
+
+    asyncio.run(scenario())
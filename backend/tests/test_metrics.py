@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from m1 import metrics
+from m1.domain import ScoreItem
+from m1.main import create_app
+from m1.store import DynamoDBStore
+
+
+@pytest.fixture
+def metrics_enabled(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    for metric in metrics.REGISTRY:
+        metric.clear()
+    yield
+    metrics.configure(False)
+    for metric in metrics.REGISTRY:
+        metric.clear()
+
+
+def test_metrics_endpoint_reports_http_store_and_ranking_timings(metrics_enabled):
+    """有効時は /metrics にリクエスト・Store メソッド・順位計算の所要時間が出る。"""
+
+    client = TestClient(create_app())
+    event_id = client.post("/api/events", json={"title": "t", "entries": ["A"]}).json()["event_id"]
+    client.get(f"/api/events/{event_id}/results")
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = resp.text
+    assert (
+        'm1_http_request_duration_seconds_count{method="GET",'
+        'route="/api/events/{event_id}/results",status="200"} 1'
+    ) in body
+    assert (
+        'm1_store_call_duration_seconds_count{backend="InMemoryStore",method="create_event"} 1'
+        in body
+    )
+    assert 'm1_compute_duration_seconds_count{function="encode_results_json"} 1' in body
+    assert event_id not in body
+
+
+def test_metrics_are_not_recorded_when_disabled(monkeypatch: pytest.MonkeyPatch):
+    """無効時は /metrics が 404 で、何も記録しない。"""
+
+    monkeypatch.setenv("METRICS_ENABLED", "false")
+    client = TestClient(create_app())
+    client.post("/api/events", json={"title": "t", "entries": ["A"]})
+
+    assert client.get("/metrics").status_code == 404
+    assert metrics.STORE_CALL_DURATION.count("InMemoryStore", "create_event") == 0
+
+
+def test_dynamodb_consumed_capacity_is_recorded_per_store_method(
+    metrics_enabled, dynamodb_table_name: str
+):
+    """DynamoDB は ReturnConsumedCapacity 付きで呼び、消費量を Store メソッド別に数える。"""
+
+    metrics.configure()
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = metrics.call_store("DynamoDBStore", store.create_event, "t", ["A"])
+    p = store.join_event(event.id, "たろう")
+    metrics.call_store(
+        "DynamoDBStore",
+        store.put_scores,
+        event.id,
+        p.id,
+        p.participant_key,
+        [ScoreItem(entry_id=event.entries[0].id, score=5)],
+    )
+
+    # moto は TransactWriteItems の消費量を返さないので、書き込みは PutItem で確かめる。
+    assert metrics.DYNAMODB_CONSUMED_CAPACITY.value("create_event", "PutItem", "write") > 0
+    assert metrics.DYNAMODB_CONSUMED_CAPACITY.value("put_scores", "GetItem", "read") > 0
+    assert "m1_dynamodb_consumed_capacity_units_total" in metrics.render()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from m1.domain import ScoreItem
+from m1.keys import ParticipantKeys
+from m1.main import create_app
+from m1.store import DynamoDBStore, InMemoryStore
+
+
+def test_signed_key_is_bound_to_event_and_participant():
+    """署名付きキーは発行したイベント・参加者でだけ通り、ランダムなキーは None になる。"""
+
+    keys = ParticipantKeys(["secret"])
+    key = keys.issue("ev_1", "p_1")
+
+    assert keys.verify("ev_1", "p_1", key) is True
+    assert keys.verify("ev_1", "p_2", key) is False
+    assert keys.verify("ev_2", "p_1", key) is False
+    assert keys.verify("ev_1", "p_1", key[:-1] + ("A" if key[-1] != "A" else "B")) is False
+    assert keys.verify("ev_1", "p_1", "k_0123456789abcdef") is None
+
+
+def test_rotation_accepts_old_secret_until_removed():
+    """鍵の入れ替え中は古い秘密鍵で発行したキーも署名で通り、外すと検証できなくなる。"""
+
+    old_key = ParticipantKeys(["old"]).issue("ev", "p")
+    rotated = ParticipantKeys(["new", "old"])
+
+    assert rotated.verify("ev", "p", old_key) is True
+    assert rotated.issue("ev", "p") != old_key
+    assert ParticipantKeys(["new"]).verify("ev", "p", old_key) is None
+
+
+def test_non_ascii_signature_is_rejected_without_error():
+    """署名に非 ASCII が混じったキーは例外にならず、検証に失敗する。"""
+
+    keys = ParticipantKeys(["secret"])
+    key_id = keys.issue("ev", "p").split(".")[1]
+    assert keys.verify("ev", "p", f"pk1.{key_id}.\xe9") is False
+
+
+def test_dynamodb_put_scores_with_signed_key_skips_participant_read(dynamodb_table_name: str):
+    """署名付きキーの書き込みは参加者を読まず、ランダムなキーはこれまでどおり読んで確認する。"""
+
+    opaque_store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = opaque_store.create_event("t", ["A"])
+    legacy = opaque_store.join_event(event.id, "じろう")
+
+    store = DynamoDBStore(table_name=dynamodb_table_name, participant_keys=ParticipantKeys(["s"]))
+    participant = store.join_event(event.id, "たろう")
+    assert participant.participant_key.startswith("pk1.")
+
+    calls: list[str] = []
+    store.client.meta.events.register(
+        "before-call.dynamodb.*", lambda model, **_kwargs: calls.append(model.name)
+    )
+    item = [ScoreItem(entry_id=event.entries[0].id, score=40)]
+    store.put_scores(event.id, participant.id, participant.participant_key, item)
+    # 初回は採点対象を確かめるため META だけを読み、以降は何も読まない。
+    assert calls.count("GetItem") == 1 and "BatchGetItem" not in calls
+    calls.clear()
+    store.put_scores(event.id, participant.id, participant.participant_key, item)
+    assert "GetItem" not in calls and "BatchGetItem" not in calls
+
+    store.put_scores(event.id, legacy.id, legacy.participant_key, item)
+    assert calls.count("GetItem") == 1
+    with pytest.raises(PermissionError):
+        store.put_scores(event.id, legacy.id, "k_wrong", item)
+
+    assert store.list_scores_by_participant(event.id) == {
+        participant.id: {event.entries[0].id: 40},
+        legacy.id: {event.entries[0].id: 40},
+    }
+
+
+def test_api_rejects_forged_signed_key_without_reads(monkeypatch: pytest.MonkeyPatch):
+    """API は署名の合わないキーを 403 にし、正しいキーと従来のキーは受け付ける。"""
+
+    monkeypatch.setenv("PARTICIPANT_KEY_SECRETS", "s1")
+    with TestClient(create_app()) as client:
+        event = client.post("/api/events", json={"title": "t", "entries": ["A"]}).json()
+        event_id = event["event_id"]
+        joined = client.post(f"/api/events/{event_id}/join", json={"name": "たろう"}).json()
+        entry_id = client.get(f"/api/events/{event_id}").json()["entries"][0]["id"]
+        url = f"/api/events/{event_id}/participants/{joined['participant_id']}/scores"
+        body = {"scores": [{"entry_id": entry_id, "score": 10}]}
+
+        forged = ParticipantKeys(["other"]).issue(event_id, joined["participant_id"])
+        assert client.put(url, json=body, headers={"X-Participant-Key": forged}).status_code == 403
+        resp = client.put(url, json=body, headers={"X-Participant-Key": joined["participant_key"]})
+        assert resp.status_code == 200
+
+
+def test_inmemory_store_accepts_keys_issued_before_signing_was_enabled():
+    """署名を有効にする前に発行したランダムなキーも引き続き使える。"""
+
+    store = InMemoryStore.create()
+    event = store.create_event("t", ["A"])
+    legacy = store.join_event(event.id, "じろう")
+    store.participant_keys = ParticipantKeys(["s"])
+    signed = store.join_event(event.id, "たろう")
+
+    item = [ScoreItem(entry_id=event.entries[0].id, score=5)]
+    store.put_scores(event.id, legacy.id, legacy.participant_key, item)
+    store.put_scores(event.id, signed.id, signed.participant_key, item)
+
+    assert ParticipantKeys(["s"]).verify(event.id, signed.id, signed.participant_key) is True
+    assert store.get_scores(event.id, legacy.id) == {event.entries[0].id: 5}
+
+
+def test_api_handles_non_ascii_and_retired_signed_keys(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+):
+    """非 ASCII の署名は 403 / 行の失敗にし、外した秘密鍵のキーは保存したキーと比べて通す。"""
+
+    monkeypatch.setenv("STORE_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "m1.sqlite3"))
+    monkeypatch.setenv("PARTICIPANT_KEY_SECRETS", "old")
+    with TestClient(create_app()) as client:
+        event_id = client.post("/api/events", json={"title": "t", "entries": ["A"]}).json()[
+            "event_id"
+        ]
+        entry_id = client.get(f"/api/events/{event_id}").json()["entries"][0]["id"]
+        joined = client.post(f"/api/events/{event_id}/join", json={"name": "たろう"}).json()
+    body = {"scores": [{"entry_id": entry_id, "score": 10}]}
+    url = f"/api/events/{event_id}/participants/{joined['participant_id']}/scores"
+    key = joined["participant_key"]
+    non_ascii = key.rsplit(".", 1)[0] + ".\xe9"
+
+    # 秘密鍵を入れ替えて "old" を外した後。
+    monkeypatch.setenv("PARTICIPANT_KEY_SECRETS", "new")
+    with TestClient(create_app()) as client:
+        assert client.put(url, json=body, headers={"X-Participant-Key": key}).status_code == 200
+        tampered = key[:-1] + ("A" if key[-1] != "A" else "B")
+        resp = client.put(url, json=body, headers={"X-Participant-Key": tampered})
+        assert resp.status_code == 403
+        resp = client.put(url, json=body, headers={"X-Participant-Key": non_ascii.encode()})
+        assert resp.status_code == 403
+
+        bulk = client.post(
+            f"/api/events/{event_id}/scores/bulk",
+            json={
+                "rows": [
+                    {
+                        "participant_id": joined["participant_id"],
+                        "participant_key": non_ascii,
+                        "scores": body["scores"],
+                    }
+                ]
+            },
+        )
+        assert bulk.status_code == 200
+        assert bulk.json()["accepted"] == 0
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from m1.domain import Entry, Event, Participant
+from m1.ranking import compute_overall, compute_per_participant
+
+pytest.importorskip("numpy")
+
+import m1.ranking_vectorized  # noqa: E402
+import m1.results  # noqa: E402
+from m1.ranking_vectorized import (  # noqa: E402
+    compute_overall_vectorized,
+    compute_per_participant_vectorized,
+)
+
+
+def _random_event(rng: random.Random, n_participants: int, n_entries: int):
+    entries = [
+        Entry(id=f"ent_{rng.randrange(16**6):06x}{i}", name=f"E{i}") for i in range(n_entries)
+    ]
+    participants = [
+        Participant(id=f"p_{i}", name=f"name{rng.randrange(1000):03d}_{i}", participant_key="k")
+        for i in range(n_participants)
+    ]
+    scores_by_participant: dict[str, dict[str, int]] = {}
+    for p in participants:
+        # 同点が多く出るよう点数の種類を絞り、一部は未入力にする。
+        scores_by_participant[p.id] = {
+            e.id: rng.choice([0, 50, 70, 70, 100]) for e in entries if rng.random() < 0.8
+        }
+    scores_by_participant["p_left"] = {entries[0].id: 30, "ent_unknown": 99}
+    return entries, participants, scores_by_participant
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_vectorized_ranking_matches_reference(seed: int):
+    """NumPy 版の参加者別・全員合計の順位は既存の関数と完全に一致する。"""
+
+    rng = random.Random(seed)
+    entries, participants, scores = _random_event(rng, rng.randint(0, 40), rng.randint(1, 50))
+
+    expected_per = compute_per_participant(entries, participants, scores)
+    actual_per = compute_per_participant_vectorized(entries, participants, scores)
+    assert actual_per == expected_per
+    assert [p.model_dump_json() for p in actual_per] == [p.model_dump_json() for p in expected_per]
+
+    expected_overall = compute_overall(entries, scores)
+    actual_overall = compute_overall_vectorized(entries, scores)
+    assert actual_overall == expected_overall
+    assert [r.model_dump_json() for r in actual_overall] == [
+        r.model_dump_json() for r in expected_overall
+    ]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_results_json_uses_vectorized_ranking_for_large_events(
+    monkeypatch: pytest.MonkeyPatch, seed: int
+):
+    """/results の JSON も大きなイベントでは NumPy 版で順位を付け、出力は純 Python 版と同じ。"""
+
+    rng = random.Random(seed)
+    entries, participants, scores = _random_event(rng, rng.randint(1, 40), rng.randint(1, 50))
+    event = Event(id="evt", title="t", entries=entries, created_at=datetime.now(timezone.utc))
+    ranked_totals = [(r.entry_id, r.total_score) for r in compute_overall(entries, scores)]
+
+    monkeypatch.setattr(m1.results, "VECTORIZE_MIN_CELLS", 10**9)
+    expected = m1.results.encode_results_json(event, participants, scores, ranked_totals)
+
+    calls: list[int] = []
+    original = m1.ranking_vectorized.rank_participant_rows_vectorized
+
+    def _spy(*args):
+        calls.append(1)
+        return original(*args)
+
+    monkeypatch.setattr(m1.ranking_vectorized, "rank_participant_rows_vectorized", _spy)
+    monkeypatch.setattr(m1.results, "VECTORIZE_MIN_CELLS", 1)
+    assert m1.results.encode_results_json(event, participants, scores, ranked_totals) == expected
+    assert calls == [1]
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from m1.domain import ScoreItem
+from m1.main import create_app
+from m1.results import build_results, build_results_json
+from m1.store import AsyncStoreAdapter, InMemoryStore
+
+
+def _setup_event(client: TestClient) -> tuple[str, str, str, str]:
+    event_id = client.post("/api/events", json={"title": "t", "entries": ["A"]}).json()["event_id"]
+    joined = client.post(f"/api/events/{event_id}/join", json={"name": "たろう"}).json()
+    entry_id = client.get(f"/api/events/{event_id}").json()["entries"][0]["id"]
+    return event_id, joined["participant_id"], joined["participant_key"], entry_id
+
+
+def test_results_returns_304_until_scores_change():
+    """結果が変わらない間は If-None-Match に 304 を返し、採点後は新しい ETag を返す。"""
+
+    client = TestClient(create_app())
+    event_id, participant_id, key, entry_id = _setup_event(client)
+
+    first = client.get(f"/api/events/{event_id}/results")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    not_modified = client.get(f"/api/events/{event_id}/results", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+    client.put(
+        f"/api/events/{event_id}/participants/{participant_id}/scores",
+        json={"scores": [{"entry_id": entry_id, "score": 42}]},
+        headers={"X-Participant-Key": key},
+    )
+    updated = client.get(f"/api/events/{event_id}/results", headers={"If-None-Match": etag})
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] != etag
+    assert updated.json()["overall"][0]["total_score"] == 42
+
+
+def test_results_returns_404_for_unknown_event():
+    """存在しないイベントの結果は 404 を返す。"""
+
+    client = TestClient(create_app())
+    assert client.get("/api/events/evt_missing/results").status_code == 404
+
+
+def test_fast_results_json_is_byte_identical_to_pydantic():
+    """高速経路の JSON は、エスケープが必要な名前を含めて Pydantic の出力と一致する。"""
+
+    store = AsyncStoreAdapter(InMemoryStore.create())
+    tricky = ['"引用"', "back\\slash", "tab\tnew\nline\x01", "絵文字🎉", "</script>"]
+
+    async def scenario():
+        event = await store.create_event('M-1 "決勝"\x7f', tricky)
+        for i, name in enumerate(tricky):
+            p = await store.join_event(event.id, name)
+            await store.put_scores(
+                event.id,
+                p.id,
+                p.participant_key,
+                [ScoreItem(entry_id=e.id, score=(i + j) % 3) for j, e in enumerate(event.entries)],
+            )
+        expected = (await build_results(store, event)).model_dump_json().encode()
+        return expected, await build_results_json(store, event)
+
+    expected, actual = asyncio.run(scenario())
+    assert actual == expected
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from m1.domain import Entry
+from m1.main import create_app
+from m1.ranking import compute_overall
+
+
+def test_compute_overall_top_k_keeps_competition_ranks():
+    """上位K件だけを取り出しても、同点を含む順位は全件計算と同じになる。"""
+
+    entries = [Entry(id=i, name=i.upper()) for i in "abcde"]
+    scores = {"p1": {"a": 5, "b": 9, "c": 9, "d": 1, "e": 7}}
+
+    full = compute_overall(entries, scores)
+    assert compute_overall(entries, scores, limit=3) == full[:3]
+    assert [(r.entry_id, r.rank) for r in full[:3]] == [("b", 1), ("c", 1), ("e", 3)]
+
+
+def test_results_slice_endpoints_match_full_results():
+    """上位K件・参加者1人分・ページ分割の結果は、結果全体の該当部分と一致する。"""
+
+    client = TestClient(create_app())
+    event_id = client.post("/api/events", json={"title": "t", "entries": ["A", "B", "C"]}).json()[
+        "event_id"
+    ]
+    entry_ids = [e["id"] for e in client.get(f"/api/events/{event_id}").json()["entries"]]
+    for i, name in enumerate(["え", "あ", "お", "い", "う"]):
+        joined = client.post(f"/api/events/{event_id}/join", json={"name": name}).json()
+        client.put(
+            f"/api/events/{event_id}/participants/{joined['participant_id']}/scores",
+            json={
+                "scores": [
+                    {"entry_id": eid, "score": (i * 7 + j * 3) % 10}
+                    for j, eid in enumerate(entry_ids)
+                ]
+            },
+            headers={"X-Participant-Key": joined["participant_key"]},
+        )
+    full = client.get(f"/api/events/{event_id}/results").json()
+
+    top = client.get(f"/api/events/{event_id}/results/overall", params={"top": 2}).json()
+    assert top == full["overall"][:2]
+
+    target = full["per_participant"][3]
+    single = client.get(
+        f"/api/events/{event_id}/results/participants/{target['participant_id']}"
+    ).json()
+    assert single == target
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = client.get(f"/api/events/{event_id}/results/per-participant", params=params).json()
+        pages.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == full["per_participant"]
+
+    bad = client.get(f"/api/events/{event_id}/results/per-participant", params={"cursor": "%%%"})
+    assert bad.status_code == 400
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from m1.main import create_app
+
+
+def test_importing_app_with_inmemory_backend_does_not_load_boto3():
+    """インメモリ構成では m1.main を import しても boto3 を読み込まない。"""
+
+    src = Path(__file__).resolve().parents[1] / "src"
+    env = {**os.environ, "PYTHONPATH": str(src), "STORE_BACKEND": "inmemory"}
+    code = "import sys, m1.main; print('boto3' in sys.modules)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True
+    )
+    assert out.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_lambda_serves_api_only(monkeypatch: pytest.MonkeyPatch):
+    """Lambda 上では既定で画面（/ と /static）を配信せず API だけを公開する。"""
+
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "m1")
+    monkeypatch.setenv("STORE_BACKEND", "inmemory")
+    app = create_app()
+
+    paths = {getattr(route, "path", None) for route in app.routes}
+    assert "/" not in paths
+    assert "/static" not in paths
+    assert TestClient(app).get("/health").status_code == 200
+
+
+def test_api_only_can_be_disabled_on_lambda(monkeypatch: pytest.MonkeyPatch):
+    """API_ONLY=false なら Lambda 上でも画面を配信する。"""
+
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "m1")
+    monkeypatch.setenv("STORE_BACKEND", "inmemory")
+    monkeypatch.setenv("API_ONLY", "false")
+
+    paths = {getattr(route, "path", None) for route in create_app().routes}
+    assert "/" in paths
+    assert "/static" in paths
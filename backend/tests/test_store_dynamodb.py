@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from m1.domain import BulkScoreRow, ScoreItem
+from m1.main import create_app
+from m1.store import DynamoDBStore, ThrottledError, WriteConflictError, read_scope
+
+
+def test_put_scores_reuses_batched_reads_within_read_scope(dynamodb_table_name: str, count_calls):
+    """読み取りスコープ内ではイベントと参加者を BatchGetItem 1回で読み、再読込しない。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A"])
+    participant = store.join_event(event.id, "たろう")
+    calls = count_calls(store)
+
+    with read_scope():
+        loaded_event, loaded_participant = store.get_event_with_participant(
+            event.id, participant.id
+        )
+        store.put_scores(
+            event.id,
+            participant.id,
+            participant.participant_key,
+            [ScoreItem(entry_id=event.entries[0].id, score=50)],
+        )
+
+    assert loaded_event == event
+    assert loaded_participant == participant
+    assert "GetItem" not in calls
+    assert calls.count("BatchGetItem") == 1
+    assert store.list_scores_by_participant(event.id) == {participant.id: {event.entries[0].id: 50}}
+
+
+def test_list_queries_follow_pagination_and_parallel_segments(dynamodb_table_name: str):
+    """ページ分割された Query を最後まで読み、並行分割しても同じ結果になる。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name, query_page_size=2)
+    event = store.create_event("t", ["A", "B"])
+    participants = [store.join_event(event.id, f"p{i}") for i in range(7)]
+    for i, p in enumerate(participants):
+        store.put_scores(
+            event.id,
+            p.id,
+            p.participant_key,
+            [ScoreItem(entry_id=e.id, score=i + j) for j, e in enumerate(event.entries)],
+        )
+
+    assert {p.id for p in store.list_participants(event.id)} == {p.id for p in participants}
+    scores = store.list_scores_by_participant(event.id)
+    assert len(scores) == 7
+    assert scores[participants[3].id] == {event.entries[0].id: 3, event.entries[1].id: 4}
+
+    segmented = DynamoDBStore(
+        table_name=dynamodb_table_name,
+        client=store.client,
+        consistent_read=False,
+        score_query_segments=4,
+        query_page_size=2,
+    )
+    assert segmented.list_scores_by_participant(event.id) == scores
+
+
+def test_put_scores_maintains_totals_item_and_rebuild_restores_it(
+    dynamodb_table_name: str, count_calls
+):
+    """採点の上書きは TOTALS に差分で反映され、rebuild_totals で採点アイテムから再計算できる。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A", "B"])
+    a, b = (e.id for e in event.entries)
+    p1 = store.join_event(event.id, "p1")
+    p2 = store.join_event(event.id, "p2")
+
+    store.put_scores(event.id, p1.id, p1.participant_key, [ScoreItem(entry_id=a, score=10)])
+    store.put_scores(event.id, p2.id, p2.participant_key, [ScoreItem(entry_id=a, score=5)])
+    store.put_scores(
+        event.id,
+        p1.id,
+        p1.participant_key,
+        [ScoreItem(entry_id=a, score=1), ScoreItem(entry_id=b, score=40)],
+    )
+
+    calls = count_calls(store)
+    assert store.get_ranked_totals(event) == [(b, 40), (a, 6)]
+    assert calls == ["GetItem"]
+
+    store.client.delete_item(
+        TableName=dynamodb_table_name, Key={"pk": {"S": f"EVENT#{event.id}"}, "sk": {"S": "TOTALS"}}
+    )
+    assert store.rebuild_totals(event.id) == {a: 6, b: 40}
+    assert store.get_ranked_totals(event) == [(b, 40), (a, 6)]
+
+
+def test_bulk_join_and_scores_use_batch_writes_and_single_totals_update(
+    dynamodb_table_name: str, count_calls
+):
+    """一括参加は名前の予約とまとめて1トランザクションで、一括採点は BatchWriteItem で書く。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A", "B"])
+    a, b = (e.id for e in event.entries)
+    store.join_event(event.id, "既存")
+
+    calls = count_calls(store)
+    joined = store.join_event_bulk(event.id, [f"p{i}" for i in range(30)] + ["既存", "p0"])
+    assert joined[30] is None and joined[31] is None
+    # 予約済みの「既存」で取り消された分を除いて、もう1回だけ書き直す。
+    assert calls == ["TransactWriteItems", "TransactWriteItems"]
+
+    participants = [p for p in joined if p is not None]
+    rows = [
+        BulkScoreRow(
+            participant_id=p.id,
+            participant_key=p.participant_key,
+            scores=[ScoreItem(entry_id=a, score=i), ScoreItem(entry_id=b, score=1)],
+        )
+        for i, p in enumerate(participants)
+    ]
+    rows.append(BulkScoreRow(participant_id=participants[0].id, participant_key="x", scores=[]))
+    calls.clear()
+    errors = store.put_scores_bulk(event.id, rows)
+
+    assert errors == [None] * 30 + ["invalid participant key"]
+    assert "TransactWriteItems" not in calls
+    assert calls.count("UpdateItem") == 2  # TOTALS と版数
+    assert store.get_ranked_totals(event) == [(a, sum(range(30))), (b, 30)]
+    assert store.rebuild_totals(event.id) == {a: sum(range(30)), b: 30}
+
+
+def test_put_scores_ignores_entries_not_in_event(dynamodb_table_name: str):
+    """イベントに無い採点対象（予約語・空文字を含む）は、署名付きキーでも無視して書かない。"""
+
+    from m1.keys import ParticipantKeys
+
+    for layout in ("cell", "ballot"):
+        store = DynamoDBStore(
+            table_name=dynamodb_table_name,
+            participant_keys=ParticipantKeys(["secret"]),
+            score_layout=layout,  # type: ignore[arg-type]
+        )
+        event = store.create_event("t", ["A"])
+        a = event.entries[0].id
+        p = store.join_event(event.id, "たろう")
+        junk = [ScoreItem(entry_id=eid, score=9) for eid in ("sk", "", "ent_unknown")]
+
+        # 別インスタンス（META を読んでいない）からも同じく無視する。
+        fresh = DynamoDBStore(
+            table_name=dynamodb_table_name,
+            client=store.client,
+            participant_keys=ParticipantKeys(["secret"]),
+            score_layout=layout,  # type: ignore[arg-type]
+        )
+        fresh.put_scores(event.id, p.id, p.participant_key, [*junk, ScoreItem(entry_id=a, score=5)])
+        errors = fresh.put_scores_bulk(
+            event.id,
+            [BulkScoreRow(participant_id=p.id, participant_key=p.participant_key, scores=junk)],
+        )
+
+        assert errors == [None]
+        assert store.get_scores(event.id, p.id) == {a: 5}
+        totals = store._get_item(f"EVENT#{event.id}", "TOTALS")
+        assert totals == {"pk": f"EVENT#{event.id}", "sk": "TOTALS", a: 5}
+        assert store.get_ranked_totals(event) == [(a, 5)]
+
+
+def test_put_scores_backs_off_and_raises_typed_error_on_repeated_conflicts(
+    monkeypatch: pytest.MonkeyPatch, dynamodb_table_name: str
+):
+    """衝突が続くと間隔を空けて再試行し、諦めたら WriteConflictError（API では 503）にする。"""
+
+    import m1.store
+
+    sleeps: list[float] = []
+    monkeypatch.setattr(m1.store.time, "sleep", sleeps.append)
+    monkeypatch.setattr(m1.store.random, "uniform", lambda _low, high: high)
+
+    def _conflict(self, *_args):
+        raise self.client.exceptions.TransactionCanceledException(
+            {
+                "Error": {"Code": "TransactionCanceledException", "Message": "conflict"},
+                "CancellationReasons": [{"Code": "TransactionConflict"}],
+            },
+            "TransactWriteItems",
+        )
+
+    monkeypatch.setattr(DynamoDBStore, "_write_scores", _conflict)
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A"])
+    p = store.join_event(event.id, "たろう")
+    with pytest.raises(WriteConflictError):
+        store.put_scores(
+            event.id, p.id, p.participant_key, [ScoreItem(entry_id=event.entries[0].id, score=1)]
+        )
+    assert sleeps == [0.01, 0.02, 0.04, 0.08]
+
+    monkeypatch.setenv("STORE_BACKEND", "dynamodb")
+    monkeypatch.setenv("DDB_TABLE_NAME", dynamodb_table_name)
+    with TestClient(create_app()) as client:
+        resp = client.put(
+            f"/api/events/{event.id}/participants/{p.id}/scores",
+            json={"scores": [{"entry_id": event.entries[0].id, "score": 1}]},
+            headers={"X-Participant-Key": p.participant_key},
+        )
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+
+
+def test_batch_retries_unprocessed_items_with_backoff_and_bounded_attempts(
+    monkeypatch: pytest.MonkeyPatch, dynamodb_table_name: str
+):
+    """未処理分は間隔を空けて送り直し、送り直しを使い切ったら ThrottledError にする。"""
+
+    import m1.store
+
+    sleeps: list[float] = []
+    monkeypatch.setattr(m1.store.time, "sleep", sleeps.append)
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A"])
+    throttled = [2]
+    batch_write, batch_get = store.client.batch_write_item, store.client.batch_get_item
+
+    def _write(RequestItems):
+        if throttled[0] > 0:
+            throttled[0] -= 1
+            return {"UnprocessedItems": RequestItems}
+        return batch_write(RequestItems=RequestItems)
+
+    def _get(RequestItems):
+        if throttled[0] > 0:
+            throttled[0] -= 1
+            return {"Responses": {}, "UnprocessedKeys": RequestItems}
+        return batch_get(RequestItems=RequestItems)
+
+    monkeypatch.setattr(store.client, "batch_write_item", _write)
+    monkeypatch.setattr(store.client, "batch_get_item", _get)
+    key = (f"EVENT#{event.id}", "NOTE#1")
+    store._batch_write([{"pk": key[0], "sk": key[1]}])
+    assert len(sleeps) == 2
+
+    throttled[0] = 2
+    assert store._batch_get([key]) == {key: {"pk": key[0], "sk": key[1]}}
+    assert len(sleeps) == 4
+
+    throttled[0] = 100
+    with pytest.raises(ThrottledError):
+        store._batch_delete([key])
+    assert len(sleeps) == 4 + 7
+
+
+@pytest.mark.parametrize("layout", ["cell", "ballot"])
+def test_bulk_scores_read_only_written_participants_consistently(
+    dynamodb_table_name: str, layout: str
+):
+    """まとめての採点は書く参加者の採点だけを強い整合性で読む（結果整合性の設定でも）。"""
+
+    store = DynamoDBStore(
+        table_name=dynamodb_table_name,
+        consistent_read=False,
+        score_layout=layout,  # type: ignore[arg-type]
+    )
+    event = store.create_event("t", ["A", "B"])
+    a, b = (e.id for e in event.entries)
+    joined = [p for p in store.join_event_bulk(event.id, [f"p{i}" for i in range(10)]) if p]
+    for p in joined:
+        store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=1)])
+
+    reads: list[tuple[str, object]] = []
+    events = store.client.meta.events
+    events.register(
+        "provide-client-params.dynamodb.Query",
+        lambda params, **_kwargs: reads.append(("Query", params["ConsistentRead"])),
+    )
+    events.register(
+        "provide-client-params.dynamodb.BatchGetItem",
+        lambda params, **_kwargs: reads.extend(
+            ("BatchGetItem", len(t["Keys"]), t.get("ConsistentRead"))
+            for t in params["RequestItems"].values()
+            # 参加者キーの確認（PARTICIPANT#）は数えない。
+            if t["Keys"][0]["sk"]["S"].startswith("BALLOT#")
+        ),
+    )
+    p = joined[0]
+    for score in (5, 7):
+        # 前のチャンクの書き込みを読み直してから差分を取る（B を書いても A は残る）。
+        store.put_scores_bulk(
+            event.id,
+            [
+                BulkScoreRow(
+                    participant_id=p.id,
+                    participant_key=p.participant_key,
+                    scores=[ScoreItem(entry_id=b if score == 5 else a, score=score)],
+                )
+            ],
+        )
+
+    if layout == "ballot":
+        assert reads == [("BatchGetItem", 1, True)] * 2
+    else:
+        assert reads == [("Query", True)] * 2
+    assert store.get_scores(event.id, p.id) == {a: 7, b: 5}
+    assert dict(store.get_ranked_totals(event)) == {a: 9 + 7, b: 5}
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import asyncio
+
+from m1.domain import ScoreItem
+from m1.results import build_results
+from m1.store import AsyncDynamoDBStore, DynamoDBStore
+
+
+def test_async_dynamodb_store_round_trip(dynamodb_table_name: str):
+    """非同期 DynamoDB ストアで作成・参加・採点・結果取得が一通りできる。"""
+
+    # moto はスレッドセーフではないので、ワーカー1本で呼び出しを1つずつ流す。
+    store = AsyncDynamoDBStore(DynamoDBStore(table_name=dynamodb_table_name), max_connections=1)
+
+    async def scenario():
+        event = await store.create_event("t", ["A", "B"])
+        a, b = (e.id for e in event.entries)
+        p1, p2 = await asyncio.gather(
+            store.join_event(event.id, "たろう"), store.join_event(event.id, "じろう")
+        )
+        await asyncio.gather(
+            store.put_scores(
+                event.id, p1.id, p1.participant_key, [ScoreItem(entry_id=a, score=10)]
+            ),
+            store.put_scores(
+                event.id, p2.id, p2.participant_key, [ScoreItem(entry_id=b, score=30)]
+            ),
+        )
+        results = await build_results(store, event)
+        version = await store.get_event_version(event.id)
+        await store.aclose()
+        return results, version
+
+    results, version = asyncio.run(scenario())
+    assert version == 5
+    assert [(r.total_score, r.rank) for r in results.overall] == [(30, 1), (10, 2)]
+    assert sorted(p.participant_name for p in results.per_participant) == ["じろう", "たろう"]
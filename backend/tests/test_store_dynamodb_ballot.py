@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import pytest
+
+from m1.domain import BulkScoreRow, ScoreItem
+from m1.store import DynamoDBStore
+
+
+def test_ballot_layout_writes_one_item_per_ballot(dynamodb_table_name: str):
+    """ballot の持ち方では50項目の採点も1回のトランザクション（採点アイテム1件）で書く。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name, score_layout="ballot")
+    event = store.create_event("t", [f"E{i}" for i in range(50)])
+    p = store.join_event(event.id, "たろう")
+    q = store.join_event(event.id, "じろう")
+
+    transactions: list[int] = []
+    store.client.meta.events.register(
+        "provide-client-params.dynamodb.TransactWriteItems",
+        lambda params, **_kwargs: transactions.append(len(params["TransactItems"])),
+    )
+    scores = [ScoreItem(entry_id=e.id, score=i) for i, e in enumerate(event.entries)]
+    store.put_scores(event.id, p.id, p.participant_key, scores)
+    store.put_scores(event.id, q.id, q.participant_key, scores[:2])
+    store.put_scores(
+        event.id, p.id, p.participant_key, [ScoreItem(entry_id=event.entries[0].id, score=100)]
+    )
+
+    # 採点アイテム + TOTALS + META（版数）
+    assert transactions == [3, 3, 3]
+    expected = {e.id: i for i, e in enumerate(event.entries)} | {event.entries[0].id: 100}
+    assert store.get_scores(event.id, p.id) == expected
+    assert store.list_scores_by_participant(event.id) == {
+        p.id: expected,
+        q.id: {event.entries[0].id: 0, event.entries[1].id: 1},
+    }
+    totals = dict(store.get_ranked_totals(event))
+    assert totals[event.entries[0].id] == 100 and totals[event.entries[1].id] == 2
+    assert store.rebuild_totals(event.id) == {e.id: totals[e.id] for e in event.entries}
+
+
+def test_ballot_write_retries_when_revision_changes(dynamodb_table_name: str):
+    """読んだ後に別の書き込みで rev が変わっていれば、読み直して差分を取り直す。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name, score_layout="ballot")
+    event = store.create_event("t", ["A", "B"])
+    a, b = (e.id for e in event.entries)
+    p = store.join_event(event.id, "たろう")
+    store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=10)])
+
+    other = DynamoDBStore(
+        table_name=dynamodb_table_name, client=store.client, score_layout="ballot"
+    )
+    original = store._get_ballot
+    interleaved = []
+
+    def _get_ballot_then_race(*args, **kwargs):
+        result = original(*args, **kwargs)
+        if not interleaved:
+            interleaved.append(True)
+            other.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=50)])
+        return result
+
+    store._get_ballot = _get_ballot_then_race  # type: ignore[method-assign]
+    store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=b, score=7)])
+
+    assert store.get_scores(event.id, p.id) == {a: 50, b: 7}
+    assert dict(store.get_ranked_totals(event)) == {a: 50, b: 7}
+
+
+def test_ballot_bulk_scores_and_aggregation(dynamodb_table_name: str):
+    """まとめての採点も参加者ごとに1アイテムで書き、合計以外の集計方法にも使える。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name, score_layout="ballot")
+    event = store.create_event("t", ["A", "B"], aggregation="median")
+    a, b = (e.id for e in event.entries)
+    joined = [store.join_event(event.id, f"p{i}") for i in range(3)]
+    errors = store.put_scores_bulk(
+        event.id,
+        [
+            BulkScoreRow(
+                participant_id=p.id,
+                participant_key=p.participant_key,
+                scores=[ScoreItem(entry_id=a, score=10 * (i + 1)), ScoreItem(entry_id=b, score=i)],
+            )
+            for i, p in enumerate(joined)
+        ]
+        + [BulkScoreRow(participant_id="p_missing", participant_key="k", scores=[])],
+    )
+    assert errors == [None, None, None, "participant not found"]
+    assert dict(store.get_ranked_totals(event)) == {a: 20.0, b: 1.0}
+
+    # 続けて通常の書き込みをしても rev の条件が合う。
+    p = joined[0]
+    store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=b, score=90)])
+    assert store.get_scores(event.id, p.id) == {a: 10, b: 90}
+
+
+def test_migrate_cell_scores_to_ballots(dynamodb_table_name: str, count_calls):
+    """セル単位の採点を参加者単位に写し、切り替え後に元のアイテムを消せる（逆向きも可）。"""
+
+    cell = DynamoDBStore(table_name=dynamodb_table_name, score_query_segments=4)
+    event = cell.create_event("t", ["A", "B", "C"])
+    for i in range(5):
+        p = cell.join_event(event.id, f"p{i}")
+        cell.put_scores(
+            event.id,
+            p.id,
+            p.participant_key,
+            [ScoreItem(entry_id=e.id, score=i * j) for j, e in enumerate(event.entries)],
+        )
+    scores = cell.list_scores_by_participant(event.id)
+    totals = cell.get_ranked_totals(event)
+
+    ballot = DynamoDBStore(
+        table_name=dynamodb_table_name, client=cell.client, score_layout="ballot"
+    )
+    assert ballot.list_scores_by_participant(event.id) == {}
+    assert ballot.migrate_score_layout(event.id, "cell") == 5
+    assert ballot.list_scores_by_participant(event.id) == scores
+    assert ballot.get_ranked_totals(event) == totals
+
+    calls = count_calls(ballot)
+    assert ballot.delete_score_items(event.id, "cell") == 15
+    assert cell.list_scores_by_participant(event.id) == {}
+    assert "BatchWriteItem" in calls
+    with pytest.raises(ValueError):
+        ballot.delete_score_items(event.id, "ballot")
+
+    assert cell.migrate_score_layout(event.id, "ballot") == 5
+    assert cell.list_scores_by_participant(event.id) == scores
+
+
+def test_from_env_rejects_unknown_layout(monkeypatch: pytest.MonkeyPatch, dynamodb_table_name):
+    """DDB_SCORE_LAYOUT で持ち方を選び、未知の値は起動時にエラーにする。"""
+
+    monkeypatch.setenv("DDB_TABLE_NAME", dynamodb_table_name)
+    monkeypatch.setenv("DDB_SCORE_LAYOUT", "ballot")
+    assert DynamoDBStore.from_env().score_layout == "ballot"
+    monkeypatch.setenv("DDB_SCORE_LAYOUT", "packed")
+    with pytest.raises(ValueError):
+        DynamoDBStore.from_env()
+
+
+def test_rebuild_totals_script_uses_configured_layout(
+    monkeypatch: pytest.MonkeyPatch, dynamodb_table_name: str
+):
+    """rebuild_totals スクリプトは DDB_SCORE_LAYOUT の持ち方で採点を読み、TOTALS を作り直す。"""
+
+    import runpy
+    import sys
+    from pathlib import Path
+
+    store = DynamoDBStore(table_name=dynamodb_table_name, score_layout="ballot")
+    event = store.create_event("t", ["A"])
+    a = event.entries[0].id
+    p = store.join_event(event.id, "たろう")
+    store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=42)])
+    store._put_totals(event.id, {a: 0})
+
+    monkeypatch.setenv("DDB_TABLE_NAME", dynamodb_table_name)
+    monkeypatch.setenv("DDB_SCORE_LAYOUT", "ballot")
+    monkeypatch.setattr(sys, "argv", ["rebuild_totals.py", event.id])
+    script = Path(__file__).resolve().parents[1] / "scripts" / "rebuild_totals.py"
+    runpy.run_path(str(script), run_name="__main__")
+
+    assert store.get_ranked_totals(event) == [(a, 42)]
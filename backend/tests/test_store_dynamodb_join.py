@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from m1.main import create_app
+from m1.store import DynamoDBStore, WriteConflictError
+
+
+def test_join_is_one_transaction_without_reads(dynamodb_table_name: str, count_calls):
+    """参加は読み取りなしのトランザクション1回。同名は ValueError、イベントが無いと KeyError。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A"])
+    version = store.get_event_version(event.id)
+    calls = count_calls(store)
+
+    participant = store.join_event(event.id, "  たろう ")
+    assert calls == ["TransactWriteItems"]
+    assert participant.name == "たろう"
+    assert store.list_participants(event.id) == [participant]
+    assert store.get_event_version(event.id) == (version or 0) + 1
+
+    with pytest.raises(ValueError):
+        store.join_event(event.id, "たろう")
+    with pytest.raises(KeyError):
+        store.join_event("evt_missing", "たろう")
+    assert store.list_participants(event.id) == [participant]
+    assert store.list_participants("evt_missing") == []
+
+
+def test_same_name_from_another_writer_is_rejected(dynamodb_table_name: str):
+    """別のプロセス（別クライアント）からの同名の参加も、予約アイテムの条件で弾く。"""
+
+    first = DynamoDBStore(table_name=dynamodb_table_name)
+    second = DynamoDBStore(table_name=dynamodb_table_name)
+    event = first.create_event("t", ["A"])
+
+    first.join_event(event.id, "たろう")
+    with pytest.raises(ValueError):
+        second.join_event(event.id, "たろう")
+    second.join_event(event.id, "じろう")
+    assert sorted(p.name for p in first.list_participants(event.id)) == ["じろう", "たろう"]
+
+
+def test_bulk_join_skips_reserved_and_duplicate_names(dynamodb_table_name: str):
+    """一括参加は予約済み・リクエスト内で重複する名前を None にし、残りを参加させる。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A"])
+    store.join_event(event.id, "b")
+
+    names = [f"p{i}" for i in range(60)] + ["b", "p1", "c"]
+    joined = store.join_event_bulk(event.id, names)
+    assert [p is None for p in joined] == [False] * 60 + [True, True, False]
+    assert len(store.list_participants(event.id)) == 62
+    with pytest.raises(KeyError):
+        store.join_event_bulk("evt_missing", ["x"])
+
+
+def test_reserve_participant_names_covers_legacy_participants(dynamodb_table_name: str):
+    """予約アイテムの導入前の参加者は、予約を登録すると同名で参加できなくなる。"""
+
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A"])
+    # 予約アイテムの無い、以前の形式の参加者
+    store._batch_write(
+        [
+            {
+                "pk": f"EVENT#{event.id}",
+                "sk": "PARTICIPANT#p_legacy",
+                "name": "たろう",
+                "participant_key": "k_legacy",
+            }
+        ]
+    )
+    store.join_event(event.id, "じろう")
+
+    assert store.reserve_participant_names(event.id) == 1
+    assert store.reserve_participant_names(event.id) == 0
+    with pytest.raises(ValueError):
+        store.join_event(event.id, "たろう")
+
+
+def test_join_backs_off_on_transaction_conflicts(
+    monkeypatch: pytest.MonkeyPatch, dynamodb_table_name: str
+):
+    """TransactionConflict は間隔を空けてやり直し、続くときは WriteConflictError にする。"""
+
+    import m1.store
+
+    sleeps: list[float] = []
+    monkeypatch.setattr(m1.store.time, "sleep", sleeps.append)
+    store = DynamoDBStore(table_name=dynamodb_table_name)
+    event = store.create_event("t", ["A"])
+    transact = store.client.transact_write_items
+    conflicts = [2]
+
+    def _transact_with_conflicts(**kwargs):
+        if conflicts[0] > 0:
+            conflicts[0] -= 1
+            raise store.client.exceptions.TransactionCanceledException(
+                {
+                    "Error": {"Code": "TransactionCanceledException", "Message": "conflict"},
+                    "CancellationReasons": [
+                        {"Code": "None"},
+                        {"Code": "TransactionConflict"},
+                        {"Code": "None"},
+                    ],
+                },
+                "TransactWriteItems",
+            )
+        return transact(**kwargs)
+
+    monkeypatch.setattr(store.client, "transact_write_items", _transact_with_conflicts)
+    participant = store.join_event(event.id, "たろう")
+    assert len(sleeps) == 2
+    assert store.list_participants(event.id) == [participant]
+
+    conflicts[0] = 100
+    with pytest.raises(WriteConflictError):
+        store.join_event(event.id, "じろう")
+    assert len(sleeps) == 2 + 4
+
+
+def test_join_api_maps_conflicts_and_missing_event(
+    monkeypatch: pytest.MonkeyPatch, dynamodb_table_name: str
+):
+    """参加 API はイベントを先に読まず、同名を 409、無いイベントを 404 にする。"""
+
+    monkeypatch.setenv("STORE_BACKEND", "dynamodb")
+    monkeypatch.setenv("DDB_TABLE_NAME", dynamodb_table_name)
+    with TestClient(create_app()) as client:
+        event_id = client.post("/api/events", json={"title": "t", "entries": ["A"]}).json()[
+            "event_id"
+        ]
+        url = f"/api/events/{event_id}/join"
+        assert client.post(url, json={"name": "たろう"}).status_code == 200
+        assert client.post(url, json={"name": "たろう"}).status_code == 409
+        missing = client.post("/api/events/evt_missing/join", json={"name": "たろう"})
+        assert missing.status_code == 404
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from m1.domain import ScoreItem
+from m1.store import InMemoryStore
+
+
+def test_concurrent_joins_and_writes_keep_store_consistent():
+    """複数スレッドからの参加・採点・読み取りが並行しても、重複参加や合計点のずれが起きない。"""
+
+    store = InMemoryStore.create(lock_stripes=4)
+    events = [store.create_event(f"t{i}", ["A", "B"]) for i in range(4)]
+
+    # 同じ名前での参加が競合しても、成功するのは1回だけ。
+    def try_join(args: tuple[str, str]) -> bool:
+        try:
+            store.join_event(*args)
+        except ValueError:
+            return False
+        return True
+
+    names = [(e.id, f"p{i}") for e in events for i in range(25)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        joined = list(pool.map(try_join, names * 4))
+    assert sum(joined) == len(names)
+    for event in events:
+        assert len(store.list_participants(event.id)) == 25
+
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def read_while_writing() -> None:
+        try:
+            last_versions = {e.id: 0 for e in events}
+            while not stop.is_set():
+                for event in events:
+                    version = store.get_event_version(event.id)
+                    assert version is not None and version >= last_versions[event.id]
+                    last_versions[event.id] = version
+                    store.list_scores_by_participant(event.id)
+                    totals = dict(store.get_ranked_totals(event))
+                    assert set(totals) == {e.id for e in event.entries}
+        except BaseException as e:  # noqa: BLE001 - スレッド内の失敗をテスト本体へ伝える
+            errors.append(e)
+
+    def write(event_index: int) -> None:
+        event = events[event_index]
+        a, b = (e.id for e in event.entries)
+        for round_ in range(20):
+            for p in store.list_participants(event.id):
+                store.put_scores(
+                    event.id,
+                    p.id,
+                    p.participant_key,
+                    [ScoreItem(entry_id=a, score=round_), ScoreItem(entry_id=b, score=1)],
+                )
+
+    readers = [threading.Thread(target=read_while_writing) for _ in range(2)]
+    for r in readers:
+        r.start()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, [0, 1, 2, 3, 0, 1, 2, 3]))
+    stop.set()
+    for r in readers:
+        r.join()
+
+    assert errors == []
+    for event in events:
+        a, b = (e.id for e in event.entries)
+        assert dict(store.get_ranked_totals(event)) == {a: 25 * 19, b: 25}
+        scores = store.list_scores_by_participant(event.id)
+        assert sum(s[a] for s in scores.values()) == 25 * 19
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from m1.domain import ScoreItem
+from m1.store import InMemoryStore
+
+
+def test_inmemory_store_lookups_are_scoped_to_event():
+    """参加者・採点の取得は対象イベントの分だけを返す。"""
+
+    store = InMemoryStore.create()
+    event1 = store.create_event("t1", ["A"])
+    event2 = store.create_event("t2", ["A"])
+    p1 = store.join_event(event1.id, "たろう")
+    p2 = store.join_event(event2.id, "じろう")
+    store.put_scores(
+        event1.id, p1.id, p1.participant_key, [ScoreItem(entry_id=event1.entries[0].id, score=7)]
+    )
+
+    assert [p.id for p in store.list_participants(event1.id)] == [p1.id]
+    assert [p.id for p in store.list_participants(event2.id)] == [p2.id]
+    assert store.get_participant(event2.id, p1.id) is None
+    assert store.list_scores_by_participant(event1.id) == {p1.id: {event1.entries[0].id: 7}}
+    assert store.list_scores_by_participant(event2.id) == {}
+    assert store.list_participants("evt_missing") == []
+
+
+def test_inmemory_store_keeps_scores_in_compact_matrix():
+    """採点は1セル1バイトの行列で持ち、0点と未採点を区別し、上書きは合計点に差分で反映する。"""
+
+    store = InMemoryStore.create()
+    event = store.create_event("t", ["A", "B", "C"])
+    a, b, c = (e.id for e in event.entries)
+    p1 = store.join_event(event.id, "たろう")
+    p2 = store.join_event(event.id, "じろう")
+    store.put_scores(
+        event.id,
+        p1.id,
+        p1.participant_key,
+        [ScoreItem(entry_id=a, score=0), ScoreItem(entry_id=b, score=100)],
+    )
+    store.put_scores(event.id, p2.id, p2.participant_key, [ScoreItem(entry_id=b, score=30)])
+    store.put_scores(
+        event.id,
+        p1.id,
+        p1.participant_key,
+        [ScoreItem(entry_id=b, score=40), ScoreItem(entry_id="ent_unknown", score=9)],
+    )
+
+    index = store.indexes[event.id]
+    assert isinstance(index.cells, bytearray)
+    assert len(index.cells) == 2 * 3
+    assert store.get_scores(event.id, p1.id) == {a: 0, b: 40}
+    assert store.list_scores_by_participant(event.id) == {p1.id: {a: 0, b: 40}, p2.id: {b: 30}}
+    assert store.get_ranked_totals(event) == [(b, 70), *sorted([(a, 0), (c, 0)])]
+    assert store.get_participant(event.id, p1.id) == p1
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from m1.domain import BulkScoreRow, ScoreItem
+from m1.main import create_app
+from m1.score_log import ScoreLog
+from m1.store import AsyncStoreAdapter, InMemoryStore, build_async_store
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _open(path: Path, clock: _Clock | None = None, **options) -> InMemoryStore:
+    log = ScoreLog(path, fsync_interval=0, clock=clock or _Clock(), **options)
+    store = InMemoryStore.create(score_log=log)
+    store.recover()
+    return store
+
+
+def _state(store: InMemoryStore, event_id: str):
+    event = store.get_event(event_id)
+    assert event is not None
+    return (
+        [(p.id, p.name, p.participant_key) for p in store.list_participants(event_id)],
+        store.list_scores_by_participant(event_id),
+        store.get_ranked_totals(event),
+        store.get_event_version(event_id),
+    )
+
+
+def _fill(store: InMemoryStore) -> str:
+    event = store.create_event("t", ["A", "B", "C"], aggregation="median")
+    a, b, c = (e.id for e in event.entries)
+    p1 = store.join_event(event.id, "たろう")
+    p2, p3 = store.join_event_bulk(event.id, ["じろう", "さぶろう"])
+    assert p2 is not None and p3 is not None
+    store.put_scores(event.id, p1.id, p1.participant_key, [ScoreItem(entry_id=a, score=90)])
+    store.put_scores_bulk(
+        event.id,
+        [
+            BulkScoreRow(
+                participant_id=p2.id,
+                participant_key=p2.participant_key,
+                scores=[ScoreItem(entry_id=a, score=10), ScoreItem(entry_id=b, score=70)],
+            ),
+            BulkScoreRow(
+                participant_id=p3.id,
+                participant_key=p3.participant_key,
+                scores=[ScoreItem(entry_id=c, score=0)],
+            ),
+        ],
+    )
+    store.put_scores(event.id, p1.id, p1.participant_key, [ScoreItem(entry_id=a, score=50)])
+    return event.id
+
+
+def test_restart_recovers_events_from_log(tmp_path: Path):
+    """再起動すると追記ログから参加者・採点・集計値・版数を同じ状態に復元する。"""
+
+    store = _open(tmp_path)
+    event_id = _fill(store)
+    expected = _state(store, event_id)
+    store.close()
+
+    restarted = _open(tmp_path)
+    assert _state(restarted, event_id) == expected
+    assert restarted.score_log is not None and restarted.score_log.stats.replayed == 8
+
+    # 復元後の書き込みもログに残り、もう一度再起動しても残る。
+    participant = restarted.join_event(event_id, "しろう")
+    restarted.close()
+    again = _open(tmp_path)
+    assert again.get_participant(event_id, participant.id) == participant
+
+
+def test_torn_tail_is_truncated_on_recovery(tmp_path: Path):
+    """書き込み途中で落ちた末尾のレコードは捨て、その後の追記は正しく読める。"""
+
+    store = _open(tmp_path)
+    event_id = _fill(store)
+    expected = _state(store, event_id)
+    store.close()
+    (log_path,) = tmp_path.glob("log-*.m1log")
+    with open(log_path, "ab") as f:
+        f.write(b"\x10\x00\x00\x00garbage")
+
+    restarted = _open(tmp_path)
+    assert _state(restarted, event_id) == expected
+    participant = restarted.join_event(event_id, "しろう")
+    restarted.close()
+    assert _open(tmp_path).get_participant(event_id, participant.id) == participant
+
+
+def test_compaction_bounds_replay_and_keeps_state(tmp_path: Path):
+    """圧縮すると古いログを消し、スナップショットとそれ以降のログから同じ状態に復元する。"""
+
+    store = _open(tmp_path)
+    event_id = _fill(store)
+    store.compact()
+    p = store.join_event(event_id, "しろう")
+    entry_id = store.indexes[event_id].entry_ids[1]
+    store.put_scores(event_id, p.id, p.participant_key, [ScoreItem(entry_id=entry_id, score=33)])
+    expected = _state(store, event_id)
+    store.close()
+
+    assert [p.name for p in sorted(tmp_path.iterdir())] == [
+        "log-00000002.m1log",
+        "snapshot-00000002.m1snap",
+    ]
+    restarted = _open(tmp_path)
+    assert _state(restarted, event_id) == expected
+    assert restarted.score_log is not None and restarted.score_log.stats.replayed == 3
+
+
+def test_compaction_runs_in_background_when_log_grows(tmp_path: Path):
+    """ログが compact_bytes を超えると、書き込みの後に別スレッドで圧縮する。"""
+
+    store = _open(tmp_path, compact_bytes=512)
+    event_id = _fill(store)
+    for i in range(20):
+        store.join_event(event_id, f"p{i}")
+    expected = _state(store, event_id)
+    store.close()
+
+    assert store.score_log is not None and store.score_log.stats.compactions >= 1
+    assert _state(_open(tmp_path), event_id) == expected
+
+
+def test_replay_event_rebuilds_past_results(tmp_path: Path):
+    """残っている世代の範囲なら、指定した時刻の時点のイベントを作り直せる。"""
+
+    clock = _Clock()
+    store = _open(tmp_path, clock, retain_generations=2)
+    event = store.create_event("t", ["A"])
+    entry_id = event.entries[0].id
+    p = store.join_event(event.id, "たろう")
+    clock.now = 2_000.0
+    store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=entry_id, score=10)])
+    clock.now = 3_000.0
+    store.compact()
+    store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=entry_id, score=90)])
+
+    def total_at(at: float) -> float | None:
+        replica = store.replay_event(event.id, at)
+        if replica is None:
+            return None
+        return replica.get_ranked_totals(event)[0][1]
+
+    assert total_at(999.0) is None
+    assert total_at(1_500.0) == 0
+    assert total_at(2_500.0) == 10
+    assert total_at(3_500.0) == 90
+    assert store.get_ranked_totals(event)[0][1] == 90
+
+
+def test_history_endpoint(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """履歴 API は過去の時点の結果を返し、追記ログが無ければ 404 になる。"""
+
+    with TestClient(create_app()) as client:
+        event_id = client.post("/api/events", json={"title": "t", "entries": ["A"]}).json()[
+            "event_id"
+        ]
+        resp = client.get(f"/api/events/{event_id}/results/history", params={"at": 0})
+        assert resp.status_code == 404
+
+    monkeypatch.setenv("INMEMORY_LOG_DIR", str(tmp_path))
+    with TestClient(create_app()) as client:
+        event_id = client.post("/api/events", json={"title": "t", "entries": ["A"]}).json()[
+            "event_id"
+        ]
+        client.post(f"/api/events/{event_id}/join", json={"name": "たろう"})
+        url = f"/api/events/{event_id}/results/history"
+        resp = client.get(url, params={"at": 4_102_444_800})
+        assert resp.status_code == 200
+        assert resp.json() == client.get(f"/api/events/{event_id}/results").json()
+        assert client.get(url, params={"at": 0}).status_code == 404
+
+    # 再起動しても同じイベントが残っている。
+    with TestClient(create_app()) as client:
+        assert client.get(f"/api/events/{event_id}").status_code == 200
+
+
+def test_background_fsync_does_not_block_appends(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """まとめての fsync の最中も追記はロックを待たずに進む。"""
+
+    import m1.score_log
+
+    syncing, release = threading.Event(), threading.Event()
+    real_fsync = m1.score_log.os.fsync
+
+    def _slow_fsync(fd: int) -> None:
+        syncing.set()
+        release.wait(5)
+        real_fsync(fd)
+
+    monkeypatch.setattr(m1.score_log.os, "fsync", _slow_fsync)
+    log = ScoreLog(tmp_path, fsync_interval=0.001)
+    try:
+        log.append(1, 1, b"a")
+        assert syncing.wait(5)
+        done = threading.Event()
+        threading.Thread(target=lambda: (log.append(1, 2, b"b"), done.set())).start()
+        assert done.wait(1)
+    finally:
+        release.set()
+        log.close()
+    reopened = ScoreLog(tmp_path, fsync_interval=0)
+    assert [r.payload for r in reopened.replay()] == [b"a", b"b"]
+    reopened.close()
+
+
+def test_async_store_uses_executor_when_log_is_configured(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """追記ログを使う in-memory ストアはスレッドプールで呼び、イベントループを塞がない。"""
+
+    monkeypatch.delenv("INMEMORY_LOG_DIR", raising=False)
+    plain = build_async_store()
+    assert isinstance(plain, AsyncStoreAdapter) and plain._executor is None
+
+    monkeypatch.setenv("INMEMORY_LOG_DIR", str(tmp_path))
+    logged = build_async_store()
+    assert isinstance(logged, AsyncStoreAdapter) and logged._executor is not None
+    asyncio.run(logged.aclose())
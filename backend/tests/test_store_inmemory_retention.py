@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from m1.domain import ScoreItem
+from m1.store import AsyncStoreAdapter, InMemoryStore, build_async_store
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction_spills_and_lazily_reloads_events(tmp_path: Path):
+    """上限を超えると最も古いイベントを書き出し、次のアクセスで同じ内容・版数のまま読み戻す。"""
+
+    store = InMemoryStore.create(max_events=2, spill_dir=tmp_path)
+    first = store.create_event("t1", ["A", "B"])
+    a, b = (e.id for e in first.entries)
+    p = store.join_event(first.id, "たろう")
+    store.put_scores(
+        first.id,
+        p.id,
+        p.participant_key,
+        [ScoreItem(entry_id=a, score=0), ScoreItem(entry_id=b, score=80)],
+    )
+    version = store.get_event_version(first.id)
+
+    second = store.create_event("t2", ["A"])
+    store.get_event(first.id)  # first を最近使ったことにする
+    third = store.create_event("t3", ["A"])
+
+    assert set(store.indexes) == {first.id, third.id}
+    assert store.stats.evictions == 1 and store.stats.spills == 1
+    assert (tmp_path / f"{second.id}.m1ev").exists()
+
+    store.create_event("t4", ["A"])
+    assert first.id not in store.indexes
+    assert store.get_event(first.id) == first
+    assert store.get_event_version(first.id) == version
+    assert store.get_scores(first.id, p.id) == {a: 0, b: 80}
+    assert store.get_ranked_totals(first) == [(b, 80), (a, 0)]
+    assert store.stats.reloads == 1
+    assert len(store.indexes) == 2
+    assert not (tmp_path / f"{first.id}.m1ev").exists()
+
+    assert store.get_event("../" + second.id) is None
+
+
+def test_ttl_and_byte_budget_evict_without_spill_dir():
+    """書き出し先が無ければ、期限切れ・容量超過で追い出したイベントは消える。"""
+
+    clock = _Clock()
+    store = InMemoryStore.create(ttl_seconds=60, clock=clock)
+    old = store.create_event("old", ["A"])
+    clock.now = 30
+    recent = store.create_event("recent", ["A"])
+    clock.now = 61
+    store.get_event(recent.id)
+
+    assert store.get_event(old.id) is None
+    assert store.get_event(recent.id) == recent
+    assert store.stats.expirations == 1
+
+    small = InMemoryStore.create()
+    event = small.create_event("t", ["A"] * 5)
+    for i in range(10):
+        small.join_event(event.id, f"p{i}")
+    budget = small.memory_bytes()
+    bounded = InMemoryStore.create(max_bytes=budget)
+    big = bounded.create_event("big", ["A"] * 5)
+    for i in range(10):
+        bounded.join_event(big.id, f"p{i}")
+    bounded.create_event("next", ["A"])
+    assert bounded.get_event(big.id) is None
+    assert bounded.memory_bytes() <= budget
+
+
+def test_async_store_uses_executor_when_spill_dir_is_configured(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """書き出し先を使う in-memory ストアはスレッドプールで呼び、読み戻しでループを塞がない。"""
+
+    monkeypatch.setenv("INMEMORY_SPILL_DIR", str(tmp_path))
+    store = build_async_store()
+    assert isinstance(store, AsyncStoreAdapter) and store._executor is not None
+    asyncio.run(store.aclose())
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from m1.domain import BulkScoreRow, ScoreItem
+from m1.main import create_app
+from m1.store import SQLiteStore
+
+
+def test_sqlite_store_persists_and_aggregates_totals_in_sql(tmp_path: Path):
+    """SQLite ストアは再オープン後も内容を保持し、合計点は SQL の集計で返す。"""
+
+    path = str(tmp_path / "m1.sqlite3")
+    store = SQLiteStore(path)
+    event = store.create_event("t", ["A", "B", "C"])
+    a, b, c = (e.id for e in event.entries)
+    p1 = store.join_event(event.id, "たろう")
+    p2 = store.join_event(event.id, "じろう")
+    with pytest.raises(ValueError):
+        store.join_event(event.id, " たろう ")
+    store.put_scores(event.id, p1.id, p1.participant_key, [ScoreItem(entry_id=a, score=10)])
+    store.put_scores(
+        event.id,
+        p2.id,
+        p2.participant_key,
+        [ScoreItem(entry_id=a, score=5), ScoreItem(entry_id=b, score=15)],
+    )
+    store.put_scores(event.id, p1.id, p1.participant_key, [ScoreItem(entry_id=a, score=1)])
+    with pytest.raises(PermissionError):
+        store.put_scores(event.id, p1.id, "wrong", [])
+    with pytest.raises(KeyError):
+        store.put_scores(event.id, "p_missing", "k", [])
+    version = store.get_event_version(event.id)
+    store.close()
+
+    reopened = SQLiteStore(path)
+    assert reopened.get_event(event.id) == event
+    assert reopened.get_event_version(event.id) == version
+    assert reopened.get_ranked_totals(event) == [(b, 15), (a, 6), (c, 0)]
+    assert reopened.get_scores(event.id, p2.id) == {a: 5, b: 15}
+    assert reopened.list_scores_by_participant(event.id) == {p1.id: {a: 1}, p2.id: {a: 5, b: 15}}
+    assert reopened.get_event_version("evt_missing") is None
+    assert reopened._conn().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    joined = reopened.join_event_bulk(event.id, ["さぶろう", "じろう", "さぶろう"])
+    assert joined[1] is None and joined[2] is None
+    assert reopened.put_scores_bulk(
+        event.id,
+        [
+            BulkScoreRow(
+                participant_id=joined[0].id,
+                participant_key=joined[0].participant_key,
+                scores=[ScoreItem(entry_id=c, score=20)],
+            ),
+            BulkScoreRow(participant_id=p1.id, participant_key="wrong", scores=[]),
+        ],
+    ) == [None, "invalid participant key"]
+    assert reopened.get_ranked_totals(event)[0] == (c, 20)
+    reopened.close()
+
+
+def test_sqlite_store_ignores_entries_not_in_event(tmp_path: Path):
+    """イベントに無い採点対象は、通常の採点でもまとめての採点でも書かない。"""
+
+    store = SQLiteStore(str(tmp_path / "m1.sqlite3"))
+    event = store.create_event("t", ["A"])
+    a = event.entries[0].id
+    p = store.join_event(event.id, "たろう")
+    junk = [ScoreItem(entry_id=eid, score=9) for eid in ("", "ent_unknown")]
+
+    store.put_scores(event.id, p.id, p.participant_key, [*junk, ScoreItem(entry_id=a, score=5)])
+    errors = store.put_scores_bulk(
+        event.id,
+        [BulkScoreRow(participant_id=p.id, participant_key=p.participant_key, scores=junk)],
+    )
+
+    assert errors == [None]
+    assert store.get_scores(event.id, p.id) == {a: 5}
+    assert store.list_scores_by_participant(event.id) == {p.id: {a: 5}}
+    assert store._conn().execute("SELECT COUNT(*) FROM scores").fetchone()[0] == 1
+
+
+def test_sqlite_store_shares_one_file_between_connections(tmp_path: Path):
+    """複数の接続（ワーカー相当）から同じファイルへ並行に書き込んでも取りこぼさない。"""
+
+    path = str(tmp_path / "m1.sqlite3")
+    setup = SQLiteStore(path)
+    event = setup.create_event("t", ["A"])
+    entry_id = event.entries[0].id
+    workers = [SQLiteStore(path) for _ in range(4)]
+
+    def write(store: SQLiteStore, worker: int) -> None:
+        for i in range(10):
+            p = store.join_event(event.id, f"w{worker}-{i}")
+            store.put_scores(
+                event.id, p.id, p.participant_key, [ScoreItem(entry_id=entry_id, score=1)]
+            )
+
+    threads = [threading.Thread(target=write, args=(s, i)) for i, s in enumerate(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(setup.list_participants(event.id)) == 40
+    assert setup.get_ranked_totals(event) == [(entry_id, 40)]
+    assert setup.get_event_version(event.id) == 1 + 80
+    for store in [setup, *workers]:
+        store.close()
+
+
+def test_app_runs_on_sqlite_backend(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """STORE_BACKEND=sqlite でアプリ全体が動く。"""
+
+    monkeypatch.setenv("STORE_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "app.sqlite3"))
+    with TestClient(create_app()) as client:
+        event_id = client.post("/api/events", json={"title": "t", "entries": ["A"]}).json()[
+            "event_id"
+        ]
+        joined = client.post(f"/api/events/{event_id}/join", json={"name": "たろう"}).json()
+        entry_id = client.get(f"/api/events/{event_id}").json()["entries"][0]["id"]
+        client.put(
+            f"/api/events/{event_id}/participants/{joined['participant_id']}/scores",
+            json={"scores": [{"entry_id": entry_id, "score": 42}]},
+            headers={"X-Participant-Key": joined["participant_key"]},
+        )
+        results = client.get(f"/api/events/{event_id}/results").json()
+    assert results["overall"][0]["total_score"] == 42
+    assert results["per_participant"][0]["rankings"][0]["score"] == 42
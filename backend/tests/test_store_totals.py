@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from m1.domain import ScoreItem
+from m1.ranking import compute_overall, compute_overall_from_ranked_totals
+from m1.store import InMemoryStore
+from m1.totals import RankedTotals
+
+
+def test_ranked_totals_keeps_order_after_delta_updates():
+    """差分更新後も合計点降順・entry_id昇順の並びを保つ。"""
+
+    totals = RankedTotals(["a", "b", "c"])
+    totals.apply_delta("b", 5)
+    totals.apply_delta("c", 5)
+    totals.apply_delta("a", 3)
+    totals.apply_delta("c", -5)
+    totals.apply_delta("zzz", 100)
+
+    assert totals.ranked() == [("b", 5), ("a", 3), ("c", 0)]
+
+
+def test_inmemory_store_totals_follow_score_overwrites():
+    """採点の上書き時は旧スコアとの差分で合計を更新し、全件集計と一致する。"""
+
+    store = InMemoryStore.create()
+    event = store.create_event("t", ["A", "B", "C"])
+    a, b, c = (e.id for e in event.entries)
+    p1 = store.join_event(event.id, "p1")
+    p2 = store.join_event(event.id, "p2")
+
+    store.put_scores(event.id, p1.id, p1.participant_key, [ScoreItem(entry_id=a, score=10)])
+    store.put_scores(
+        event.id,
+        p2.id,
+        p2.participant_key,
+        [ScoreItem(entry_id=a, score=5), ScoreItem(entry_id=b, score=15)],
+    )
+    store.put_scores(
+        event.id,
+        p1.id,
+        p1.participant_key,
+        [ScoreItem(entry_id=a, score=0), ScoreItem(entry_id=c, score=20)],
+    )
+
+    overall = compute_overall_from_ranked_totals(event.entries, store.get_ranked_totals(event))
+    expected = compute_overall(event.entries, store.list_scores_by_participant(event.id))
+    assert overall == expected
+    assert [(r.total_score, r.rank) for r in overall] == [(20, 1), (15, 2), (5, 3)]
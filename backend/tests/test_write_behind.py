@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from m1 import store as store_module
+from m1.domain import ScoreItem
+from m1.main import create_app
+from m1.store import AsyncStoreAdapter, InMemoryStore, read_scope
+from m1.write_behind import WriteBehindStore
+
+
+def _setup(window: float = 0.05):
+    inner = InMemoryStore.create()
+    event = inner.create_event("t", ["A", "B", "C"])
+    participant = inner.join_event(event.id, "たろう")
+    flushed: list[str] = []
+    store = WriteBehindStore(AsyncStoreAdapter(inner), window=window, on_flush=flushed.append)
+    return inner, event, participant, store, flushed
+
+
+def test_rapid_updates_are_coalesced_into_one_write():
+    """短時間の連続書き込みは1回にまとめ、セルごとに最後の値だけを書く。"""
+
+    inner, event, p, store, flushed = _setup()
+    a, b, c = (e.id for e in event.entries)
+    inner.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=c, score=50)])
+    version = inner.get_event_version(event.id)
+
+    async def scenario():
+        for score in range(1, 21):
+            items = [
+                ScoreItem(entry_id=a, score=score),
+                ScoreItem(entry_id=b, score=10),
+                ScoreItem(entry_id=c, score=50),
+            ]
+            await store.put_scores(event.id, p.id, p.participant_key, items)
+        # 書き込み前でも、その参加者の読み取りには最新の値が見える。
+        assert await store.get_scores(event.id, p.id) == {a: 20, b: 10, c: 50}
+        assert inner.get_event_version(event.id) == version
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+
+    assert inner.get_scores(event.id, p.id) == {a: 20, b: 10, c: 50}
+    assert inner.get_event_version(event.id) == version + 1
+    assert flushed == [event.id]
+    assert store.stats.requests == 20
+    assert store.stats.writes == 1
+    assert store.stats.cells_received == 60
+    assert store.stats.cells_written == 3
+
+
+def test_value_changed_by_another_writer_is_written_back():
+    """他の書き手がセルを書き換えた後で元の値を送っても、その値を書く（差分はストアが取る）。"""
+
+    inner, event, p, store, flushed = _setup()
+    a = event.entries[0].id
+
+    async def scenario():
+        await store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=50)])
+        await store.flush()
+        inner.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=70)])
+        await store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=50)])
+        await store.flush()
+
+    asyncio.run(scenario())
+
+    assert inner.get_scores(event.id, p.id) == {a: 50}
+    assert store.stats.writes == 2
+    assert flushed == [event.id, event.id]
+
+
+def test_aclose_flushes_pending_scores():
+    """終了時（aclose）には保留中の採点を書き出す。"""
+
+    inner, event, p, store, _flushed = _setup(window=60)
+    a = event.entries[0].id
+
+    async def scenario():
+        await store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=9)])
+        await store.aclose()
+
+    asyncio.run(scenario())
+
+    assert inner.get_scores(event.id, p.id) == {a: 9}
+
+
+class _RecordingAdapter(AsyncStoreAdapter):
+    """put_scores の呼び出しを記録し、`fail` の間は失敗させるアダプタ。"""
+
+    def __init__(self, store: InMemoryStore) -> None:
+        super().__init__(store)
+        self.fail = False
+        self.calls = 0
+        self.scopes: list[object] = []
+
+    async def put_scores(self, event_id, participant_id, participant_key, scores) -> None:
+        self.calls += 1
+        self.scopes.append(store_module._read_scope.get())
+        if self.fail:
+            raise RuntimeError("store is down")
+        await super().put_scores(event_id, participant_id, participant_key, scores)
+
+
+def test_persistent_failure_is_dropped_after_max_attempts():
+    """書き込みが失敗し続けたら、max_attempts 回で諦めて値を捨てる。"""
+
+    inner = InMemoryStore.create()
+    event = inner.create_event("t", ["A"])
+    p = inner.join_event(event.id, "たろう")
+    adapter = _RecordingAdapter(inner)
+    adapter.fail = True
+    store = WriteBehindStore(adapter, window=0.01, max_attempts=3)
+    a = event.entries[0].id
+
+    async def scenario():
+        await store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=5)])
+        # 0.01 + 0.02 + 0.04 秒で3回失敗する。
+        await asyncio.sleep(0.3)
+        assert adapter.calls == 3
+        assert store.stats.failures == 3
+        assert store.stats.dropped_cells == 1
+        # 捨てた後の新しい値は、失敗回数を数え直して書く。
+        adapter.fail = False
+        await store.put_scores(event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=6)])
+        await store.aclose()
+
+    asyncio.run(scenario())
+
+    assert adapter.calls == 4
+    assert store.stats.writes == 1
+    assert inner.get_scores(event.id, p.id) == {a: 6}
+
+
+def test_flush_task_does_not_inherit_read_scope():
+    """遅延書き込みのタスクは、リクエストの読み取りスコープを引き継がない。"""
+
+    inner = InMemoryStore.create()
+    event = inner.create_event("t", ["A"])
+    p = inner.join_event(event.id, "たろう")
+    adapter = _RecordingAdapter(inner)
+    store = WriteBehindStore(adapter, window=0.01)
+    a = event.entries[0].id
+
+    async def scenario():
+        with read_scope():
+            await store.put_scores(
+                event.id, p.id, p.participant_key, [ScoreItem(entry_id=a, score=5)]
+            )
+        await asyncio.sleep(0.1)
+        await store.aclose()
+
+    asyncio.run(scenario())
+
+    assert adapter.scopes == [None]
+    assert inner.get_scores(event.id, p.id) == {a: 5}
+
+
+def test_put_scores_checks_participant_and_key_immediately():
+    """参加者が無い・鍵が違う場合は、まとめずにその場でエラーにする。"""
+
+    _inner, event, p, store, _flushed = _setup()
+    items = [ScoreItem(entry_id=event.entries[0].id, score=1)]
+
+    async def scenario():
+        with pytest.raises(KeyError):
+            await store.put_scores(event.id, "missing", "k", items)
+        with pytest.raises(PermissionError):
+            await store.put_scores(event.id, p.id, "wrong", items)
+        await store.aclose()
+
+    asyncio.run(scenario())
+
+    assert store.stats.requests == 0
+
+
+def test_api_reads_own_scores_before_flush(monkeypatch: pytest.MonkeyPatch):
+    """WRITE_BEHIND_MS を設定しても、参加者の結果には直前の採点が反映される。"""
+
+    monkeypatch.setenv("WRITE_BEHIND_MS", "60000")
+    with TestClient(create_app()) as client:
+        event_id = client.post("/api/events", json={"title": "t", "entries": ["A", "B"]}).json()[
+            "event_id"
+        ]
+        joined = client.post(f"/api/events/{event_id}/join", json={"name": "たろう"}).json()
+        entry_id = client.get(f"/api/events/{event_id}").json()["entries"][0]["id"]
+        resp = client.put(
+            f"/api/events/{event_id}/participants/{joined['participant_id']}/scores",
+            json={"scores": [{"entry_id": entry_id, "score": 80}]},
+            headers={"X-Participant-Key": joined["participant_key"]},
+        )
+        assert resp.status_code == 200
+
+        result = client.get(
+            f"/api/events/{event_id}/results/participants/{joined['participant_id']}"
+        ).json()
+        assert {r["entry_id"]: r["score"] for r in result["rankings"]}[entry_id] == 80